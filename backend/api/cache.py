@@ -0,0 +1,32 @@
+from typing import Optional
+
+from fastapi import APIRouter, Header
+
+from services.result_cache import result_cache
+from services.result_store import result_store
+
+router = APIRouter(prefix="/cache", tags=["Cache"])
+
+
+def cache_enabled(cache_control: Optional[str] = Header(None)) -> bool:
+    """
+    请求头带 Cache-Control: no-cache / no-store 时跳过结果缓存。
+    """
+    if not cache_control:
+        return True
+    directives = {d.strip().lower() for d in cache_control.split(",")}
+    return not directives & {"no-cache", "no-store"}
+
+
+@router.get("/stats")
+def cache_stats():
+    return {**result_cache.stats(), "store": result_store.stats()}
+
+
+@router.post("/clear")
+def clear_cache():
+    """
+    清空内存缓存，并删除数据库中保存的计算结果，之后的请求都会重新计算。
+    """
+    result_cache.clear()
+    return {"cleared": True, "stored_results_deleted": result_store.clear()}
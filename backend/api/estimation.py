@@ -1,33 +1,132 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-import pandas as pd
-import io
+import json
+from typing import BinaryIO, Iterator, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
 
 from services.estimation_calculator import (
     calculate_expert_judgment,
-    calculate_delphi_method, calculate_regression_model, estimate_cocomo, estimate_function_point,
+    calculate_delphi_method, estimate_cocomo, estimate_function_point,
+    estimate_cocomo_bulk, estimate_function_point_bulk, EAF_DRIVERS,
 )
 
+from services.result_cache import result_cache
+from services.cocomo_calibration import calibration_store
+from services.regression_models import fit_regression, regression_store
+from api.cache import cache_enabled
+
 from models.estimation_model import (
     CocomoRequest, FunctionPointRequest, ExpertRequest,
-    DelphiRequest, RegressionRequest
+    DelphiRequest, RegressionRequest, BulkCocomoRequest, BulkFunctionPointRequest, CocomoHistoryRequest,
+    LinearRegressionRequest, RegressionObservations, RegressionPredictRequest
 )
+from api.streaming import (
+    check_stream_format, chunk_columns, detach_upload, result_frame, stream_csv_columns, stream_frames
+)
+from services.lazy_module import lazy_import
+
+pd = lazy_import("pandas")
+
 router = APIRouter(prefix="/estimation", tags=["Estimation"])
 
 @router.post("/cocomo")
-def cocomo_api(data: CocomoRequest):
+def cocomo_api(data: CocomoRequest, use_cache: bool = Depends(cache_enabled)):
+    try:
+        params, key = None, data.model_dump()
+        if data.calibration_id:
+            # 缓存键带上实际使用的版本号，避免追加数据后命中旧结果
+            calibration = calibration_store.get(data.calibration_id)
+            key["calibration_version"] = data.calibration_version or calibration.describe()["latest_version"]
+            params = calibration.cocomo_params(key["calibration_version"])
+        return result_cache.get_or_compute(
+            "estimation.cocomo", key,
+            lambda: estimate_cocomo(data.loc, data.mode, data.cost_drivers, data.cost_per_pm, params),
+            use_cache
+        )
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# COCOMO 校准：上传历史项目数据拟合系数，之后可追加数据增量更新
+CALIBRATION_COLUMNS = ["mode", "kloc", "effort", "duration"]
+
+
+def _history_batches(stream: BinaryIO) -> Iterator[dict]:
+    for chunk in stream_csv_columns(stream, CALIBRATION_COLUMNS, ["eaf"]):
+        batch = {k: chunk[k].to_numpy() for k in CALIBRATION_COLUMNS}
+        batch["eaf"] = chunk["eaf"].to_numpy() if "eaf" in chunk else None
+        yield batch
+
+
+@router.post("/calibrations")
+def create_calibration(data: CocomoHistoryRequest):
+    try:
+        return calibration_store.create([data.model_dump()])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/calibrations/upload")
+def create_calibration_from_file(file: UploadFile = File(...)):
+    """
+    CSV 需包含 mode, kloc, effort, duration 列，eaf 列可选；按块读取，内存占用与文件大小无关。
+    """
+    try:
+        return calibration_store.create(_history_batches(file.file))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/calibrations/{calibration_id}")
+def get_calibration(calibration_id: str, version: Optional[int] = Query(None)):
     try:
-        return estimate_cocomo(data.loc, data.mode, data.cost_drivers, data.cost_per_pm)
+        return calibration_store.get(calibration_id).describe(version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.delete("/calibrations/{calibration_id}", status_code=204)
+def delete_calibration(calibration_id: str):
+    try:
+        calibration_store.delete(calibration_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+
+
+@router.post("/calibrations/{calibration_id}/rows")
+def append_calibration_rows(calibration_id: str, data: CocomoHistoryRequest):
+    try:
+        return calibration_store.append(calibration_id, [data.model_dump()])
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/calibrations/{calibration_id}/upload")
+def append_calibration_file(calibration_id: str, file: UploadFile = File(...)):
+    try:
+        return calibration_store.append(calibration_id, _history_batches(file.file))
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/function_points")
-def function_points_api(data: FunctionPointRequest):
+def function_points_api(data: FunctionPointRequest, use_cache: bool = Depends(cache_enabled)):
     try:
-        return estimate_function_point(
-            data.fp_inputs,
-            data.fp_weights,
-            data.language,
-            data.cost_drivers
+        return result_cache.get_or_compute(
+            "estimation.function_points", data,
+            lambda: estimate_function_point(
+                data.fp_inputs,
+                data.fp_weights,
+                data.language,
+                data.cost_drivers
+            ),
+            use_cache
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -48,47 +147,233 @@ def delphi_api(data: DelphiRequest):
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+# 批量估算：JSON 列式数据或 CSV 上传，结果按 NDJSON / CSV 流式返回
+@router.post("/bulk/cocomo")
+def bulk_cocomo_api(data: BulkCocomoRequest, format: str = Query("ndjson")):
+    check_stream_format(format)
+    try:
+        result = estimate_cocomo_bulk(data.loc, data.mode, data.cost_drivers, data.cost_per_pm)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return stream_frames(chunk_columns(result), format)
+
+
+@router.post("/bulk/cocomo/upload")
+def bulk_cocomo_upload(file: UploadFile = File(...), format: str = Form("ndjson")):
+    """
+    CSV 需包含 loc, mode, cost_per_pm 列，成本驱动因子（RELY、CPLX 等）列可选。
+    """
+    check_stream_format(format)
+    stream = detach_upload(file)
+    try:
+        chunks = stream_csv_columns(stream, ["loc", "mode", "cost_per_pm"], EAF_DRIVERS)
+    except Exception:
+        stream.close()
+        raise
+
+    def frames():
+        start = 0
+        try:
+            for chunk in chunks:
+                drivers = {k: chunk[k].to_numpy() for k in EAF_DRIVERS if k in chunk}
+                result = estimate_cocomo_bulk(chunk["loc"].to_numpy(), chunk["mode"].to_numpy(), drivers,
+                                              chunk["cost_per_pm"].to_numpy())
+                yield result_frame(result, start)
+                start += len(chunk)
+        finally:
+            stream.close()
+
+    return stream_frames(frames(), format)
+
+
+@router.post("/bulk/function_points")
+def bulk_function_points_api(data: BulkFunctionPointRequest, format: str = Query("ndjson")):
+    check_stream_format(format)
+    try:
+        result = estimate_function_point_bulk(data.fp_inputs, data.fp_weights, data.language, data.cost_drivers)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return stream_frames(chunk_columns(result), format)
+
+
+@router.post("/bulk/function_points/upload")
+def bulk_function_points_upload(
+    file: UploadFile = File(...),
+    fp_weights: str = Form(...),
+    format: str = Form("ndjson")
+):
+    """
+    CSV 需包含 language 列和 fp_weights（JSON 对象）中每个功能点类型的列，其余列视为系统特征评分。
+    """
+    check_stream_format(format)
+    try:
+        weights = {k: float(v) for k, v in json.loads(fp_weights).items()}
+    except (ValueError, AttributeError):
+        raise HTTPException(status_code=400, detail="fp_weights must be a JSON object of numbers.")
+    stream = detach_upload(file)
+    try:
+        chunks = stream_csv_columns(stream, ["language", *weights], optional=None)
+    except Exception:
+        stream.close()
+        raise
+
+    def frames():
+        start = 0
+        try:
+            for chunk in chunks:
+                inputs = {k: chunk[k].to_numpy() for k in weights}
+                drivers = {k: chunk[k].to_numpy() for k in chunk.columns if k != "language" and k not in weights}
+                result = estimate_function_point_bulk(inputs, weights, chunk["language"].to_numpy(), drivers)
+                yield result_frame(result, start)
+                start += len(chunk)
+        finally:
+            stream.close()
+
+    return stream_frames(frames(), format)
+
+
 @router.post("/regression")
-async def regression_from_file(
+def regression_from_file(
     file: UploadFile = File(...),
     x_column: str = Form(...),
     y_column: str = Form(...),
-    predict_x: float = Form(...)
+    predict_x: str = Form(...),
+    confidence: float = Form(0.95),
+    save_model: bool = Form(False)
 ):
+    """
+    x_column 可用逗号分隔多个列名做多元回归，predict_x 按相同顺序给出各自变量的取值。
+    save_model=true 时保存拟合出的模型并返回 model_id，之后可通过 /estimation/regression/models/{model_id}/observations 追加数据递推更新。
+    观测数恰好等于参数个数（如一元回归只有两个点）时仍返回拟合结果，预测区间为 null。
+    """
     try:
-        content = await file.read()
-        # 自动处理编码（只对 CSV）
-        if file.filename.endswith(".csv"):
-            df = safe_read_csv(content)
-        elif file.filename.endswith(".xlsx"):
-            df = pd.read_excel(io.BytesIO(content))
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported file format.")
-
-        # 验证列存在
-        if x_column not in df.columns or y_column not in df.columns:
-            raise HTTPException(status_code=400, detail="Selected columns not found.")
-
-        inputs = df[[x_column, y_column]].dropna().values.tolist()
-        result = calculate_regression_model(inputs, predict_x)
-
-        return {
-            "regression_formula": f"y = {result['slope_b']}x + {result['intercept_a']}",
-            "intercept_a": result["intercept_a"],
-            "slope_b": result["slope_b"],
-            "predict_x": predict_x,
-            "predict_y": result["predict_y"],
-            "sample_count": result["sample_count"],
-            "r_squared": result["r_squared"]
+        x_columns = [c.strip() for c in x_column.split(",") if c.strip()]
+        try:
+            point = [float(v) for v in predict_x.split(",")]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="predict_x must be comma-separated numbers.")
+
+        # 只解析选中的列，按块并入 QR 充分统计量，不把整个文件读入内存
+        batches = _regression_batches(file, x_columns, y_column)
+        fit = regression_store.create if save_model else fit_regression
+        stored = fit(x_columns, batches, y_column)
+        summary = stored.describe()
+        prediction = stored.model.predict([point], confidence)[0]
+
+        coefficients = summary["coefficients"]
+        intercept = coefficients["intercept"]
+        terms = " + ".join(f"{round(coefficients[c], 4)}{'x' if len(x_columns) == 1 else c}" for c in x_columns)
+        result = {
+            "regression_formula": f"y = {terms} + {round(intercept, 4)}",
+            "intercept_a": round(intercept, 4),
         }
+        if len(x_columns) == 1:
+            result["slope_b"] = round(coefficients[x_columns[0]], 4)
+        result.update({
+            "predict_x": point[0] if len(point) == 1 else point,
+            "predict_y": round(prediction["predict_y"], 2),
+            "prediction_interval": None if prediction["lower"] is None else {
+                "lower": prediction["lower"], "upper": prediction["upper"], "confidence": confidence
+            },
+            "sample_count": summary["sample_count"],
+            "r_squared": round(summary["r_squared"], 4),
+            "adjusted_r_squared": summary["adjusted_r_squared"],
+            "coefficients": coefficients,
+            "standard_errors": summary["standard_errors"]
+        })
+        if save_model:
+            result["model_id"] = stored.id
+        return result
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def safe_read_csv(content: bytes) -> pd.DataFrame:
-    for enc in ['utf-8', 'gbk', 'ISO-8859-1']:
-        try:
-            return pd.read_csv(io.BytesIO(content), encoding=enc)
-        except UnicodeDecodeError:
-            continue
-    raise ValueError("Unable to decode CSV. Please save as UTF-8 encoding.")
\ No newline at end of file
+def _regression_batches(file: UploadFile, x_columns: List[str], y_column: str) -> Iterator[tuple]:
+    columns = x_columns + [y_column]
+    if file.filename.endswith(".csv"):
+        chunks = stream_csv_columns(file.file, columns)
+    elif file.filename.endswith(".xlsx"):
+        chunks = [read_excel_columns(file.file, columns)]
+    else:
+        raise HTTPException(status_code=400, detail="Unsupported file format.")
+    for chunk in chunks:
+        chunk = chunk[columns].apply(pd.to_numeric).dropna()
+        yield chunk[x_columns].to_numpy(), chunk[y_column].to_numpy()
+
+
+# 保存的回归模型：新观测按递推最小二乘并入，无需重新上传全部数据
+@router.post("/regression/models")
+def create_regression_model(data: LinearRegressionRequest):
+    try:
+        names = data.feature_names or [f"x{i + 1}" for i in range(len(data.x[0]) if data.x else 0)]
+        stored = regression_store.create(names, [(data.x, data.y)])
+        result = stored.describe()
+        if data.predict_x:
+            result["predictions"] = stored.model.predict(data.predict_x, data.confidence)
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/regression/models/{model_id}")
+def get_regression_model(model_id: str):
+    try:
+        return regression_store.get(model_id).describe()
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+
+
+@router.delete("/regression/models/{model_id}", status_code=204)
+def delete_regression_model(model_id: str):
+    try:
+        regression_store.delete(model_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+
+
+@router.post("/regression/models/{model_id}/observations")
+def append_regression_observations(model_id: str, data: RegressionObservations):
+    try:
+        return regression_store.append(model_id, [(data.x, data.y)]).describe()
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/regression/models/{model_id}/upload")
+def append_regression_file(model_id: str, file: UploadFile = File(...)):
+    """
+    文件需包含建模时使用的自变量列与因变量列。
+    """
+    try:
+        stored = regression_store.get(model_id)
+        batches = _regression_batches(file, stored.model.feature_names, stored.target)
+        return regression_store.append(model_id, batches).describe()
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/regression/models/{model_id}/predict")
+def predict_regression(model_id: str, data: RegressionPredictRequest):
+    try:
+        return {"model_id": model_id, "confidence": data.confidence,
+                "predictions": regression_store.get(model_id).model.predict(data.x, data.confidence)}
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def read_excel_columns(stream: BinaryIO, columns: List[str]) -> "pd.DataFrame":
+    header = pd.read_excel(stream, nrows=0).columns
+    if any(c not in header for c in columns):
+        raise HTTPException(status_code=400, detail="Selected columns not found.")
+    stream.seek(0)
+    return pd.read_excel(stream, usecols=columns)
@@ -1,20 +1,36 @@
-from typing import List
+from typing import Iterator, List
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, UploadFile
 
-from models.finance_model import CashFlowModel, ROIModel, EstimatesModel, BudgetModel
+from api.cache import cache_enabled
+from api.negotiation import negotiate
+from api.streaming import (
+    check_stream_format, chunk_columns, detach_upload, result_frame, stream_frames, stream_upload_columns
+)
+
+from models.finance_model import CashFlowModel, ROIModel, EstimatesModel, IRRModel, BudgetModel, BatchCashFlowModel, \
+    BulkBudgetModel, ForecastSeriesModel, ForecastObservationsModel
 
 from services.finance_calculator import (
-    calculate_npv, calculate_roi, calculate_irr, calculate_payback, track_budget, forecast_next_phase, analyze_variance
+    calculate_npv, calculate_roi, calculate_irr, calculate_payback, track_budget, forecast_next_phase, analyze_variance,
+    calculate_batch_metrics, analyze_variance_bulk
 )
 
+from services.forecasting import forecast_store
+from services.result_cache import result_cache
+from services.lazy_module import lazy_import
+
+pd = lazy_import("pandas")
+
 router = APIRouter(prefix="/finance", tags=["Finance"])
 
 # NPV
 @router.post("/npv")
-def npv(data: CashFlowModel):
+def npv(data: CashFlowModel, use_cache: bool = Depends(cache_enabled)):
     try:
-        result = calculate_npv(data.cash_flows, data.discount_rate)
+        result = result_cache.get_or_compute(
+            "finance.npv", data, lambda: calculate_npv(data.cash_flows, data.discount_rate), use_cache
+        )
         return {"npv": result}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -30,10 +46,11 @@ def roi(data: ROIModel):
 
 # IRR
 @router.post("/irr")
-def irr(data: EstimatesModel):
+def irr(data: IRRModel, use_cache: bool = Depends(cache_enabled)):
     try:
-        result = calculate_irr(data.cash_flows)
-        return {"irr_percent": result}
+        return result_cache.get_or_compute(
+            "finance.irr", data, lambda: calculate_irr(data.cash_flows, data.guess), use_cache
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -48,6 +65,15 @@ def payback(data: EstimatesModel):
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+# Batch NPV / IRR / Payback
+@router.post("/batch")
+def batch(data: BatchCashFlowModel, request: Request):
+    try:
+        result = calculate_batch_metrics(data.cash_flows, data.discount_rates, data.irr_guesses)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return negotiate(request, {"discount_rates": data.discount_rates, "results": result}, table=result)
+
 
 # Budget-tracking
 @router.post("/budget-tracking")
@@ -79,4 +105,91 @@ def forecast(data: List[BudgetModel]):
         result = forecast_next_phase(raw_data)
         return {"forecast": result}
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# 多项目预算序列的指数平滑预测：拟合后缓存平滑状态，追加新一期数据时只做一步递推
+@router.post("/forecasts")
+def create_forecast(data: ForecastSeriesModel):
+    try:
+        return forecast_store.create(data.series, data.model, data.horizon, data.confidence)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/forecasts/{forecast_id}")
+def get_forecast(forecast_id: str, horizon: int = Query(3, ge=1, le=120), confidence: float = Query(0.95, gt=0, lt=1)):
+    try:
+        return forecast_store.describe(forecast_id, horizon, confidence)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+
+
+@router.delete("/forecasts/{forecast_id}", status_code=204)
+def delete_forecast(forecast_id: str):
+    try:
+        forecast_store.delete(forecast_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+
+
+@router.post("/forecasts/{forecast_id}/observations")
+def append_forecast_observations(forecast_id: str, data: ForecastObservationsModel):
+    try:
+        return forecast_store.append(forecast_id, data.observations, data.refit, data.horizon, data.confidence)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# 批量预算偏差分析：列式 JSON 或 CSV / Parquet 文件输入，结果按块流式返回 NDJSON / CSV
+BUDGET_COLUMNS = ["phase", "budgeted_amount", "actual_amount"]
+
+
+def _variance_frames(chunks: Iterator) -> Iterator:
+    start = 0
+    for chunk in chunks:
+        result = analyze_variance_bulk(
+            pd.to_numeric(chunk["budgeted_amount"], errors="coerce").to_numpy(),
+            pd.to_numeric(chunk["actual_amount"], errors="coerce").to_numpy()
+        )
+        yield result_frame({"phase": chunk["phase"].to_numpy(), **result}, start)
+        start += len(chunk)
+
+
+@router.post("/bulk/variance-analysis")
+def bulk_variance_analysis(data: BulkBudgetModel, format: str = Query("ndjson")):
+    check_stream_format(format)
+    if len(data.phase) != len(data.budgeted_amount):
+        raise HTTPException(status_code=400, detail="All budget columns must have the same length.")
+    try:
+        result = analyze_variance_bulk(data.budgeted_amount, data.actual_amount)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return stream_frames(chunk_columns({"phase": data.phase, **result}), format)
+
+
+@router.post("/bulk/variance-analysis/upload")
+def bulk_variance_upload(file: UploadFile = File(...), format: str = Form("ndjson")):
+    """
+    CSV 或 Parquet 文件需包含 phase, budgeted_amount, actual_amount 列；按块读取、计算并输出，内存占用与行数无关。
+    """
+    check_stream_format(format)
+    stream = detach_upload(file)
+    try:
+        chunks = stream_upload_columns(stream, file.filename, BUDGET_COLUMNS)
+    except ValueError as e:
+        stream.close()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        stream.close()
+        raise
+
+    def frames():
+        try:
+            yield from _variance_frames(chunks)
+        finally:
+            stream.close()
+
+    return stream_frames(frames(), format)
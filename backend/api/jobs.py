@@ -0,0 +1,109 @@
+from functools import partial
+from operator import itemgetter
+from typing import Any, Dict
+
+from fastapi import APIRouter, Body, HTTPException, Query, Request
+from pydantic import ValidationError
+
+from api.negotiation import negotiate
+from api.risk import monte_carlo_response
+from models.risk_model import MonteCarloRequest, NPVSimulationRequest, SensitivityRequest
+from services.job_manager import job_manager, JobQueueFull, COMPLETED, FAILED, CANCELLED
+from services.risk_analysis import (
+    analyze_param, combine_monte_carlo, global_sensitivity_samples, monte_carlo_steps,
+    perform_global_sensitivity_analysis, sensitivity_steps, simulate_chunk
+)
+from services.stochastic_npv import combine_npv_simulation, npv_simulation_steps, simulate_npv_chunk
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+def _monte_carlo_job(req: MonteCarloRequest):
+    steps = monte_carlo_steps(req.base, req.std_dev, req.distribution, req.iterations, req.seed,
+                              full_distribution=req.full_distribution)
+    finalize = partial(combine_monte_carlo, req.base, req.std_dev, req.distribution,
+                       full_distribution=req.full_distribution)
+    return simulate_chunk, steps, finalize
+
+
+def _npv_simulation_job(req: NPVSimulationRequest):
+    plan, steps = npv_simulation_steps(
+        [p.model_dump() for p in req.cash_flows], req.discount_rate.model_dump(), req.iterations,
+        req.correlation, req.seed, req.full_distribution
+    )
+    return simulate_npv_chunk, steps, partial(combine_npv_simulation, plan, full_distribution=req.full_distribution)
+
+
+def _sensitivity_job(req: SensitivityRequest):
+    if req.method == "sobol":
+        # 全局分析已在单个步骤内向量化，整体作为一步执行；提交时先校验输入
+        global_sensitivity_samples(req.base_context, req.params, req.samples, req.sampler)
+        steps = [(req.base_context, req.params, req.samples, req.seed, req.sampler, req.bootstrap, req.confidence)]
+        return perform_global_sensitivity_analysis, steps, itemgetter(0)
+    if req.method != "one_at_a_time":
+        raise ValueError(f"Unsupported sensitivity method '{req.method}'.")
+    steps = sensitivity_steps(req.base_context, req.params, req.samples, req.seed)
+    return analyze_param, steps, list
+
+
+# 作业类型 -> (请求模型, 拆分为 (步骤函数, 步骤参数列表, 结果合并函数) 的构造器)
+JOB_KINDS = {
+    "monte-carlo": (MonteCarloRequest, _monte_carlo_job),
+    "npv-simulation": (NPVSimulationRequest, _npv_simulation_job),
+    "sensitivity": (SensitivityRequest, _sensitivity_job),
+}
+
+
+@router.post("/{kind}", status_code=202)
+def submit_job(kind: str, payload: Dict[str, Any] = Body(...), priority: int = Query(0)):
+    """
+    提交后台作业，立即返回 job_id；priority 越大越先执行。
+    """
+    if kind not in JOB_KINDS:
+        raise HTTPException(status_code=404, detail=f"Unknown job kind '{kind}'")
+    model, build = JOB_KINDS[kind]
+    try:
+        req = model.model_validate(payload)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+    try:
+        job = job_manager.submit(kind, *build(req), priority=priority)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return job.describe()
+
+
+def _get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+    return job
+
+
+@router.get("/{job_id}")
+def job_status(job_id: str):
+    return _get_job(job_id).describe()
+
+
+@router.get("/{job_id}/result")
+def job_result(job_id: str, request: Request):
+    job = _get_job(job_id)
+    if job.status == COMPLETED:
+        content = {"job_id": job.id, "status": job.status, "result": job.result}
+        if job.kind in ("monte-carlo", "npv-simulation"):
+            return monte_carlo_response(request, job.result, content)
+        table = job.result["indices"] if isinstance(job.result, dict) and "indices" in job.result else job.result
+        return negotiate(request, content, table=table)
+    if job.status in (FAILED, CANCELLED):
+        raise HTTPException(status_code=409, detail=f"Job {job.status}: {job.error or 'no result'}")
+    raise HTTPException(status_code=409, detail=f"Job is still {job.status}.")
+
+
+@router.post("/{job_id}/cancel")
+def cancel_job(job_id: str):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+    return job.describe()
@@ -0,0 +1,105 @@
+import time
+
+import anyio.to_thread
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from services.job_manager import job_manager
+from services.metrics import registry, SIZE_BUCKETS
+from services.process_pool import pending_work_items
+
+router = APIRouter(tags=["Metrics"])
+
+request_count = registry.counter(
+    "econ_http_requests_total", "HTTP requests by route and status code.", ("method", "route", "status")
+)
+request_duration = registry.histogram(
+    "econ_http_request_duration_seconds", "End-to-end HTTP request latency.", ("method", "route")
+)
+request_size = registry.histogram(
+    "econ_http_request_size_bytes", "HTTP request body size.", ("method", "route"), SIZE_BUCKETS
+)
+response_size = registry.histogram(
+    "econ_http_response_size_bytes", "HTTP response body size.", ("method", "route"), SIZE_BUCKETS
+)
+
+
+def _threadpool_stat(name: str) -> float:
+    # 同步路由运行在 anyio 默认线程池中，只能在事件循环线程里读取其限流器
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    if name == "busy":
+        return limiter.borrowed_tokens
+    if name == "waiting":
+        return limiter.statistics().tasks_waiting
+    return limiter.total_tokens
+
+
+registry.gauge("econ_threadpool_busy_threads", "Worker threads currently running sync endpoints.",
+               lambda: _threadpool_stat("busy"))
+registry.gauge("econ_threadpool_waiting_tasks", "Sync endpoint calls waiting for a free worker thread.",
+               lambda: _threadpool_stat("waiting"))
+registry.gauge("econ_threadpool_size", "Maximum worker threads for sync endpoints.",
+               lambda: _threadpool_stat("size"))
+registry.gauge("econ_process_pool_pending_items", "Tasks submitted to the process pool and not yet finished.",
+               pending_work_items)
+registry.gauge("econ_job_queue_depth", "Background jobs waiting to run.", lambda: job_manager.stats()["queued"])
+registry.gauge("econ_jobs_running", "Background jobs currently running.", lambda: job_manager.stats()["running"])
+
+
+class MetricsMiddleware:
+    """
+    ASGI 中间件：按路由模板统计请求数、状态码、延迟与请求 / 响应体大小。
+    路由标签取匹配到的路径模板（如 /jobs/{job_id}），未匹配的请求统一记为 "unmatched"，避免标签基数膨胀。
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes = None
+
+    def _route_path(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if self._routes is None:
+            self._routes = {route.endpoint: route.path for route in scope["app"].routes if hasattr(route, "endpoint")}
+        return self._routes.get(endpoint, "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        received = 0
+        sent = 0
+        status = 500
+
+        async def counting_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            nonlocal sent, status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            method = scope["method"]
+            route = self._route_path(scope)
+            request_duration.observe(time.perf_counter() - start, method, route)
+            request_size.observe(received, method, route)
+            response_size.observe(sent, method, route)
+            request_count.inc(method, route, str(status))
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(registry.expose(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import json
+import math
+from typing import Any, Dict, List, Optional, Union
+
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+
+from services.lazy_module import lazy_import
+
+np = lazy_import("numpy")
+
+# orjson / pyarrow 为可选依赖：缺少 orjson 时退回标准库 json，缺少 pyarrow 时不提供 Arrow 格式
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover
+    pa = None
+
+JSON_MEDIA_TYPE = "application/json"
+BINARY_MEDIA_TYPE = "application/octet-stream"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+BINARY_DTYPES = {"float64": "<f8", "float32": "<f4"}
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _finite(obj: Any) -> Any:
+    # 标准库 json 的预处理：与 orjson 一致，把 NaN / ±inf（含数组元素）输出为 null
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(v) for v in obj]
+    if isinstance(obj, (np.ndarray, np.generic)) or hasattr(obj, "model_dump"):
+        return _finite(_default(obj))
+    return obj
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    默认 JSON 响应：有 orjson 时用其序列化（NumPy 数组直接编码，不经逐元素 Python float），否则退回标准库。
+    两条路径都把非有限浮点数输出为 null。
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        return json.dumps(_finite(content), default=_default, ensure_ascii=False, allow_nan=False,
+                          separators=(",", ":")).encode("utf-8")
+
+
+def _media_ranges(accept: str) -> List[tuple]:
+    # 解析 Accept 头，按 q 值从高到低返回 (媒体类型, 参数字典)；同 q 值保持原顺序
+    ranges = []
+    for i, item in enumerate(accept.split(",")):
+        parts = [p.strip() for p in item.split(";")]
+        if not parts[0]:
+            continue
+        params = {}
+        for p in parts[1:]:
+            key, _, value = p.partition("=")
+            params[key.strip().lower()] = value.strip().strip('"')
+        try:
+            q = float(params.pop("q", 1))
+        except ValueError:
+            q = 0.0
+        if q > 0:
+            ranges.append((-q, i, parts[0].lower(), params))
+    ranges.sort()
+    return [(media_type, params) for _, _, media_type, params in ranges]
+
+
+def accepted_format(request: Request) -> tuple:
+    """
+    根据 Accept 头选出响应格式，返回 (媒体类型, 参数字典)；未带 Accept 或接受任意类型时为 JSON。
+    """
+    accept = request.headers.get("accept")
+    if not accept:
+        return JSON_MEDIA_TYPE, {}
+    for media_type, params in _media_ranges(accept):
+        if media_type in (JSON_MEDIA_TYPE, "*/*", "application/*"):
+            return JSON_MEDIA_TYPE, {}
+        if media_type in (BINARY_MEDIA_TYPE, ARROW_MEDIA_TYPE):
+            return media_type, params
+    raise HTTPException(
+        status_code=406,
+        detail=f"Supported media types: {JSON_MEDIA_TYPE}, {BINARY_MEDIA_TYPE}, {ARROW_MEDIA_TYPE}"
+    )
+
+
+def binary_response(array: np.ndarray, dtype: str = "float64", metadata: Optional[Dict] = None) -> Response:
+    """
+    一维数值结果直接以小端 float32 / float64 原始字节返回，形状与类型放在响应头中，
+    其余标量统计（metadata）以 JSON 放在 X-Metadata 头中。
+    """
+    if dtype not in BINARY_DTYPES:
+        raise HTTPException(status_code=406, detail=f"Unsupported dtype '{dtype}', use one of: {', '.join(BINARY_DTYPES)}")
+    buffer = np.ascontiguousarray(array, dtype=BINARY_DTYPES[dtype])
+    headers = {
+        "X-Array-Dtype": dtype,
+        "X-Array-Shape": ",".join(str(n) for n in buffer.shape)
+    }
+    if metadata:
+        headers["X-Metadata"] = FastJSONResponse(metadata).body.decode("utf-8")
+    return Response(buffer.tobytes(), media_type=BINARY_MEDIA_TYPE, headers=headers)
+
+
+def arrow_response(table: Union[Dict[str, Any], List[Dict]]) -> Response:
+    """
+    表格结果（按列字典或记录列表）序列化为 Arrow IPC 流。
+    """
+    if pa is None:
+        raise HTTPException(status_code=406, detail="Arrow output requires pyarrow, which is not installed.")
+    if isinstance(table, dict):
+        arrow_table = pa.table({k: np.asarray(v) if isinstance(v, np.ndarray) else v for k, v in table.items()})
+    else:
+        # 各行的键可能不同（如只有失败行带 error），按全部键的并集建列，缺失处为 null
+        keys = dict.fromkeys(k for row in table for k in row)
+        arrow_table = pa.table({k: [row.get(k) for row in table] for k in keys})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, arrow_table.schema) as writer:
+        writer.write_table(arrow_table)
+    return Response(sink.getvalue().to_pybytes(), media_type=ARROW_MEDIA_TYPE)
+
+
+def negotiate(request: Request, content: Any, array: Optional[np.ndarray] = None,
+              table: Union[Dict[str, Any], List[Dict], None] = None, metadata: Optional[Dict] = None) -> Response:
+    """
+    按 Accept 头返回 JSON（content）、二进制数组（array）或 Arrow 表（table）。
+    端点不提供对应形式的数据时返回 406。直接返回 Response，跳过 FastAPI 的 jsonable_encoder。
+    """
+    media_type, params = accepted_format(request)
+    if media_type == BINARY_MEDIA_TYPE:
+        if array is None:
+            raise HTTPException(status_code=406, detail="This endpoint has no numeric array output.")
+        return binary_response(array, params.get("dtype", "float64"), metadata)
+    if media_type == ARROW_MEDIA_TYPE:
+        if table is None:
+            raise HTTPException(status_code=406, detail="This endpoint has no tabular output.")
+        return arrow_response(table)
+    return FastJSONResponse(content)
@@ -1,38 +1,169 @@
-from fastapi import APIRouter
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import Dict, List
 
-from models.risk_model import SensitivityRequest, DecisionPath, MonteCarloRequest
-from services.risk_analysis import perform_sensitivity_analysis, perform_decision_tree, perform_monte_carlo_simulation
+from models.risk_model import (
+    SensitivityRequest, DecisionPath, MonteCarloRequest, NPVSimulationRequest, DecisionGraphRequest, DecisionGraphChange
+)
+from services.risk_analysis import (
+    perform_sensitivity_analysis, perform_global_sensitivity_analysis, perform_decision_tree, perform_monte_carlo_simulation
+)
+from services.decision_graph import decision_graph_store, evaluate_decision_graph
+from services.result_cache import result_cache
+from services.stochastic_npv import perform_npv_simulation
+from api.cache import cache_enabled
+from api.negotiation import negotiate
 
 router = APIRouter(prefix="/risk", tags=["Risk Analysis"])
 
 
 
 @router.post("/sensitivity")
-def run_sensitivity(req: SensitivityRequest):
+def run_sensitivity(req: SensitivityRequest, request: Request):
     """
     多参数敏感性分析接口，基于 base_context + params 分析 NPV 波动。
+    method='sobol' 时返回全局 Sobol 一阶 / 总效应指数及其 bootstrap 置信区间。
     """
-    return perform_sensitivity_analysis(req.base_context, req.params)
+    try:
+        if req.method == "sobol":
+            result = perform_global_sensitivity_analysis(
+                req.base_context, req.params, req.samples, req.seed, req.sampler, req.bootstrap, req.confidence
+            )
+            return negotiate(request, result, table=result["indices"])
+        if req.method != "one_at_a_time":
+            raise ValueError(f"Unsupported sensitivity method '{req.method}'.")
+        result = perform_sensitivity_analysis(req.base_context, req.params, req.samples, req.seed, req.parallel)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return negotiate(request, result, table=result)
 
 @router.post("/decision-tree")
-def run_decision_tree(paths: List[DecisionPath]):
+def run_decision_tree(paths: List[DecisionPath], use_cache: bool = Depends(cache_enabled)):
     """
     接收多条路径（概率+价值），计算期望收益。
     """
-    expected_value = perform_decision_tree(paths)
+    expected_value = result_cache.get_or_compute(
+        "risk.decision_tree", paths, lambda: perform_decision_tree(paths), use_cache
+    )
     return {"expected_value": expected_value}
 
 
+@router.post("/decision-graph")
+def run_decision_graph(req: DecisionGraphRequest, use_cache: bool = Depends(cache_enabled)):
+    """
+    决策树 / DAG 回溯求值（决策节点取最大、机会节点取期望），返回期望值与最优策略，不保存模型。
+    """
+    try:
+        return result_cache.get_or_compute(
+            "risk.decision_graph", req,
+            lambda: evaluate_decision_graph([n.model_dump() for n in req.nodes], req.root), use_cache
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/decision-graphs")
+def create_decision_graph(req: DecisionGraphRequest):
+    """
+    保存决策图并求值，返回 graph_id，之后可通过 PATCH 增量修改概率或收益。
+    """
+    try:
+        return decision_graph_store.create([n.model_dump() for n in req.nodes], req.root)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/decision-graphs/{graph_id}")
+def get_decision_graph(graph_id: str):
+    try:
+        return decision_graph_store.describe(graph_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+
+
+@router.delete("/decision-graphs/{graph_id}", status_code=204)
+def delete_decision_graph(graph_id: str):
+    try:
+        decision_graph_store.delete(graph_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+
+
+@router.patch("/decision-graphs/{graph_id}")
+def update_decision_graph(graph_id: str, changes: List[DecisionGraphChange], include_policy: bool = Query(True)):
+    """
+    批量修改后只重算受影响节点到根的路径；修改不合法（如概率和不为 1）时整批不生效。
+    """
+    try:
+        return decision_graph_store.update(graph_id, [c.model_dump() for c in changes], include_policy)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def monte_carlo_response(request: Request, result: Dict, content=None):
+    """
+    Monte Carlo 结果的内容协商：二进制格式返回样本数组（统计量放在 X-Metadata 头），Arrow 返回单列 npv 表。
+    """
+    samples = result["npv_distribution"]
+    metadata = {k: v for k, v in result.items() if k != "npv_distribution"}
+    return negotiate(request, result if content is None else content, samples, {"npv": samples}, metadata)
+
+
 @router.post("/monte-carlo")
-def run_monte_carlo(req: MonteCarloRequest):
+def run_monte_carlo(req: MonteCarloRequest, request: Request, use_cache: bool = Depends(cache_enabled)):
     """
     执行蒙特卡洛模拟，返回分布数据及统计指标。
+    只有指定 seed 的模拟是确定性的，才会走结果缓存；parallel 不影响结果，不参与缓存键。
+    返回完整分布（full_distribution）时结果体积大，不进入缓存。
     """
-    result = perform_monte_carlo_simulation(
-        base=req.base,
-        std_dev=req.std_dev,
-        distribution=req.distribution,
-        iterations=req.iterations
-    )
-    return result
\ No newline at end of file
+    def simulate():
+        return perform_monte_carlo_simulation(
+            base=req.base,
+            std_dev=req.std_dev,
+            distribution=req.distribution,
+            iterations=req.iterations,
+            seed=req.seed,
+            parallel=req.parallel,
+            full_distribution=req.full_distribution
+        )
+
+    try:
+        if req.seed is None or req.full_distribution:
+            result = simulate()
+        else:
+            result = result_cache.get_or_compute(
+                "risk.monte_carlo", req.model_dump(exclude={"parallel"}), simulate, use_cache
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return monte_carlo_response(request, result)
+
+
+@router.post("/npv-simulation")
+def run_npv_simulation(req: NPVSimulationRequest, request: Request, use_cache: bool = Depends(cache_enabled)):
+    """
+    多期相关随机 NPV 模拟：各期现金流与折现率按给定分布和相关矩阵抽样，返回 NPV 分布及统计指标。
+    缓存规则与 /monte-carlo 相同。
+    """
+    def simulate():
+        return perform_npv_simulation(
+            cash_flows=[p.model_dump() for p in req.cash_flows],
+            discount_rate=req.discount_rate.model_dump(),
+            iterations=req.iterations,
+            correlation=req.correlation,
+            seed=req.seed,
+            parallel=req.parallel,
+            full_distribution=req.full_distribution
+        )
+
+    try:
+        if req.seed is None or req.full_distribution:
+            result = simulate()
+        else:
+            result = result_cache.get_or_compute(
+                "risk.npv_simulation", req.model_dump(exclude={"parallel"}), simulate, use_cache
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return monte_carlo_response(request, result)
@@ -1,24 +1,101 @@
-from fastapi import APIRouter
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import List, Optional
 
-from models.scheduling_model import Task, BalanceInput
+from api.cache import cache_enabled
+from api.negotiation import negotiate
+from models.scheduling_model import Task, BalanceInput, CriticalPathRequest, ProjectTaskChange
+from services.critical_path import analyze_critical_path, project_network_store
+from services.result_cache import result_cache
 from services.scheduling_calculator import improved_greedy_schedule, \
-    improved_resource_smoothing
+    improved_resource_smoothing, anytime_schedule
 
 router = APIRouter(prefix="/scheduling")
 
+# greedy：一次贪心；anytime：以贪心为起点在 time_budget_ms 内继续搜索，返回最优解与改进轨迹
+OPTIMIZE_MODES = ("greedy", "anytime")
+
+
 @router.post("/optimize")
-def optimize_schedule(tasks: List[Task]):
-    result = improved_greedy_schedule([t.dict() for t in tasks])
-    return {"schedule": result}
+def optimize_schedule(
+    tasks: List[Task],
+    request: Request,
+    mode: str = Query("greedy"),
+    time_budget_ms: float = Query(100, gt=0, le=10000),
+    seed: Optional[int] = Query(0),
+    max_iterations: Optional[int] = Query(None, ge=0)
+):
+    if mode not in OPTIMIZE_MODES:
+        raise HTTPException(status_code=400, detail=f"Unsupported mode '{mode}', use one of: {', '.join(OPTIMIZE_MODES)}")
+    if mode == "greedy":
+        result = improved_greedy_schedule([t.dict() for t in tasks])
+        return negotiate(request, {"schedule": result}, table=result)
+    result = anytime_schedule([t.dict() for t in tasks], time_budget_ms, seed, max_iterations)
+    return negotiate(request, result, table=result["schedule"])
 
 
 @router.post("/smooth")
-def smooth_resources(data: BalanceInput):
-    result = improved_resource_smoothing(
-        [t.dict() for t in data.tasks],
-        data.total_resources,
-        data.total_time
-    )
-    return {"allocation": result}
+def smooth_resources(data: BalanceInput, request: Request):
+    try:
+        result = improved_resource_smoothing(
+            [t.dict() for t in data.tasks],
+            data.total_resources,
+            data.total_time,
+            data.policy
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return negotiate(request, {"allocation": result}, table=result)
+
+
+@router.post("/critical-path")
+def critical_path(req: CriticalPathRequest, use_cache: bool = Depends(cache_enabled)):
+    """
+    CPM / PERT：最早 / 最迟开始与完成、总时差、关键路径、项目期望工期与方差，不保存网络。
+    """
+    try:
+        return result_cache.get_or_compute(
+            "scheduling.critical_path", req,
+            lambda: analyze_critical_path([t.model_dump() for t in req.tasks], req.target_duration), use_cache
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/networks")
+def create_network(req: CriticalPathRequest, include_tasks: bool = Query(True)):
+    """
+    保存项目网络并计算，返回 network_id，之后可通过 PATCH 修改工期并增量重算。
+    """
+    try:
+        return project_network_store.create([t.model_dump() for t in req.tasks], include_tasks, req.target_duration)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/networks/{network_id}")
+def get_network(network_id: str, include_tasks: bool = Query(True), target_duration: Optional[float] = Query(None)):
+    try:
+        return project_network_store.describe(network_id, include_tasks, target_duration)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+
+
+@router.delete("/networks/{network_id}", status_code=204)
+def delete_network(network_id: str):
+    try:
+        project_network_store.delete(network_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+
 
+@router.patch("/networks/{network_id}")
+def update_network(network_id: str, changes: List[ProjectTaskChange], include_tasks: bool = Query(True)):
+    """
+    批量修改任务工期（或三点估计）后只重算受影响的前驱与后继；任一修改不合法时整批不生效。
+    """
+    try:
+        return project_network_store.update(network_id, [c.model_dump() for c in changes], include_tasks)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import codecs
+import io
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+
+from services.lazy_module import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+STREAM_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+STREAM_CHUNK_ROWS = 10_000
+# 编码探测只看文件开头这么多字节；上传文件按块读取的行数
+ENCODING_PROBE_BYTES = 64 * 1024
+UPLOAD_CHUNK_ROWS = 100_000
+
+
+def check_stream_format(fmt: str) -> str:
+    if fmt not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{fmt}', use one of: {', '.join(STREAM_FORMATS)}")
+    return fmt
+
+
+def result_frame(columns: Dict[str, np.ndarray], start: int = 0) -> pd.DataFrame:
+    """
+    按列组织的结果转成 DataFrame，第一列为从 start 开始的全局行号。
+    """
+    n = len(next(iter(columns.values()), []))
+    return pd.DataFrame({"row": np.arange(start, start + n), **columns})
+
+
+def chunk_columns(columns: Dict[str, np.ndarray], rows: int = STREAM_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    把按列组织的结果切成若干 DataFrame 块。
+    """
+    frame = result_frame(columns)
+    for start in range(0, len(frame), rows):
+        yield frame.iloc[start:start + rows]
+
+
+def stream_frames(frames: Iterable[pd.DataFrame], fmt: str) -> StreamingResponse:
+    """
+    逐块序列化为 NDJSON 或 CSV 并流式返回，服务端不拼接完整响应体。
+    """
+    def body():
+        first = True
+        for frame in frames:
+            if fmt == "csv":
+                yield frame.to_csv(index=False, header=first)
+            elif len(frame):
+                yield frame.to_json(orient="records", lines=True, force_ascii=False).rstrip("\n") + "\n"
+            first = False
+
+    return StreamingResponse(body(), media_type=STREAM_FORMATS[fmt])
+
+
+def detach_upload(file: UploadFile) -> BinaryIO:
+    """
+    接管上传文件句柄：框架会在处理函数返回后关闭 UploadFile，
+    而流式响应还要继续读取，因此换出底层文件，由响应生成器读完后自行关闭。
+    """
+    stream = file.file
+    file.file = io.BytesIO()
+    return stream
+
+
+def detect_encoding(prefix: bytes) -> str:
+    """
+    依次尝试 utf-8 / gbk / ISO-8859-1 解码文件开头，截断在多字节字符中间不算失败。
+    """
+    for enc in ['utf-8', 'gbk', 'ISO-8859-1']:
+        try:
+            codecs.getincrementaldecoder(enc)().decode(prefix, final=False)
+            return enc
+        except UnicodeDecodeError:
+            continue
+    raise ValueError("Unable to decode CSV. Please save as UTF-8 encoding.")
+
+
+def stream_csv_columns(stream: BinaryIO, columns: List[str], optional: Optional[Iterable[str]] = (),
+                       chunksize: int = UPLOAD_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    只探测一次编码、校验表头，然后返回按块读取指定列（及存在的可选列；optional=None 表示其余所有列）的迭代器。
+    校验在返回前完成，以便流式响应开始前就能报错。
+    """
+    encoding = detect_encoding(stream.read(ENCODING_PROBE_BYTES))
+    stream.seek(0)
+    header = pd.read_csv(stream, encoding=encoding, nrows=0).columns
+    if any(c not in header for c in columns):
+        raise HTTPException(status_code=400, detail="Selected columns not found.")
+    if optional is None:
+        optional = header
+    usecols = list(columns) + [c for c in optional if c in header and c not in columns]
+    stream.seek(0)
+    return _decoded_chunks(pd.read_csv(stream, encoding=encoding, usecols=usecols, chunksize=chunksize))
+
+
+def _decoded_chunks(reader) -> Iterator[pd.DataFrame]:
+    try:
+        yield from reader
+    except UnicodeDecodeError:
+        raise ValueError("Unable to decode CSV. Please save as UTF-8 encoding.")
+
+
+def stream_parquet_columns(stream: BinaryIO, columns: List[str],
+                           chunksize: int = UPLOAD_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    按记录批读取 Parquet 文件的指定列（需要 pyarrow）；与 stream_csv_columns 相同，在返回前校验列名。
+    """
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise HTTPException(status_code=400, detail="Parquet upload requires pyarrow, which is not installed.")
+    try:
+        parquet = pq.ParquetFile(stream)
+    except Exception:
+        raise ValueError("Unable to read Parquet file.")
+    if any(c not in parquet.schema_arrow.names for c in columns):
+        raise HTTPException(status_code=400, detail="Selected columns not found.")
+    return (batch.to_pandas() for batch in parquet.iter_batches(batch_size=chunksize, columns=list(columns)))
+
+
+def stream_upload_columns(stream: BinaryIO, filename: str, columns: List[str]) -> Iterator[pd.DataFrame]:
+    """
+    按扩展名选择 CSV / Parquet 的分块读取。
+    """
+    if filename.endswith(".csv"):
+        return stream_csv_columns(stream, columns)
+    if filename.endswith(".parquet"):
+        return stream_parquet_columns(stream, columns)
+    raise HTTPException(status_code=400, detail="Unsupported file format.")
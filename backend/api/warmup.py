@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+
+from services.warmup import warm_up, warmup_status
+
+router = APIRouter(prefix="/warmup", tags=["Warmup"])
+
+
+@router.get("")
+def get_warmup_status():
+    return warmup_status()
+
+
+@router.post("")
+def run_warmup():
+    """
+    显式预热：导入重型依赖并执行一次代表性计算（部署后、接入流量前调用）。
+    """
+    return warm_up()
@@ -0,0 +1,99 @@
+"""
+服务冷启动基准：每次在全新的子进程中 import main（相当于一个 worker 的启动），
+记录导入耗时、常驻内存（RSS）以及哪些重型依赖已被加载；可选再执行一次预热，记录预热耗时与预热后的内存。
+
+用法（在 backend 目录下）：
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 10 --warmup --output benchmarks/startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+# 在子进程中执行：只用标准库测量，避免测量代码本身引入依赖
+_PROBE = r"""
+import json, resource, sys, time
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # 非 Linux 平台退回进程峰值内存（macOS 单位为字节，Linux 为 KB）
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+out = {"baseline_rss_mb": rss_mb()}
+start = time.perf_counter()
+import main
+out["import_s"] = time.perf_counter() - start
+out["rss_mb"] = rss_mb()
+out["modules"] = len(sys.modules)
+out["loaded"] = {m: m in sys.modules for m in ("numpy", "pandas", "sqlalchemy", "db")}
+if WARMUP:
+    from services.warmup import warm_up
+    start = time.perf_counter()
+    warm_up()
+    out["warmup_s"] = time.perf_counter() - start
+    out["warm_rss_mb"] = rss_mb()
+print(json.dumps(out))
+"""
+
+
+def probe(warmup: bool) -> Dict:
+    env = dict(os.environ, ECON_WARMUP="0")
+    proc = subprocess.run(
+        [sys.executable, "-c", f"WARMUP = {warmup}\n" + _PROBE],
+        capture_output=True, text=True, env=env, check=True
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def summarize(samples: List[Dict]) -> Dict:
+    keys = [k for k, v in samples[0].items() if isinstance(v, (int, float)) and not isinstance(v, bool)]
+    summary = {}
+    for key in keys:
+        values = [s[key] for s in samples]
+        summary[key] = {
+            "median": round(statistics.median(values), 4),
+            "min": round(min(values), 4),
+            "max": round(max(values), 4)
+        }
+    summary["loaded"] = samples[0]["loaded"]
+    return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Cold-start import time and resident memory per worker")
+    parser.add_argument("--runs", type=int, default=5, help="number of fresh interpreter runs")
+    parser.add_argument("--warmup", action="store_true", help="also run the warm-up hook after import")
+    parser.add_argument("--output", help="write the summary as JSON")
+    args = parser.parse_args(argv)
+
+    # 第一次运行只用于生成字节码缓存等一次性开销，不计入结果
+    probe(False)
+    samples = [probe(args.warmup) for _ in range(args.runs)]
+    summary = summarize(samples)
+
+    print(f"{'metric':<18}{'median':>10}{'min':>10}{'max':>10}")
+    for key, stats in summary.items():
+        if key == "loaded":
+            continue
+        print(f"{key:<18}{stats['median']:>10}{stats['min']:>10}{stats['max']:>10}")
+    print("loaded after import:", ", ".join(m for m, v in summary["loaded"].items() if v) or "none")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"python": sys.version.split()[0], "runs": args.runs, **summary}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""
+services/ 下各计算函数的微基准：按输入规模扫描，记录耗时与峰值内存，拟合经验复杂度，
+结果保存为 JSON 基线；compare 子命令把当前结果与基线对比，超出阈值的变慢会被标出。
+
+用法（在 backend 目录下）：
+    python -m benchmarks.suite run --output benchmarks/baseline.json
+    python -m benchmarks.suite run --only greedy --quick
+    python -m benchmarks.suite compare --baseline benchmarks/baseline.json --threshold 0.2
+"""
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, NamedTuple
+
+import numpy as np
+
+from services.estimation_calculator import (
+    calculate_regression_model, calculate_expert_judgment, calculate_delphi_method,
+    estimate_cocomo_bulk, estimate_function_point_bulk, EAF_RATINGS
+)
+from services.finance_calculator import (
+    calculate_npv, calculate_payback, calculate_batch_metrics, track_budget, analyze_variance,
+    forecast_next_phase
+)
+from services.critical_path import analyze_critical_path
+from services.forecasting import fit_exponential_smoothing
+from services.irr_solver import solve_irr
+from services.risk_analysis import (
+    perform_sensitivity_analysis, perform_global_sensitivity_analysis, perform_monte_carlo_simulation, perform_decision_tree,
+    SensitivityParam, DecisionPath
+)
+from services.scheduling_calculator import improved_greedy_schedule, improved_resource_smoothing
+
+DEFAULT_BASELINE = "benchmarks/baseline.json"
+
+
+class Case(NamedTuple):
+    name: str
+    parameter: str  # 被扫描的规模参数
+    sizes: List[int]
+    setup: Callable[[int], tuple]  # 规模 -> 函数参数（不计入计时）
+    fn: Callable
+
+
+def _cash_flows(n: int) -> List[float]:
+    rng = random.Random(n)
+    return [-1000.0] + [rng.uniform(0, 100) for _ in range(n - 1)]
+
+
+def _tasks(n: int, horizon: int) -> List[dict]:
+    rng = random.Random(n * 31 + horizon)
+    tasks = []
+    for i in range(n):
+        start = rng.randrange(0, max(horizon - 50, 1))
+        duration = rng.randint(1, 30)
+        tasks.append({
+            "name": f"t{i}",
+            "duration": duration,
+            "deadline": min(horizon, start + duration + rng.randint(0, 500)),
+            "priority": rng.randint(1, 5),
+            "earliest_start": start
+        })
+    return tasks
+
+
+def _workloads(n: int) -> List[dict]:
+    rng = random.Random(n)
+    return [{"name": f"w{i}", "workload": rng.uniform(1, 30), "flexibility": rng.randint(0, 40)} for i in range(n)]
+
+
+def _budget_rows(n: int) -> List[dict]:
+    rng = random.Random(n)
+    return [{"phase": f"p{i}", "budgeted_amount": rng.uniform(1, 1e5), "actual_amount": rng.uniform(1, 1e5)}
+            for i in range(n)]
+
+
+def _budget_series(n: int, length: int) -> List[List[float]]:
+    rng = np.random.default_rng(n)
+    trend = rng.uniform(-50, 200, (n, 1))
+    return (1e4 + trend * np.arange(length) + rng.normal(0, 300, (n, length))).tolist()
+
+
+def _project_tasks(n: int) -> List[dict]:
+    # 每个任务依赖最近 50 个任务中随机的至多 3 个，形成较深的随机 DAG
+    rng = random.Random(n)
+    return [{"name": f"t{i}", "duration": rng.randint(1, 10),
+             "predecessors": [f"t{j}" for j in {rng.randrange(max(i - 50, 0), i) for _ in range(3)}] if i else []}
+            for i in range(n)]
+
+
+def _cocomo_columns(n: int) -> tuple:
+    rng = np.random.default_rng(n)
+    modes = rng.choice(["organic", "semi-detached", "embedded"], n).tolist()
+    drivers = {"RELY": rng.choice(EAF_RATINGS, n).tolist(), "CPLX": rng.choice(EAF_RATINGS, n).tolist()}
+    return rng.uniform(1, 500, n).tolist(), modes, drivers, [10000.0] * n
+
+
+def _fp_columns(n: int) -> tuple:
+    rng = np.random.default_rng(n)
+    inputs = {k: rng.integers(0, 50, n).tolist() for k in ("EI", "EO", "EQ", "ILF", "EIF")}
+    weights = {"EI": 4, "EO": 5, "EQ": 4, "ILF": 10, "EIF": 7}
+    drivers = {f"GSC{i}": rng.integers(0, 6, n).tolist() for i in range(14)}
+    return inputs, weights, rng.choice(["java", "python"], n).tolist(), drivers
+
+
+CASES = [
+    Case("npv", "periods", [100, 1000, 10000, 100000],
+         lambda n: (_cash_flows(n), 0.001), calculate_npv),
+    Case("payback", "periods", [100, 1000, 10000, 100000],
+         lambda n: ([-1e9] + _cash_flows(n)[1:],), calculate_payback),
+    Case("batch_metrics", "series", [100, 1000, 10000],
+         lambda n: ([_cash_flows(40) for _ in range(n)], [0.05, 0.1]), calculate_batch_metrics),
+    Case("irr_solver", "series", [100, 1000, 10000],
+         lambda n: (np.array([_cash_flows(40) for _ in range(n)]),), solve_irr),
+    Case("track_budget", "rows", [1000, 10000, 100000],
+         lambda n: (_budget_rows(n),), track_budget),
+    Case("variance_analysis", "rows", [1000, 10000, 100000],
+         lambda n: (_budget_rows(n),), analyze_variance),
+    Case("forecast", "rows", [1000, 10000, 100000],
+         lambda n: (_budget_rows(n),), forecast_next_phase),
+    Case("exp_smoothing", "series", [100, 1000, 10000],
+         lambda n: (_budget_series(n, 24),), fit_exponential_smoothing),
+    Case("sensitivity", "samples", [1000, 10000, 100000, 1000000],
+         lambda n: ({"cash_flows": _cash_flows(40), "discount_rate": 0.1},
+                    [SensitivityParam(name="discount_rate", min=0.02, max=0.2, distribution=d)
+                     for d in ("uniform", "triangular", "normal")], n, 1),
+         perform_sensitivity_analysis),
+    Case("sobol_sensitivity", "samples", [1024, 8192, 65536],
+         lambda n: ({"cash_flows": _cash_flows(40), "discount_rate": 0.1},
+                    [SensitivityParam(name="discount_rate", min=0.02, max=0.2)]
+                    + [SensitivityParam(name=f"cash_flows[{t}]", min=500, max=1500, distribution="triangular")
+                       for t in range(1, 6)], n, 1),
+         perform_global_sensitivity_analysis),
+    Case("monte_carlo", "iterations", [10000, 100000, 1000000, 10000000],
+         lambda n: (1000.0, 250.0, "normal", n), perform_monte_carlo_simulation),
+    Case("decision_tree", "paths", [100, 1000, 10000],
+         lambda n: ([DecisionPath(probability=1 / n, value=float(i)) for i in range(n)],), perform_decision_tree),
+    Case("greedy_tasks", "tasks", [500, 2000, 8000, 32000],
+         lambda n: (_tasks(n, 100000),), improved_greedy_schedule),
+    Case("greedy_horizon", "horizon", [10000, 100000, 1000000],
+         lambda n: (_tasks(5000, n),), improved_greedy_schedule),
+    Case("critical_path", "tasks", [1000, 10000, 100000],
+         lambda n: (_project_tasks(n),), analyze_critical_path),
+    Case("smoothing", "tasks", [250, 1000, 4000],
+         lambda n: (_workloads(n), 100.0 * n, 300), improved_resource_smoothing),
+    Case("smoothing_least_loaded", "tasks", [250, 1000, 4000],
+         lambda n: (_workloads(n), 100.0 * n, 300, "least_loaded"), improved_resource_smoothing),
+    Case("regression", "rows", [1000, 10000, 100000, 1000000],
+         lambda n: (np.random.default_rng(n).uniform(0, 100, (n, 2)).tolist(), 10.0), calculate_regression_model),
+    Case("cocomo_bulk", "rows", [1000, 10000, 100000],
+         _cocomo_columns, estimate_cocomo_bulk),
+    Case("function_point_bulk", "rows", [1000, 10000, 100000],
+         _fp_columns, estimate_function_point_bulk),
+    Case("expert_judgment", "experts", [100, 1000, 10000],
+         lambda n: ([{"estimate": float(i), "confidence": 0.5} for i in range(n)],), calculate_expert_judgment),
+    Case("delphi", "estimates_per_round", [100, 1000, 10000],
+         lambda n: ([[float(i % 7) for i in range(n)] for _ in range(5)], 0.1), calculate_delphi_method),
+]
+
+
+def measure(fn: Callable, args: tuple, repeats: int) -> Dict[str, float]:
+    """
+    取多次运行的最短耗时；峰值内存用 tracemalloc 单独跑一次测量（其开销不计入耗时）。
+    """
+    best = math.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak}
+
+
+def fit_complexity(sizes: List[int], seconds: List[float]) -> float:
+    """
+    对 log(time) ~ log(n) 做最小二乘，斜率即经验复杂度指数 k（time ∝ n^k）。
+    """
+    if len(sizes) < 2:
+        return float("nan")
+    slope, _ = np.polyfit(np.log(sizes), np.log(np.maximum(seconds, 1e-9)), 1)
+    return float(slope)
+
+
+def run(only: List[str], quick: bool, repeats: int) -> Dict:
+    results = {}
+    for case in CASES:
+        if only and not any(o in case.name for o in only):
+            continue
+        sizes = case.sizes[:3] if quick else case.sizes
+        points = []
+        for n in sizes:
+            point = {"size": n, **measure(case.fn, case.setup(n), repeats)}
+            points.append(point)
+            print(f"{case.name:22s} {case.parameter}={n:<9d} {point['seconds'] * 1000:10.2f} ms "
+                  f"{point['peak_bytes'] / 2 ** 20:9.2f} MiB", flush=True)
+        exponent = fit_complexity([p["size"] for p in points], [p["seconds"] for p in points])
+        print(f"{case.name:22s} empirical complexity ~ O(n^{exponent:.2f})", flush=True)
+        results[case.name] = {"parameter": case.parameter, "exponent": exponent, "points": points}
+
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cases": results
+    }
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """
+    返回变慢超过 threshold（相对值）的 (用例, 规模) 说明列表。
+    """
+    regressions = []
+    for name, case in current["cases"].items():
+        base_case = baseline["cases"].get(name)
+        if base_case is None:
+            continue
+        base_points = {p["size"]: p for p in base_case["points"]}
+        for point in case["points"]:
+            base = base_points.get(point["size"])
+            if base is None or base["seconds"] <= 0:
+                continue
+            ratio = point["seconds"] / base["seconds"]
+            status = "SLOWER" if ratio > 1 + threshold else "ok"
+            print(f"{name:22s} {case['parameter']}={point['size']:<9d} "
+                  f"{base['seconds'] * 1000:10.2f} -> {point['seconds'] * 1000:10.2f} ms  x{ratio:5.2f}  {status}")
+            if status != "ok":
+                regressions.append(f"{name} @ {case['parameter']}={point['size']}: x{ratio:.2f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="run the suite and save results as a baseline")
+    run_parser.add_argument("--output", default=DEFAULT_BASELINE)
+    run_parser.add_argument("--only", nargs="*", default=[], help="substring filter on case names")
+    run_parser.add_argument("--quick", action="store_true", help="only the three smallest sizes per case")
+    run_parser.add_argument("--repeats", type=int, default=3)
+
+    cmp_parser = sub.add_parser("compare", help="run the suite and compare against a saved baseline")
+    cmp_parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    cmp_parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative slowdown")
+    cmp_parser.add_argument("--only", nargs="*", default=[])
+    cmp_parser.add_argument("--quick", action="store_true")
+    cmp_parser.add_argument("--repeats", type=int, default=3)
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        results = run(args.only, args.quick, args.repeats)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"saved {args.output}")
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    only = args.only or list(baseline["cases"])
+    current = run(only, args.quick, args.repeats)
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} slowdown(s) beyond {args.threshold:.0%}:")
+        for line in regressions:
+            print("  " + line)
+        sys.exit(1)
+    print("no slowdowns beyond threshold")
+
+
+if __name__ == "__main__":
+    main()
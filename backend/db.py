@@ -1,6 +1,159 @@
-# 如果你不使用数据库可以暂时留空或写连接池配置
-# 以后可扩展 SQLAlchemy Session/Engine 等
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Iterator, Optional
 
-from sqlalchemy.orm import declarative_base
+from sqlalchemy import JSON, DateTime, Float, ForeignKey, Index, Integer, String, UniqueConstraint, create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, declarative_base, mapped_column, relationship, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# 数据库连接与连接池配置，未配置时使用当前目录下的 SQLite 文件（只有开启 ECON_PERSIST_RESULTS 时才会访问数据库）
+DATABASE_URL_ENV = "ECON_DATABASE_URL"
+DB_POOL_SIZE_ENV = "ECON_DB_POOL_SIZE"
+DB_MAX_OVERFLOW_ENV = "ECON_DB_MAX_OVERFLOW"
+DB_POOL_TIMEOUT_ENV = "ECON_DB_POOL_TIMEOUT"
+DB_POOL_RECYCLE_ENV = "ECON_DB_POOL_RECYCLE"
+
+DEFAULT_DATABASE_URL = "sqlite:///./economic_analysis.db"
 
 Base = declarative_base()
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class Scenario(Base):
+    """
+    一次确定性计算的身份：namespace（接口）+ 规范化请求的 SHA-256（与结果缓存的键相同）。
+    """
+    __tablename__ = "scenarios"
+    __table_args__ = (UniqueConstraint("namespace", "request_hash"),)
+
+    id = mapped_column(Integer, primary_key=True)
+    namespace = mapped_column(String(64), nullable=False)
+    request_hash = mapped_column(String(64), nullable=False)
+    created_at = mapped_column(DateTime(timezone=True), nullable=False, default=_utcnow)
+
+    inputs = relationship("ScenarioInput", back_populates="scenario", uselist=False)
+    results = relationship("ComputedResult", back_populates="scenario")
+
+
+class ScenarioInput(Base):
+    __tablename__ = "scenario_inputs"
+
+    id = mapped_column(Integer, primary_key=True)
+    scenario_id = mapped_column(ForeignKey("scenarios.id"), nullable=False, unique=True)
+    payload = mapped_column(JSON, nullable=False)
+
+    scenario = relationship("Scenario", back_populates="inputs")
+
+
+class ComputedResult(Base):
+    __tablename__ = "computed_results"
+    __table_args__ = (Index("ix_computed_results_lookup", "namespace", "request_hash"),)
+
+    id = mapped_column(Integer, primary_key=True)
+    scenario_id = mapped_column(ForeignKey("scenarios.id"), nullable=False, index=True)
+    namespace = mapped_column(String(64), nullable=False)
+    request_hash = mapped_column(String(64), nullable=False)
+    code_version = mapped_column(String(64))  # 计算该结果的代码版本，查找时只匹配当前版本
+    result = mapped_column(JSON, nullable=False)
+    compute_ms = mapped_column(Float)
+    created_at = mapped_column(DateTime(timezone=True), nullable=False, default=_utcnow)
+
+    scenario = relationship("Scenario", back_populates="results")
+
+
+_engine: Optional[Engine] = None
+_session_factory: Optional[sessionmaker] = None
+_lock = threading.Lock()
+
+
+def _create_engine(url: str) -> Engine:
+    if url.startswith("sqlite"):
+        connect_args = {"check_same_thread": False}
+        if url in ("sqlite://", "sqlite:///:memory:"):
+            # 内存库只在单个连接内存在，所有会话共享同一连接
+            return create_engine(url, connect_args=connect_args, poolclass=StaticPool)
+        engine = create_engine(
+            url,
+            connect_args=connect_args,
+            pool_size=int(os.environ.get(DB_POOL_SIZE_ENV, "5")),
+            max_overflow=int(os.environ.get(DB_MAX_OVERFLOW_ENV, "10")),
+            pool_timeout=float(os.environ.get(DB_POOL_TIMEOUT_ENV, "30")),
+        )
+
+        @event.listens_for(engine, "connect")
+        def _sqlite_pragmas(dbapi_connection, _):
+            # WAL 模式下读写互不阻塞，批量写入不影响并发查询
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.close()
+
+        return engine
+
+    return create_engine(
+        url,
+        pool_size=int(os.environ.get(DB_POOL_SIZE_ENV, "5")),
+        max_overflow=int(os.environ.get(DB_MAX_OVERFLOW_ENV, "10")),
+        pool_timeout=float(os.environ.get(DB_POOL_TIMEOUT_ENV, "30")),
+        pool_recycle=int(os.environ.get(DB_POOL_RECYCLE_ENV, "1800")),
+        pool_pre_ping=True,
+    )
+
+
+def get_engine() -> Engine:
+    """
+    返回进程内共享的 Engine（带连接池），首次使用时创建并建表。
+    """
+    global _engine, _session_factory
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                engine = _create_engine(os.environ.get(DATABASE_URL_ENV, DEFAULT_DATABASE_URL))
+                Base.metadata.create_all(engine)
+                _session_factory = sessionmaker(bind=engine, expire_on_commit=False)
+                _engine = engine
+    return _engine
+
+
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """
+    事务范围内的会话：正常结束时提交，异常时回滚。
+    """
+    get_engine()
+    session = _session_factory()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def get_db() -> Iterator[Session]:
+    """
+    FastAPI 依赖：每个请求一个会话，请求结束后归还连接。
+    """
+    get_engine()
+    session = _session_factory()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def dispose_engine() -> None:
+    global _engine, _session_factory
+    with _lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+            _session_factory = None
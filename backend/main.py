@@ -1,8 +1,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from api import estimation, finance, risk, scheduling
+from api import cache, estimation, finance, jobs, metrics, risk, scheduling, warmup
+from api.metrics import MetricsMiddleware
+from api.negotiation import FastJSONResponse
+from services.job_manager import job_manager
+from services.metrics import METRICS_ENABLED
+from services.process_pool import shutdown_process_pool
+from services.result_store import result_store
+from services.warmup import start_warm_up
 
-app = FastAPI(title="Economic Analysis API")
+app = FastAPI(title="Economic Analysis API", default_response_class=FastJSONResponse)
 
 # 允许跨域（前端请求用）
 app.add_middleware(
@@ -13,8 +20,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 请求指标（ECON_METRICS=0 时不挂载）
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # 注册路由
 app.include_router(finance.router)
 app.include_router(estimation.router)
 app.include_router(risk.router)
 app.include_router(scheduling.router)
+app.include_router(cache.router)
+app.include_router(jobs.router)
+app.include_router(metrics.router)
+app.include_router(warmup.router)
+
+
+@app.on_event("startup")
+def warm_up_dependencies():
+    # 重型依赖默认在首次使用时加载；ECON_WARMUP=1 / sync 时在启动阶段预先加载
+    start_warm_up()
+
+
+@app.on_event("shutdown")
+def close_process_pool():
+    job_manager.shutdown()
+    shutdown_process_pool()
+    result_store.close()
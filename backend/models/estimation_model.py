@@ -1,5 +1,5 @@
 from typing import Optional, List, Tuple, Dict
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 # 使用前端配置的权重计算
 class FunctionPointRequest(BaseModel):
@@ -13,6 +13,8 @@ class CocomoRequest(BaseModel):
     mode: str
     cost_drivers: Dict[str, str]
     cost_per_pm: float  # 每人月成本（例如：￥10,000）
+    calibration_id: Optional[str] = None  # 使用校准后的系数，为空时用教科书系数
+    calibration_version: Optional[int] = None  # 为空时使用该校准模型的最新版本
 
 class ExpertEntry(BaseModel):
     name: str = None
@@ -28,4 +30,41 @@ class DelphiRequest(BaseModel):
 
 class RegressionRequest(BaseModel):
     data: List[List[float]]  # [[x, y], [x, y], ...]
-    predict_x: float
\ No newline at end of file
+    predict_x: float
+
+# 多元回归：x 为 行数 × 变量数，y 为对应的因变量
+class LinearRegressionRequest(BaseModel):
+    x: List[List[float]]
+    y: List[float]
+    feature_names: Optional[List[str]] = None  # 为空时命名为 x1, x2, ...
+    predict_x: Optional[List[List[float]]] = None
+    confidence: float = Field(0.95, gt=0, lt=1)  # 预测区间的置信水平
+
+class RegressionObservations(BaseModel):
+    x: List[List[float]]
+    y: List[float]
+
+class RegressionPredictRequest(BaseModel):
+    x: List[List[float]]
+    confidence: float = Field(0.95, gt=0, lt=1)
+
+# 批量估算：按列组织，每个列表的长度都等于行数
+class BulkCocomoRequest(BaseModel):
+    loc: List[float]
+    mode: List[str]
+    cost_per_pm: List[float]
+    cost_drivers: Dict[str, List[Optional[str]]] = {}  # 驱动因子名 -> 每行的评级
+
+class BulkFunctionPointRequest(BaseModel):
+    language: List[str]
+    fp_inputs: Dict[str, List[float]]  # 功能点类型 -> 每行的计数
+    fp_weights: Dict[str, float]  # 所有行共用的权重
+    cost_drivers: Dict[str, List[float]] = {}  # 系统特征 -> 每行的评分
+
+# COCOMO 校准用的历史项目数据，按列组织
+class CocomoHistoryRequest(BaseModel):
+    mode: List[str]
+    kloc: List[float]
+    effort: List[float]  # 实际工作量（人月）
+    duration: List[float]  # 实际工期（月）
+    eaf: Optional[List[float]] = None  # 各项目的工作量调整因子，为空视为 1
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
 # 通用模型
 class CashFlowModel(BaseModel):
     cash_flows: List[float]
@@ -12,7 +12,34 @@ class ROIModel(BaseModel):
 class EstimatesModel(BaseModel):
     cash_flows: List[float]
 
+class IRRModel(EstimatesModel):
+    guess: Optional[float] = None  # 热启动初值，例如上一次的 IRR（小数）
+
 class BudgetModel(BaseModel):
     phase: str  # 项目阶段（如“设计阶段”、“开发阶段”）
     budgeted_amount: float  # 预算金额
-    actual_amount: float  # 实际金额
\ No newline at end of file
+    actual_amount: float  # 实际金额
+
+# 批量预算分析：按列组织，每个列表的长度都等于行数
+class BulkBudgetModel(BaseModel):
+    phase: List[Optional[str]]
+    budgeted_amount: List[Optional[float]]
+    actual_amount: List[Optional[float]]
+
+class BatchCashFlowModel(BaseModel):
+    cash_flows: List[List[float]]  # 每行一个项目的现金流，允许长度不同
+    discount_rates: List[float] = Field(default_factory=lambda: [0.1], min_length=1)
+    irr_guesses: Optional[List[float]] = None  # 逐行 IRR 热启动初值
+
+# 多序列指数平滑预测：序列名 -> 各期金额
+class ForecastSeriesModel(BaseModel):
+    series: Dict[str, List[float]] = Field(..., min_length=1)
+    model: str = "auto"  # auto / simple / holt / damped
+    horizon: int = Field(3, ge=1, le=120)
+    confidence: float = Field(0.95, gt=0, lt=1)  # 预测区间的置信水平
+
+class ForecastObservationsModel(BaseModel):
+    observations: Dict[str, List[float]]  # 序列名 -> 新增的各期金额
+    refit: bool = False  # 是否用全部历史重新选择模型与参数
+    horizon: int = Field(3, ge=1, le=120)
+    confidence: float = Field(0.95, gt=0, lt=1)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 
 class SensitivityParam(BaseModel):
@@ -11,6 +11,13 @@ class SensitivityParam(BaseModel):
 class SensitivityRequest(BaseModel):
     base_context: Dict[str, Any]  # 包括 cash_flows, discount_rate 等上下文
     params: List[SensitivityParam]
+    samples: int = Field(200, gt=0, le=1_000_000, example=200)  # 每个参数的采样数；method='sobol' 时为基础样本数 N
+    seed: Optional[int] = None  # 随机种子，相同种子结果可复现
+    parallel: bool = False  # 是否按参数分发到进程池并行计算
+    method: str = "one_at_a_time"  # 'one_at_a_time' 逐参数变化；'sobol' 全局方差分解（一阶 / 总效应指数）
+    sampler: str = "sobol"  # method='sobol' 时的采样序列：'sobol'（加扰 Sobol）或 'lhs'（拉丁超立方）
+    bootstrap: int = Field(100, ge=0, le=2000)  # Sobol 指数置信区间的 bootstrap 次数，0 表示不计算
+    confidence: float = Field(0.95, gt=0, lt=1)
 
 class DecisionPath(BaseModel):
     probability: float = Field(..., ge=0.0, le=1.0, example=0.6)
@@ -20,4 +27,43 @@ class MonteCarloRequest(BaseModel):
     base: float = Field(..., example=1000)
     std_dev: float = Field(..., example=250)
     distribution: str = Field(..., example="normal")
-    iterations: int = Field(..., gt=0, example=1000)
\ No newline at end of file
+    iterations: int = Field(..., gt=0, le=1_000_000_000, example=1000)
+    seed: Optional[int] = Field(42, example=42)  # 为空时每次结果随机
+    parallel: bool = False  # 是否把样本块分发到进程池并行模拟
+    full_distribution: bool = False  # 返回全部样本而非前 200 个（迭代次数上限 1e7）
+
+class PeriodDistribution(BaseModel):
+    base: float = Field(..., example=100)
+    std_dev: float = Field(0.0, ge=0, example=20)
+    distribution: str = Field("normal", example="normal")  # 'normal', 'triangular'（区间 [base - std_dev, base + std_dev]）
+
+class NPVSimulationRequest(BaseModel):
+    cash_flows: List[PeriodDistribution] = Field(..., min_length=1)  # 各期现金流分布，第 0 期不折现
+    discount_rate: PeriodDistribution  # 折现率分布，std_dev 为 0 时为固定折现率
+    correlation: Optional[List[List[float]]] = None  # T×T 或 (T+1)×(T+1)（最后一维为折现率）相关矩阵
+    iterations: int = Field(..., gt=0, le=1_000_000_000, example=100000)
+    seed: Optional[int] = Field(42, example=42)  # 为空时每次结果随机
+    parallel: bool = False  # 是否把样本块分发到进程池并行模拟
+    full_distribution: bool = False  # 返回全部路径的 NPV 而非前 200 个（迭代次数上限 1e7）
+
+class DecisionBranch(BaseModel):
+    target: str  # 子节点 id，多个节点可指向同一子节点（共享子场景）
+    probability: Optional[float] = Field(None, ge=0.0, le=1.0)  # 仅 chance 节点的分支需要
+    payoff: float = 0.0  # 走该分支时的即时收益（成本为负）
+    label: Optional[str] = None
+
+class DecisionNode(BaseModel):
+    id: str
+    type: str = Field("terminal", example="chance")  # 'decision', 'chance', 'terminal'
+    payoff: float = 0.0  # terminal 节点的价值，或到达该节点时的即时收益
+    branches: List[DecisionBranch] = []
+
+class DecisionGraphRequest(BaseModel):
+    nodes: List[DecisionNode] = Field(..., min_length=1)
+    root: Optional[str] = None  # 为空时取唯一没有父节点的节点
+
+class DecisionGraphChange(BaseModel):
+    node: str
+    branch: Optional[int] = None  # 为空时修改节点自身的 payoff
+    probability: Optional[float] = Field(None, ge=0.0, le=1.0)
+    payoff: Optional[float] = None
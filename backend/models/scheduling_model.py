@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 
 class Task(BaseModel):
@@ -16,4 +16,25 @@ class ResourceTask(BaseModel):
 class BalanceInput(BaseModel):
     tasks: List[ResourceTask]
     total_resources: float
-    total_time: int
\ No newline at end of file
+    total_time: int
+    policy: str = "first_fit"  # 'first_fit'（最早可行窗口）或 'least_loaded'（峰值负载最低的窗口）
+
+# 关键路径（CPM / PERT）：工期给定值，或给出三点估计按 PERT 计算期望与方差
+class ProjectTask(BaseModel):
+    name: str
+    duration: Optional[float] = Field(None, ge=0)
+    optimistic: Optional[float] = Field(None, ge=0)
+    most_likely: Optional[float] = Field(None, ge=0)
+    pessimistic: Optional[float] = Field(None, ge=0)
+    predecessors: List[str] = []  # 紧前任务名（完成-开始依赖）
+
+class CriticalPathRequest(BaseModel):
+    tasks: List[ProjectTask] = Field(..., min_length=1)
+    target_duration: Optional[float] = None  # 给出时返回按期完成的概率
+
+class ProjectTaskChange(BaseModel):
+    name: str
+    duration: Optional[float] = Field(None, ge=0)
+    optimistic: Optional[float] = Field(None, ge=0)
+    most_likely: Optional[float] = Field(None, ge=0)
+    pessimistic: Optional[float] = Field(None, ge=0)
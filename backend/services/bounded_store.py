@@ -0,0 +1,64 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# 进程内模型存储（决策图、预测、项目网络等）的容量与保留时间（秒，自最后一次访问起算）
+MODEL_STORE_SIZE_ENV = "ECON_MODEL_STORE_SIZE"
+MODEL_TTL_ENV = "ECON_MODEL_TTL"
+
+
+def store_limits() -> Dict[str, Any]:
+    return {
+        "store_size": int(os.environ.get(MODEL_STORE_SIZE_ENV, "256")),
+        "ttl": float(os.environ.get(MODEL_TTL_ENV, "3600"))
+    }
+
+
+class BoundedStore:
+    """
+    按 id 保存对象的有界存储：超过 ttl 未被访问的条目过期，超出容量时淘汰最久未访问的条目。
+    """
+
+    def __init__(self, store_size: int = 256, ttl: float = 3600.0):
+        self.store_size = store_size
+        self.ttl = ttl
+        self._items: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _purge(self, now: float) -> None:
+        # 调用方持有锁：按最后访问时间从旧到新移除过期条目，再淘汰超出容量的部分
+        while self._items:
+            key, (accessed, _) = next(iter(self._items.items()))
+            if now - accessed <= self.ttl and len(self._items) <= self.store_size:
+                break
+            del self._items[key]
+
+    def put(self, key: str, value: Any) -> None:
+        now = time.time()
+        with self._lock:
+            self._items[key] = (now, value)
+            self._items.move_to_end(key)
+            self._purge(now)
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            self._purge(now)
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            self._items[key] = (now, entry[1])
+            self._items.move_to_end(key)
+            return entry[1]
+
+    def pop(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._items.pop(key, None)
+            return None if entry is None else entry[1]
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._purge(time.time())
+            return len(self._items)
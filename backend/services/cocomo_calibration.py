@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import math
+import threading
+import uuid
+from typing import Dict, Iterable, List, Optional
+
+from services.bounded_store import BoundedStore, store_limits
+from services.estimation_calculator import COCOMO_PARAMS, LinearModel
+from services.lazy_module import lazy_import
+
+np = lazy_import("numpy")
+
+
+class ModeCalibration:
+    """
+    单一模式的对数线性拟合：
+        ln(effort / eaf) = ln(a) + b · ln(kloc)
+        ln(duration)     = ln(c) + d · ln(effort)
+    两个回归各自只保存充分统计量，新增历史数据时增量更新，无需重新处理全部历史。
+    """
+
+    def __init__(self):
+        self.effort = LinearModel(["ln_kloc"])
+        self.duration = LinearModel(["ln_effort"])
+
+    def update(self, kloc: np.ndarray, effort: np.ndarray, duration: np.ndarray, eaf: np.ndarray) -> None:
+        self.effort.update(np.log(kloc), np.log(effort / eaf))
+        self.duration.update(np.log(effort), np.log(duration))
+
+    def merge(self, other: "ModeCalibration") -> None:
+        self.effort.merge(other.effort)
+        self.duration.merge(other.duration)
+
+    def params(self, default: Dict[str, float]) -> Dict:
+        """
+        返回拟合出的 a/b/c/d；某个回归样本不足或自变量无变化时，该组系数退回教科书值。
+        """
+        result = {"samples": self.effort.n}
+        try:
+            (intercept, slope), r2 = self.effort.coefficients()
+            result.update(a=math.exp(intercept), b=slope, effort_r_squared=r2, effort_fitted=True)
+        except ValueError:
+            result.update(a=default["a"], b=default["b"], effort_r_squared=None, effort_fitted=False)
+        try:
+            (intercept, slope), r2 = self.duration.coefficients()
+            result.update(c=math.exp(intercept), d=slope, duration_r_squared=r2, duration_fitted=True)
+        except ValueError:
+            result.update(c=default["c"], d=default["d"], duration_r_squared=None, duration_fitted=False)
+        return result
+
+
+class CocomoCalibration:
+    """
+    一个校准模型：按模式累计充分统计量，每次追加数据生成一个新版本的系数快照。
+    """
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.modes = {mode: ModeCalibration() for mode in COCOMO_PARAMS}
+        self.versions: List[Dict] = []
+        self.rejected_rows = 0
+
+    def add_rows(self, mode: List[str], kloc: List[float], effort: List[float], duration: List[float],
+                 eaf: Optional[List[float]] = None) -> None:
+        """
+        把一批历史数据折叠进各模式的充分统计量（不生成新版本）。
+        """
+        mode = np.asarray(mode, dtype=object).astype(str)
+        kloc = np.asarray(kloc, dtype=float)
+        effort = np.asarray(effort, dtype=float)
+        duration = np.asarray(duration, dtype=float)
+        eaf = np.ones(len(kloc)) if eaf is None else np.asarray(eaf, dtype=float)
+        if not len(mode) == len(kloc) == len(effort) == len(duration) == len(eaf):
+            raise ValueError("All history columns must have the same length.")
+
+        # 取对数要求各量为有限正数，未知模式或不满足的行被丢弃并计数
+        columns = np.vstack([kloc, effort, duration, eaf])
+        valid = np.isfinite(columns).all(axis=0) & (columns > 0).all(axis=0)
+        accepted = 0
+        for name, calibration in self.modes.items():
+            rows = valid & (mode == name)
+            if rows.any():
+                calibration.update(kloc[rows], effort[rows], duration[rows], eaf[rows])
+                accepted += int(rows.sum())
+        self.rejected_rows += len(kloc) - accepted
+
+    def merge(self, other: "CocomoCalibration") -> None:
+        """
+        并入另一个（未保存的）校准模型累计的统计量与拒收行数（不生成新版本）。
+        """
+        for name, calibration in self.modes.items():
+            calibration.merge(other.modes[name])
+        self.rejected_rows += other.rejected_rows
+
+    def snapshot(self) -> Dict:
+        """
+        用当前统计量求出各模式系数，保存为新版本。
+        """
+        version = {
+            "version": len(self.versions) + 1,
+            "params": {name: c.params(COCOMO_PARAMS[name]) for name, c in self.modes.items()}
+        }
+        self.versions.append(version)
+        return self.describe(version["version"])
+
+    def cocomo_params(self, version: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+        """
+        返回可直接传给 estimate_cocomo 的系数表。
+        """
+        snapshot = self._version(version)
+        return {mode: {k: p[k] for k in "abcd"} for mode, p in snapshot["params"].items()}
+
+    def _version(self, version: Optional[int]) -> Dict:
+        if version is None:
+            return self.versions[-1]
+        if not 1 <= version <= len(self.versions):
+            raise ValueError(f"Calibration version {version} not found.")
+        return self.versions[version - 1]
+
+    def describe(self, version: Optional[int] = None) -> Dict:
+        snapshot = self._version(version)
+        return {
+            "calibration_id": self.id,
+            "version": snapshot["version"],
+            "latest_version": len(self.versions),
+            "rejected_rows": self.rejected_rows,
+            "params": snapshot["params"]
+        }
+
+
+class CalibrationStore:
+    """
+    按 calibration_id 保存 COCOMO 校准模型。每次追加都在锁内合并统计量并生成一个只读的系数版本，
+    估算与查询只读取已生成的版本，因此不需要加锁；删除与追加共用同一把锁，删除后不会被追加复活。
+    """
+
+    def __init__(self, store_size: int = 256, ttl: float = 3600.0):
+        self._calibrations = BoundedStore(store_size, ttl)
+        self._lock = threading.Lock()
+
+    def create(self, batches: Iterable[Dict]) -> Dict:
+        """
+        用若干批历史数据（每批为 add_rows 的参数字典）新建校准模型，生成版本 1。
+        """
+        calibration = CocomoCalibration()
+        for batch in batches:
+            calibration.add_rows(**batch)
+        result = calibration.snapshot()
+        self._calibrations.put(calibration.id, calibration)
+        return result
+
+    def append(self, calibration_id: str, batches: Iterable[Dict]) -> Dict:
+        """
+        向已有模型增量追加历史数据并生成新版本；任一批无效时整次追加不生效。
+        新数据先在锁外折叠进一个临时模型（上传文件的解析不阻塞其他模型），再在锁内合并 R 因子。
+        """
+        self.get(calibration_id)  # 模型不存在时不必解析上传
+        staged = CocomoCalibration()
+        for batch in batches:
+            staged.add_rows(**batch)
+        with self._lock:
+            calibration = self.get(calibration_id)  # 解析期间可能已被删除或过期
+            calibration.merge(staged)
+            return calibration.snapshot()
+
+    def get(self, calibration_id: str) -> CocomoCalibration:
+        calibration = self._calibrations.get(calibration_id)
+        if calibration is None:
+            raise KeyError(f"Calibration '{calibration_id}' not found.")
+        return calibration
+
+    def delete(self, calibration_id: str) -> None:
+        with self._lock:
+            if self._calibrations.pop(calibration_id) is None:
+                raise KeyError(f"Calibration '{calibration_id}' not found.")
+
+
+calibration_store = CalibrationStore(**store_limits())
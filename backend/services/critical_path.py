@@ -0,0 +1,304 @@
+import heapq
+import math
+import threading
+import uuid
+from collections import deque
+from statistics import NormalDist
+from typing import Dict, List, Optional, Tuple
+
+from services.bounded_store import BoundedStore, store_limits
+from services.metrics import timed
+
+# 判定关键（总时差为 0）时的相对容差
+SLACK_TOLERANCE = 1e-9
+
+
+def _task_estimate(task: Dict) -> Tuple[float, float]:
+    """
+    返回 (工期, 方差)：给出三点估计时按 PERT 取 (a + 4m + b) / 6 与 ((b - a) / 6)²，否则为确定工期、方差 0。
+    """
+    name = task["name"]
+    points = [task.get(k) for k in ("optimistic", "most_likely", "pessimistic")]
+    if any(p is not None for p in points):
+        if any(p is None for p in points):
+            raise ValueError(f"Task '{name}': PERT needs optimistic, most_likely and pessimistic estimates.")
+        a, m, b = (float(p) for p in points)
+        if not 0 <= a <= m <= b:
+            raise ValueError(f"Task '{name}': estimates must satisfy 0 <= optimistic <= most_likely <= pessimistic.")
+        return (a + 4 * m + b) / 6, ((b - a) / 6) ** 2
+    duration = task.get("duration")
+    if duration is None:
+        raise ValueError(f"Task '{name}': either duration or a three-point estimate is required.")
+    if duration < 0:
+        raise ValueError(f"Task '{name}': duration must be non-negative.")
+    return float(duration), 0.0
+
+
+class ProjectNetwork:
+    """
+    项目网络（单代号，任务在节点上）：按拓扑序一次正推求最早开始 / 完成，一次逆推求每个任务到项目结束的最长路径（tail），
+    最迟时间由 项目工期 - tail 得出，因此项目工期变化时不必重算全部最迟时间。
+    修改任务工期后正推只沿后继、逆推只沿前驱传播，值不变处停止。
+    """
+
+    def __init__(self, tasks: List[Dict]):
+        self.id = uuid.uuid4().hex
+        self.names = [t["name"] for t in tasks]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        if len(self.index) != len(self.names):
+            raise ValueError("Task names must be unique.")
+
+        self.durations: List[float] = []
+        self.variances: List[float] = []
+        self.predecessors: List[List[int]] = []
+        self.successors: List[List[int]] = [[] for _ in tasks]
+        for i, task in enumerate(tasks):
+            duration, variance = _task_estimate(task)
+            self.durations.append(duration)
+            self.variances.append(variance)
+            preds = []
+            for p in task.get("predecessors") or []:
+                j = self.index.get(p)
+                if j is None:
+                    raise ValueError(f"Task '{task['name']}' depends on unknown task '{p}'.")
+                if j == i:
+                    raise ValueError(f"Task '{task['name']}' cannot depend on itself.")
+                preds.append(j)
+                self.successors[j].append(i)
+            self.predecessors.append(preds)
+
+        self.order = self._topological_order()
+        self.position = [0] * len(self.names)
+        for pos, i in enumerate(self.order):
+            self.position[i] = pos
+        self.sources = [i for i, p in enumerate(self.predecessors) if not p]
+
+        n = len(self.names)
+        self.early_start = [0.0] * n
+        self.early_finish = [0.0] * n
+        self.tail = [0.0] * n
+        for i in self.order:
+            self._forward(i)
+        for i in reversed(self.order):
+            self._backward(i)
+
+    def _topological_order(self) -> List[int]:
+        # Kahn 算法：前驱排在后继之前；有任务未能出队说明存在环
+        indegree = [len(p) for p in self.predecessors]
+        queue = deque(i for i, d in enumerate(indegree) if d == 0)
+        order = []
+        while queue:
+            i = queue.popleft()
+            order.append(i)
+            for s in self.successors[i]:
+                indegree[s] -= 1
+                if indegree[s] == 0:
+                    queue.append(s)
+        if len(order) != len(self.names):
+            cycle = self._find_cycle(indegree)
+            raise ValueError(f"Task dependencies contain a cycle: {' -> '.join(self.names[i] for i in cycle)}")
+        return order
+
+    def _find_cycle(self, indegree: List[int]) -> List[int]:
+        # 未出队的任务都至少有一个未出队的前驱，沿前驱回溯必然回到走过的任务
+        i = next(k for k, d in enumerate(indegree) if d > 0)
+        seen = {}
+        path = []
+        while i not in seen:
+            seen[i] = len(path)
+            path.append(i)
+            i = next(p for p in self.predecessors[i] if indegree[p] > 0)
+        cycle = path[seen[i]:] + [i]
+        return cycle[::-1]
+
+    def _forward(self, i: int) -> bool:
+        start = max((self.early_finish[p] for p in self.predecessors[i]), default=0.0)
+        finish = start + self.durations[i]
+        changed = finish != self.early_finish[i] or start != self.early_start[i]
+        self.early_start[i], self.early_finish[i] = start, finish
+        return changed
+
+    def _backward(self, i: int) -> bool:
+        tail = self.durations[i] + max((self.tail[s] for s in self.successors[i]), default=0.0)
+        changed = tail != self.tail[i]
+        self.tail[i] = tail
+        return changed
+
+    @property
+    def project_duration(self) -> float:
+        return max((self.tail[i] for i in self.sources), default=0.0)
+
+    def update(self, changes: List[Dict]) -> int:
+        """
+        批量修改任务工期或三点估计（整批校验后生效），然后只重算受影响的后继（最早时间）与前驱（tail）。
+        返回重算的任务数。
+        """
+        updates = {}
+        for change in changes:
+            i = self.index.get(change["name"])
+            if i is None:
+                raise KeyError(f"Task '{change['name']}' not found.")
+            updates[i] = _task_estimate(change)
+
+        for i, (duration, variance) in updates.items():
+            self.durations[i], self.variances[i] = duration, variance
+
+        recomputed = 0
+        # 正推：位置小的先算，保证任务重算时所有前驱已是最新值
+        heap = [self.position[i] for i in updates]
+        heapq.heapify(heap)
+        queued = set(updates)
+        while heap:
+            i = self.order[heapq.heappop(heap)]
+            recomputed += 1
+            if not self._forward(i):
+                continue
+            for s in self.successors[i]:
+                if s not in queued:
+                    queued.add(s)
+                    heapq.heappush(heap, self.position[s])
+
+        # 逆推：位置大的先算
+        heap = [-self.position[i] for i in updates]
+        heapq.heapify(heap)
+        queued = set(updates)
+        while heap:
+            i = self.order[-heapq.heappop(heap)]
+            recomputed += 1
+            if not self._backward(i):
+                continue
+            for p in self.predecessors[i]:
+                if p not in queued:
+                    queued.add(p)
+                    heapq.heappush(heap, -self.position[p])
+        return recomputed
+
+    def _is_critical(self, i: int, total: float, tolerance: float) -> bool:
+        return total - self.tail[i] - self.early_start[i] <= tolerance
+
+    def critical_path(self) -> Tuple[List[int], float]:
+        """
+        关键路径及其方差：只遍历关键子图（总时差为 0 的任务及首尾相接的边），
+        有多条关键路径时取方差最大的一条（PERT 的保守取法）。
+        """
+        total = self.project_duration
+        tolerance = SLACK_TOLERANCE * max(1.0, total)
+        start = [i for i in self.sources if self._is_critical(i, total, tolerance)]
+        if not start:
+            return [], 0.0
+
+        # 关键子图上按拓扑位置递增做 DP：best[i] 为以 i 结尾的关键链的最大方差
+        best = {i: self.variances[i] for i in start}
+        back: Dict[int, Optional[int]] = {i: None for i in start}
+        heap = [self.position[i] for i in start]
+        heapq.heapify(heap)
+        ends = []
+        while heap:
+            i = self.order[heapq.heappop(heap)]
+            extended = False
+            for s in self.successors[i]:
+                if abs(self.early_start[s] - self.early_finish[i]) > tolerance or not self._is_critical(s, total, tolerance):
+                    continue
+                extended = True
+                value = best[i] + self.variances[s]
+                if s not in best:
+                    heapq.heappush(heap, self.position[s])
+                if s not in best or value > best[s]:
+                    best[s], back[s] = value, i
+            if not extended:
+                ends.append(i)
+
+        end = max(ends, key=best.__getitem__)
+        path = []
+        node: Optional[int] = end
+        while node is not None:
+            path.append(node)
+            node = back[node]
+        return path[::-1], best[end]
+
+    def describe(self, include_tasks: bool = True, target_duration: Optional[float] = None) -> Dict:
+        total = self.project_duration
+        path, variance = self.critical_path()
+        result = {
+            "network_id": self.id,
+            "tasks": len(self.names),
+            "project_duration": round(total, 4),
+            "critical_path": [self.names[i] for i in path],
+            "project_variance": round(variance, 4),
+            "project_std_dev": round(math.sqrt(variance), 4)
+        }
+        if target_duration is not None:
+            # PERT：项目工期近似服从 N(期望工期, 关键路径方差)
+            if variance > 0:
+                probability = NormalDist(total, math.sqrt(variance)).cdf(target_duration)
+            else:
+                probability = 1.0 if target_duration >= total else 0.0
+            result["target_duration"] = target_duration
+            result["completion_probability"] = round(probability, 4)
+        if include_tasks:
+            tolerance = SLACK_TOLERANCE * max(1.0, total)
+            schedule = []
+            for i, name in enumerate(self.names):
+                latest_start = total - self.tail[i]
+                slack = latest_start - self.early_start[i]
+                schedule.append({
+                    "name": name,
+                    "duration": round(self.durations[i], 4),
+                    "variance": round(self.variances[i], 4),
+                    "earliest_start": round(self.early_start[i], 4),
+                    "earliest_finish": round(self.early_finish[i], 4),
+                    "latest_start": round(latest_start, 4),
+                    "latest_finish": round(latest_start + self.durations[i], 4),
+                    "slack": round(max(slack, 0.0), 4),
+                    "critical": slack <= tolerance
+                })
+            result["schedule"] = schedule
+        return result
+
+
+@timed
+def analyze_critical_path(tasks: List[Dict], target_duration: Optional[float] = None) -> Dict:
+    result = ProjectNetwork(tasks).describe(target_duration=target_duration)
+    del result["network_id"]  # 一次性计算，不保存网络
+    return result
+
+
+class ProjectNetworkStore:
+    """
+    按 network_id 保存已完成正推 / 逆推的项目网络。PATCH 修改工期时原地增量重算最早时间与 tail，
+    读取与修改共用一把锁，查询不会看到只传播了一半的进度计划。
+    """
+
+    def __init__(self, store_size: int = 256, ttl: float = 3600.0):
+        self._networks = BoundedStore(store_size, ttl)
+        self._lock = threading.Lock()
+
+    def create(self, tasks: List[Dict], include_tasks: bool = True, target_duration: Optional[float] = None) -> Dict:
+        network = ProjectNetwork(tasks)
+        result = network.describe(include_tasks, target_duration)
+        self._networks.put(network.id, network)
+        return result
+
+    def get(self, network_id: str) -> ProjectNetwork:
+        network = self._networks.get(network_id)
+        if network is None:
+            raise KeyError(f"Project network '{network_id}' not found.")
+        return network
+
+    def describe(self, network_id: str, include_tasks: bool = True, target_duration: Optional[float] = None) -> Dict:
+        network = self.get(network_id)
+        with self._lock:
+            return network.describe(include_tasks, target_duration)
+
+    def delete(self, network_id: str) -> None:
+        if self._networks.pop(network_id) is None:
+            raise KeyError(f"Project network '{network_id}' not found.")
+
+    def update(self, network_id: str, changes: List[Dict], include_tasks: bool = True) -> Dict:
+        network = self.get(network_id)
+        with self._lock:
+            recomputed = network.update(changes)
+            return {**network.describe(include_tasks), "recomputed_tasks": recomputed}
+
+
+project_network_store = ProjectNetworkStore(**store_limits())
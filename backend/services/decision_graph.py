@@ -0,0 +1,264 @@
+import heapq
+import math
+import threading
+import uuid
+from collections import deque
+from typing import Dict, List, Optional
+
+from services.bounded_store import BoundedStore, store_limits
+from services.metrics import timed
+
+DECISION, CHANCE, TERMINAL = "decision", "chance", "terminal"
+NODE_TYPES = (DECISION, CHANCE, TERMINAL)
+PROBABILITY_TOLERANCE = 1e-6
+
+
+class DecisionGraph:
+    """
+    决策树 / DAG：节点按 id 引用，共享的子场景只存一份、只计算一次。
+    节点值：terminal 为自身 payoff；chance 为 payoff + Σ p·(分支 payoff + 子节点值)；
+    decision 为 payoff + max(分支 payoff + 子节点值)，并记录最优分支。
+    按拓扑序迭代回溯求值（无递归深度限制）；修改概率或收益后只沿受影响节点向根重算。
+    """
+
+    def __init__(self, nodes: List[Dict], root: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.ids = [n["id"] for n in nodes]
+        self.index = {node_id: i for i, node_id in enumerate(self.ids)}
+        if len(self.index) != len(self.ids):
+            raise ValueError("Node ids must be unique.")
+
+        self.types: List[str] = []
+        self.payoffs: List[float] = []
+        self.targets: List[List[int]] = []
+        self.probabilities: List[List[float]] = []
+        self.branch_payoffs: List[List[float]] = []
+        self.labels: List[List[Optional[str]]] = []
+        self.parents: List[List[int]] = [[] for _ in nodes]
+
+        for i, node in enumerate(nodes):
+            node_type = node.get("type", TERMINAL)
+            if node_type not in NODE_TYPES:
+                raise ValueError(f"Node '{node['id']}': unsupported type '{node_type}'")
+            branches = node.get("branches") or []
+            if node_type == TERMINAL and branches:
+                raise ValueError(f"Terminal node '{node['id']}' cannot have branches.")
+            if node_type != TERMINAL and not branches:
+                raise ValueError(f"Node '{node['id']}' needs at least one branch.")
+            targets = []
+            for b in branches:
+                target = self.index.get(b["target"])
+                if target is None:
+                    raise ValueError(f"Node '{node['id']}' references unknown node '{b['target']}'")
+                targets.append(target)
+                self.parents[target].append(i)
+            self.types.append(node_type)
+            self.payoffs.append(float(node.get("payoff", 0.0)))
+            self.targets.append(targets)
+            self.probabilities.append([b.get("probability") for b in branches])
+            self.branch_payoffs.append([float(b.get("payoff", 0.0)) for b in branches])
+            self.labels.append([b.get("label") for b in branches])
+            if node_type == CHANCE:
+                self._check_probabilities(i)
+
+        self.order = self._topological_order()
+        self.position = [0] * len(self.ids)
+        for pos, i in enumerate(self.order):
+            self.position[i] = pos
+        self.root = self._find_root(root)
+
+        self.values = [0.0] * len(self.ids)
+        self.choices: List[Optional[int]] = [None] * len(self.ids)
+        for i in reversed(self.order):
+            self._evaluate_node(i)
+
+    def _check_probabilities(self, i: int) -> None:
+        probabilities = self.probabilities[i]
+        if any(p is None or p < 0 for p in probabilities):
+            raise ValueError(f"Chance node '{self.ids[i]}': every branch needs a non-negative probability.")
+        if abs(math.fsum(probabilities) - 1.0) > PROBABILITY_TOLERANCE:
+            raise ValueError(f"Chance node '{self.ids[i]}': branch probabilities must sum to 1.")
+
+    def _topological_order(self) -> List[int]:
+        # Kahn 算法：父节点排在子节点之前；有节点未能出队说明存在环
+        indegree = [len(p) for p in self.parents]
+        queue = deque(i for i, d in enumerate(indegree) if d == 0)
+        order = []
+        while queue:
+            i = queue.popleft()
+            order.append(i)
+            for child in self.targets[i]:
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    queue.append(child)
+        if len(order) != len(self.ids):
+            raise ValueError("Decision graph contains a cycle.")
+        return order
+
+    def _find_root(self, root: Optional[str]) -> int:
+        if root is not None:
+            if root not in self.index:
+                raise ValueError(f"Root node '{root}' not found.")
+            return self.index[root]
+        roots = [i for i, p in enumerate(self.parents) if not p]
+        if len(roots) != 1:
+            raise ValueError("Graph has several nodes without parents; specify the root explicitly.")
+        return roots[0]
+
+    def _evaluate_node(self, i: int) -> float:
+        node_type = self.types[i]
+        values = self.values
+        if node_type == TERMINAL:
+            value = self.payoffs[i]
+        elif node_type == CHANCE:
+            value = self.payoffs[i] + math.fsum(
+                p * (bp + values[t]) for p, bp, t in zip(self.probabilities[i], self.branch_payoffs[i], self.targets[i])
+            )
+        else:
+            outcomes = [bp + values[t] for bp, t in zip(self.branch_payoffs[i], self.targets[i])]
+            best = max(range(len(outcomes)), key=outcomes.__getitem__)
+            self.choices[i] = best
+            value = self.payoffs[i] + outcomes[best]
+        values[i] = value
+        return value
+
+    def update(self, changes: List[Dict]) -> int:
+        """
+        批量修改节点 payoff 或分支的 probability / payoff（整批校验后生效），
+        然后按拓扑序自下而上只重算受影响的祖先，值不变处停止传播。返回重算的节点数。
+        """
+        originals = []
+        touched_chance = set()
+        dirty = set()
+        try:
+            for change in changes:
+                i = self.index.get(change["node"])
+                if i is None:
+                    raise ValueError(f"Node '{change['node']}' not found.")
+                branch = change.get("branch")
+                if branch is None:
+                    if change.get("payoff") is not None:
+                        originals.append((self.payoffs, i, self.payoffs[i]))
+                        self.payoffs[i] = float(change["payoff"])
+                else:
+                    if not 0 <= branch < len(self.targets[i]):
+                        raise ValueError(f"Node '{change['node']}' has no branch {branch}.")
+                    if change.get("probability") is not None:
+                        if self.types[i] != CHANCE:
+                            raise ValueError(f"Only chance node branches have probabilities ('{change['node']}').")
+                        originals.append((self.probabilities[i], branch, self.probabilities[i][branch]))
+                        self.probabilities[i][branch] = float(change["probability"])
+                        touched_chance.add(i)
+                    if change.get("payoff") is not None:
+                        originals.append((self.branch_payoffs[i], branch, self.branch_payoffs[i][branch]))
+                        self.branch_payoffs[i][branch] = float(change["payoff"])
+                dirty.add(i)
+            for i in touched_chance:
+                self._check_probabilities(i)
+        except ValueError:
+            for target, key, value in reversed(originals):
+                target[key] = value
+            raise
+
+        # 位置越大越靠近叶子：先处理子节点，保证父节点重算时子节点已是最新值
+        heap = [-self.position[i] for i in dirty]
+        heapq.heapify(heap)
+        queued = set(dirty)
+        recomputed = 0
+        while heap:
+            i = self.order[-heapq.heappop(heap)]
+            previous = self.values[i]
+            recomputed += 1
+            if self._evaluate_node(i) == previous:
+                # 节点值未变（如修改的是未被选中的决策分支），祖先无需重算
+                continue
+            for parent in self.parents[i]:
+                if parent not in queued:
+                    queued.add(parent)
+                    heapq.heappush(heap, -self.position[parent])
+        return recomputed
+
+    def policy(self) -> Dict[str, Dict]:
+        """
+        最优策略：从根出发沿最优分支（chance 节点展开全部分支）可达的每个决策节点的选择。
+        """
+        result = {}
+        seen = {self.root}
+        stack = [self.root]
+        while stack:
+            i = stack.pop()
+            if self.types[i] == DECISION:
+                best = self.choices[i]
+                result[self.ids[i]] = {
+                    "branch": best,
+                    "target": self.ids[self.targets[i][best]],
+                    "label": self.labels[i][best],
+                    "value": round(self.values[i], 2)
+                }
+                children = [self.targets[i][best]]
+            else:
+                children = self.targets[i]
+            for child in children:
+                if child not in seen:
+                    seen.add(child)
+                    stack.append(child)
+        return result
+
+    def describe(self, include_policy: bool = True) -> Dict:
+        result = {
+            "graph_id": self.id,
+            "root": self.ids[self.root],
+            "nodes": len(self.ids),
+            "expected_value": round(self.values[self.root], 2)
+        }
+        if include_policy:
+            result["policy"] = self.policy()
+        return result
+
+
+@timed
+def evaluate_decision_graph(nodes: List[Dict], root: Optional[str] = None) -> Dict:
+    result = DecisionGraph(nodes, root).describe()
+    del result["graph_id"]  # 一次性求值，不保存模型
+    return result
+
+
+class DecisionGraphStore:
+    """
+    按 graph_id 保存已求值的决策图，PATCH 时在原图上就地修改并只重算受影响的祖先节点。
+    修改与读取共用一把锁，查询不会读到只重算了一部分的节点值或最优策略。
+    """
+
+    def __init__(self, store_size: int = 256, ttl: float = 3600.0):
+        self._graphs = BoundedStore(store_size, ttl)
+        self._lock = threading.Lock()
+
+    def create(self, nodes: List[Dict], root: Optional[str] = None) -> Dict:
+        graph = DecisionGraph(nodes, root)
+        result = graph.describe()
+        self._graphs.put(graph.id, graph)
+        return result
+
+    def get(self, graph_id: str) -> DecisionGraph:
+        graph = self._graphs.get(graph_id)
+        if graph is None:
+            raise KeyError(f"Decision graph '{graph_id}' not found.")
+        return graph
+
+    def describe(self, graph_id: str, include_policy: bool = True) -> Dict:
+        graph = self.get(graph_id)
+        with self._lock:
+            return graph.describe(include_policy)
+
+    def delete(self, graph_id: str) -> None:
+        if self._graphs.pop(graph_id) is None:
+            raise KeyError(f"Decision graph '{graph_id}' not found.")
+
+    def update(self, graph_id: str, changes: List[Dict], include_policy: bool = True) -> Dict:
+        graph = self.get(graph_id)
+        with self._lock:
+            recomputed = graph.update(changes)
+            return {**graph.describe(include_policy), "recomputed_nodes": recomputed}
+
+
+decision_graph_store = DecisionGraphStore(**store_limits())
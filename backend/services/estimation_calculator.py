@@ -1,6 +1,13 @@
+from __future__ import annotations
+
 import math
-import statistics
-from typing import Dict, List
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from services.metrics import timed
+from services.lazy_module import lazy_import
+
+np = lazy_import("numpy")
 
 LANGUAGE_FP_TO_KLOC = {
     'java': 53,
@@ -10,6 +17,7 @@ LANGUAGE_FP_TO_KLOC = {
     'cobol': 80
 }
 
+@timed
 def estimate_function_point(fp_inputs: Dict[str, int],
                             fp_weights: Dict[str, float],
                             language: str,
@@ -49,12 +57,18 @@ COCOMO_PARAMS = {
     'embedded': {'a': 3.6, 'b': 1.20, 'c': 2.5, 'd': 0.32}
 }
 
-def estimate_cocomo(loc: float, mode: str, cost_drivers: Dict[str, str], cost_per_pm: float) -> Dict[str, float]:
-    if mode not in COCOMO_PARAMS:
+@timed
+def estimate_cocomo(loc: float, mode: str, cost_drivers: Dict[str, str], cost_per_pm: float,
+                    cocomo_params: Optional[Dict[str, Dict[str, float]]] = None) -> Dict[str, float]:
+    """
+    cocomo_params 为校准后的系数表（结构同 COCOMO_PARAMS），为空时使用教科书系数。
+    """
+    cocomo_params = cocomo_params or COCOMO_PARAMS
+    if mode not in cocomo_params:
         raise ValueError(f"Invalid mode '{mode}'")
 
     eaf = calculate_eaf(cost_drivers)
-    params = COCOMO_PARAMS[mode]
+    params = cocomo_params[mode]
     effort = params['a'] * (loc ** params['b']) * eaf
     time = params['c'] * (effort ** params['d'])
     people = effort / time
@@ -75,6 +89,124 @@ def calculate_eaf(cost_drivers: Dict[str, str]) -> float:
         eaf *= multiplier
     return eaf
 
+# EAF_TABLE 预编译为整数编码的乘数矩阵：行是成本驱动因子，列是评级，最后一列对应未知评级（乘数 1.0）
+EAF_DRIVERS = list(EAF_TABLE)
+EAF_RATINGS = ["Very Low", "Low", "Nominal", "High", "Very High"]
+_RATING_CODES = {r: i for i, r in enumerate(EAF_RATINGS)}
+_UNKNOWN_RATING = len(EAF_RATINGS)
+
+COCOMO_MODES = list(COCOMO_PARAMS)
+
+
+# 矩阵在第一次批量估算时才构造（此时才需要 NumPy）
+@lru_cache(maxsize=None)
+def eaf_matrix() -> np.ndarray:
+    return np.array([[EAF_TABLE[d].get(r, 1.0) for r in EAF_RATINGS] + [1.0] for d in EAF_DRIVERS])
+
+
+@lru_cache(maxsize=None)
+def cocomo_coefficients() -> np.ndarray:
+    return np.array([[COCOMO_PARAMS[m][k] for k in "abcd"] for m in COCOMO_MODES])
+
+
+def encode_labels(values: List, codes: Dict[str, int], unknown: int) -> np.ndarray:
+    """
+    把字符串列编码为整数：先取唯一值再查表，查表次数与唯一值个数有关而与行数无关。
+    """
+    uniques, inverse = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+    lookup = np.array([codes.get(u, unknown) for u in uniques], dtype=np.int64)
+    return lookup[inverse.reshape(-1)]
+
+
+def _check_lengths(n: int, columns: Dict[str, List]) -> None:
+    for name, column in columns.items():
+        if len(column) != n:
+            raise ValueError(f"Column '{name}' has {len(column)} rows, expected {n}.")
+
+
+def calculate_eaf_bulk(cost_drivers: Dict[str, List[str]], n: int) -> np.ndarray:
+    eaf = np.ones(n)
+    for key, ratings in cost_drivers.items():
+        if key not in EAF_TABLE:
+            continue
+        codes = encode_labels(ratings, _RATING_CODES, _UNKNOWN_RATING)
+        eaf *= eaf_matrix()[EAF_DRIVERS.index(key)][codes]
+    return eaf
+
+
+@timed
+def estimate_cocomo_bulk(loc: List[float], mode: List[str], cost_drivers: Dict[str, List[str]],
+                         cost_per_pm: List[float]) -> Dict[str, np.ndarray]:
+    """
+    批量 COCOMO：所有行一次性向量化计算，返回按列组织的结果；非法行在 error 列给出原因。
+    """
+    n = len(loc)
+    _check_lengths(n, {"mode": mode, "cost_per_pm": cost_per_pm, **cost_drivers})
+
+    loc = np.asarray(loc, dtype=float)
+    mode_codes = encode_labels(mode, {m: i for i, m in enumerate(COCOMO_MODES)}, -1)
+    valid_mode = mode_codes >= 0
+    a, b, c, d = cocomo_coefficients()[np.where(valid_mode, mode_codes, 0)].T
+
+    eaf = calculate_eaf_bulk(cost_drivers, n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        effort = a * loc ** b * eaf
+        time = c * effort ** d
+        people = effort / time
+    total_cost = effort * np.asarray(cost_per_pm, dtype=float)
+
+    ok = valid_mode & (loc > 0)
+    error = np.where(valid_mode, np.where(ok, None, "loc must be positive"), "Invalid mode")
+
+    def column(values, digits):
+        return np.where(ok, np.round(values, digits), np.nan)
+
+    return {
+        "eaf": column(eaf, 3),
+        "effort_pm": column(effort, 2),
+        "development_time_months": column(time, 2),
+        "team_size": column(people, 2),
+        "total_cost": column(total_cost, 2),
+        "error": error
+    }
+
+
+@timed
+def estimate_function_point_bulk(fp_inputs: Dict[str, List[float]], fp_weights: Dict[str, float],
+                                 language: List[str], cost_drivers: Dict[str, List[float]]) -> Dict[str, np.ndarray]:
+    """
+    批量功能点估算：fp_inputs / cost_drivers 为按列组织的数据，fp_weights 对所有行共用。
+    """
+    n = len(language)
+    missing = [k for k in fp_weights if k not in fp_inputs]
+    if missing:
+        raise ValueError(f"Missing fp_inputs columns: {', '.join(missing)}")
+    _check_lengths(n, {**fp_inputs, **cost_drivers})
+
+    raw_fp = np.zeros(n)
+    for k, weight in fp_weights.items():
+        raw_fp += np.asarray(fp_inputs[k], dtype=float) * weight
+    total = np.zeros(n)
+    for values in cost_drivers.values():
+        total += np.asarray(values, dtype=float)
+    vaf = 0.65 + 0.01 * total
+    adjusted_fp = raw_fp * vaf
+
+    languages = list(LANGUAGE_FP_TO_KLOC)
+    lang_codes = encode_labels(language, {l: i for i, l in enumerate(languages)}, -1)
+    valid = lang_codes >= 0
+    factor = np.array([LANGUAGE_FP_TO_KLOC[l] for l in languages], dtype=float)[np.where(valid, lang_codes, 0)]
+    kloc = adjusted_fp * factor / 1000.0
+
+    return {
+        "raw_fp": np.round(raw_fp, 2),
+        "vaf": np.round(vaf, 2),
+        "adjusted_fp": np.round(adjusted_fp, 2),
+        "kloc": np.where(valid, np.round(kloc, 3), np.nan),
+        "error": np.where(valid, None, "Unsupported language")
+    }
+
+@timed
 def calculate_expert_judgment(experts: list[dict]) -> dict:
     """
     计算加权平均、标准差、极值、平均置信度。
@@ -113,6 +245,7 @@ def calculate_expert_judgment(experts: list[dict]) -> dict:
         "avg_confidence": round(sum(weights) / len(weights), 2)
     }
 
+@timed
 def calculate_delphi_method(rounds: List[List[float]], threshold: float) -> Dict:
     """
     Delphi 方法计算，包括每轮均值、标准差、是否收敛。
@@ -150,27 +283,229 @@ def calculate_delphi_method(rounds: List[List[float]], threshold: float) -> Dict
         "estimate_history": history
     }
 
+@timed
 def calculate_regression_model(inputs: List[List[float]], predict_x: float) -> Dict:
+    """
+    一元回归（输入为 [x, y] 对），由 LinearModel 拟合。
+    """
     if len(inputs) < 2:
         raise ValueError("At least two data points are required for regression.")
 
-    xs, ys = zip(*inputs)
-    mean_x, mean_y = statistics.mean(xs), statistics.mean(ys)
-
-    # 回归系数 b 和截距 a
-    b = sum((x - mean_x) * (y - mean_y) for x, y in inputs) / sum((x - mean_x) ** 2 for x in xs)
-    a = mean_y - b * mean_x
-
-    # 拟合优度 R²
-    ss_tot = sum((y - mean_y) ** 2 for y in ys)
-    ss_res = sum((y - (a + b * x)) ** 2 for x, y in inputs)
-    r_squared = 1 - ss_res / ss_tot if ss_tot != 0 else 0
-
+    data = np.asarray(inputs, dtype=float)
+    model = LinearModel(["x"])
+    model.update(data[:, 0], data[:, 1])
+    beta, r_squared = model.coefficients()
+    a, b = map(float, beta)
     return {
         "intercept_a": round(a, 4),
         "slope_b": round(b, 4),
         "predict_y": round(a + b * predict_x, 2),
-        "sample_count": len(inputs),
+        "sample_count": model.n,
         "r_squared": round(r_squared, 4)
     }
 
+
+def _incomplete_beta(a: float, b: float, x: float) -> float:
+    """
+    正则化不完全 Beta 函数 I_x(a, b)，连分式展开（Lentz 算法）。
+    """
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    if x > (a + 1) / (a + b + 2):
+        return 1.0 - _incomplete_beta(b, a, 1.0 - x)
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log1p(-x)) / a
+    tiny = 1e-300
+    f, c, d = 1.0, 1.0, 0.0
+    for i in range(400):
+        m = i // 2
+        if i == 0:
+            numerator = 1.0
+        elif i % 2 == 0:
+            numerator = m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m))
+        else:
+            numerator = -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))
+        d = 1.0 + numerator * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + numerator / c
+        c = c if abs(c) > tiny else tiny
+        f *= c * d
+        if abs(1.0 - c * d) < 1e-14:
+            break
+    return front * (f - 1.0)
+
+
+def student_t_cdf(t: float, df: float) -> float:
+    tail = 0.5 * _incomplete_beta(df / 2, 0.5, df / (df + t * t))
+    return 1.0 - tail if t > 0 else tail
+
+
+def student_t_quantile(p: float, df: float) -> float:
+    """
+    t 分布的分位数：对分布函数二分求解（无需 SciPy）。
+    """
+    if not 0 < p < 1:
+        raise ValueError("Probability must be between 0 and 1.")
+    if p < 0.5:
+        return -student_t_quantile(1 - p, df)
+    lo, hi = 0.0, 1.0
+    while student_t_cdf(hi, df) < p:
+        lo, hi = hi, hi * 2
+    for _ in range(100):
+        mid = (lo + hi) / 2
+        if student_t_cdf(mid, df) < p:
+            lo = mid
+        else:
+            hi = mid
+        if hi - lo < 1e-12 * max(1.0, hi):
+            break
+    return (lo + hi) / 2
+
+
+class LinearModel:
+    """
+    多元线性回归 y = β0 + β1·x1 + ... + βp·xp，以增广矩阵 [1, X, y] 的 QR 分解上三角因子 R 作为充分统计量：
+        R 的前 p+1 列给出 XᵀX 的 Cholesky 因子，最后一列为 Qᵀy，右下角元素的平方为残差平方和。
+    新观测按块并入时对 [R; 新行] 再做一次 QR（平方根形式的递推最小二乘），
+    结果与对全部数据重新拟合一致，内存占用只与变量个数有关；全程不构造 XᵀX，避免条件数平方放大误差。
+    """
+
+    def __init__(self, feature_names: List[str]):
+        if not feature_names:
+            raise ValueError("At least one predictor is required.")
+        if len(set(feature_names)) != len(feature_names):
+            raise ValueError("Predictor names must be unique.")
+        self.feature_names = list(feature_names)
+        self.n = 0
+        self.r = np.zeros((0, len(feature_names) + 2))
+
+    @property
+    def parameters(self) -> int:
+        return len(self.feature_names) + 1
+
+    def _design(self, x, y=None) -> np.ndarray:
+        x = np.asarray(x, dtype=float)
+        if x.ndim == 1:
+            x = x[:, None] if len(self.feature_names) == 1 else x[None, :]
+        if x.ndim != 2 or x.shape[1] != len(self.feature_names):
+            raise ValueError(f"Each observation must have {len(self.feature_names)} predictor values.")
+        columns = [np.ones(len(x)), x]
+        if y is not None:
+            y = np.asarray(y, dtype=float).reshape(-1)
+            if len(y) != len(x):
+                raise ValueError("x and y must have the same number of observations.")
+            columns.append(y[:, None])
+        design = np.column_stack(columns)
+        if not np.isfinite(design).all():
+            raise ValueError("Observations must be finite numbers.")
+        return design
+
+    def update(self, x, y) -> None:
+        """
+        并入一批观测（x 为 行数 × 变量数）。
+        """
+        block = self._design(x, y)
+        if len(block) == 0:
+            return
+        self.r = np.linalg.qr(np.vstack([self.r, block]), mode="r")
+        self.n += len(block)
+
+    def merge(self, other: "LinearModel") -> None:
+        """
+        并入另一个同变量模型的全部观测：两者的 R 因子叠放后再做一次 QR，与合并原始数据后拟合一致。
+        """
+        if other.feature_names != self.feature_names:
+            raise ValueError("Cannot merge models with different predictors.")
+        if other.n == 0:
+            return
+        self.r = np.linalg.qr(np.vstack([self.r, other.r]), mode="r")
+        self.n += other.n
+
+    def _solve(self) -> Tuple[np.ndarray, np.ndarray, float]:
+        """
+        返回 (系数, R 因子, 残差平方和)；样本不足或自变量线性相关时抛出 ValueError。
+        观测数恰好等于参数个数时仍可拟合（残差自由度为 0），但不给出标准误与区间。
+        """
+        k = self.parameters
+        if self.n < k:
+            raise ValueError(f"At least {k} observations are required for {k - 1} predictor(s).")
+        r = self.r[:k, :k]
+        diag = np.abs(np.diag(r))
+        if diag.min() <= 1e-10 * diag.max():
+            raise ValueError("Predictor columns are linearly dependent.")
+        beta = np.linalg.solve(r, self.r[:k, k])
+        rss = float(self.r[k, k] ** 2) if self.r.shape[0] > k else 0.0
+        return beta, r, rss
+
+    def predict(self, x, confidence: float = 0.95) -> List[Dict]:
+        """
+        点预测及其预测区间：ŷ ± t(1-α/2, n-p-1) · s · sqrt(1 + x₀ᵀ(XᵀX)⁻¹x₀)；自由度为 0 时区间为空。
+        """
+        if not 0 < confidence < 1:
+            raise ValueError("Confidence must be between 0 and 1.")
+        beta, r, rss = self._solve()
+        design = self._design(x)
+        fitted = design @ beta
+        df = self.n - self.parameters
+        if df == 0:
+            return [{"predict_y": round(float(v), 4), "lower": None, "upper": None} for v in fitted]
+        sigma = math.sqrt(rss / df)
+        leverage = np.sum(np.linalg.solve(r.T, design.T) ** 2, axis=0)
+        half_width = student_t_quantile((1 + confidence) / 2, df) * sigma * np.sqrt(1 + leverage)
+        return [
+            {"predict_y": round(float(v), 4), "lower": round(float(v - h), 4), "upper": round(float(v + h), 4)}
+            for v, h in zip(fitted, half_width)
+        ]
+
+    def _total_sum_of_squares(self, rss: float) -> float:
+        # 首列为常数列，Qᵀy 除首元素外的平方和加残差平方和即为总离差平方和；
+        # y 为常数时只剩舍入误差（约 n·ε² 倍 Σy²），相对 Σy² 不超过 1e-20（y 的相对离散约 1e-10）即视为 0
+        k = self.parameters
+        ss_tot = float(np.sum(self.r[1:k, k] ** 2)) + rss
+        return 0.0 if ss_tot <= 1e-20 * (float(self.r[0, k]) ** 2 + ss_tot) else ss_tot
+
+    def coefficients(self) -> Tuple[np.ndarray, float]:
+        """
+        返回未取整的 (系数 [β0, β1, ...], R²)；y 为常数时 R² 取 0。
+        """
+        beta, _, rss = self._solve()
+        ss_tot = self._total_sum_of_squares(rss)
+        return beta, 1 - rss / ss_tot if ss_tot > 0 else 0.0
+
+    def summary(self) -> Dict:
+        beta, r, rss = self._solve()
+        k = self.parameters
+        df = self.n - k
+        ss_tot = self._total_sum_of_squares(rss)
+        r_squared = 1 - rss / ss_tot if ss_tot > 0 else 0.0
+        names = ["intercept"] + self.feature_names
+        result = {
+            "coefficients": {n: round(float(b), 6) for n, b in zip(names, beta)},
+            "standard_errors": None,
+            "t_values": None,
+            "p_values": None,
+            "r_squared": round(r_squared, 6),
+            "adjusted_r_squared": None,
+            "residual_std_error": None,
+            "sample_count": self.n,
+            "degrees_of_freedom": df
+        }
+        if df == 0:
+            return result  # 恰好拟合：没有剩余自由度估计 σ²
+
+        sigma2 = rss / df
+        # Var(β) = σ² (XᵀX)⁻¹ = σ² R⁻¹R⁻ᵀ
+        r_inv = np.linalg.solve(r, np.eye(k))
+        std_errors = np.sqrt(sigma2 * np.sum(r_inv ** 2, axis=1))
+        t_values = np.divide(beta, std_errors, out=np.full(k, np.inf), where=std_errors > 0)
+        result.update({
+            "standard_errors": {n: round(float(s), 6) for n, s in zip(names, std_errors)},
+            "t_values": {n: round(float(t), 4) for n, t in zip(names, t_values)},
+            "p_values": {n: round(2 * (1 - student_t_cdf(abs(float(t)), df)), 6) for n, t in zip(names, t_values)},
+            # y 为常数时调整 R² 无定义
+            "adjusted_r_squared": round(1 - (1 - r_squared) * (self.n - 1) / df, 6) if ss_tot > 0 else None,
+            "residual_std_error": round(math.sqrt(sigma2), 6)
+        })
+        return result
+
@@ -1,20 +1,37 @@
-from typing import List
-import numpy_financial as npf
+from __future__ import annotations
 
+from typing import Dict, List, Optional
+
+from services.irr_solver import solve_irr, irr_failure_reason
+from services.metrics import timed
+from services.lazy_module import lazy_import
+
+np = lazy_import("numpy")
+
+@timed
 def calculate_npv(cash_flows: List[float], discount_rate: float) -> float:
     return round(sum(cf / ((1 + discount_rate) ** t) for t, cf in enumerate(cash_flows)), 2)
 
+@timed
 def calculate_roi(gain: float, cost: float) -> float:
     if cost == 0:
         raise ValueError("Cost cannot be zero")
     return round((gain - cost) / cost * 100, 2)  # 百分比
 
-def calculate_irr(cash_flows: List[float]) -> float:
-    irr = npf.irr(cash_flows)
-    if irr is None:
-        raise ValueError("IRR could not be calculated.")
-    return round(irr * 100, 2)
+@timed
+def calculate_irr(cash_flows: List[float], guess: Optional[float] = None) -> dict:
+    if not cash_flows:
+        raise ValueError("Cash flow series is empty.")
+    result = solve_irr([cash_flows], guess)
+    if not result.converged[0]:
+        raise ValueError(f"IRR could not be calculated: {irr_failure_reason(result.bracketed[0])}")
+    return {
+        "irr_percent": round(float(result.rates[0]) * 100, 2),
+        "iterations": int(result.iterations[0]),
+        "converged": True
+    }
 
+@timed
 def calculate_payback(cash_flows: List[float]) -> float:
     cumulative = 0
     for i, flow in enumerate(cash_flows):
@@ -23,6 +40,77 @@ def calculate_payback(cash_flows: List[float]) -> float:
             return i  # 回本时间点（单位：期数）
     return -1  # 没有回本
 
+def discount_factors(discount_rates: List[float], periods: int) -> np.ndarray:
+    """
+    预计算折现因子矩阵，形状为 (折现率个数, 期数)，元素为 (1 + r) ** -t。
+    """
+    rates = np.asarray(discount_rates, dtype=float)
+    if np.any(rates <= -1):
+        raise ValueError("Discount rate must be greater than -100%.")
+    return (1 + rates)[:, None] ** -np.arange(periods, dtype=float)
+
+
+def pack_cash_flows(cash_flows: List[List[float]]):
+    """
+    把长度不一的现金流序列补零成矩阵，返回 (matrix, lengths)。
+    末尾补零不影响 NPV 和累计现金流。
+    """
+    lengths = np.fromiter((len(row) for row in cash_flows), dtype=np.int64, count=len(cash_flows))
+    width = int(lengths.max()) if len(lengths) else 0
+    matrix = np.zeros((len(cash_flows), width), dtype=float)
+    mask = np.arange(width) < lengths[:, None]
+    if width:
+        matrix[mask] = np.fromiter((cf for row in cash_flows for cf in row), dtype=float, count=int(lengths.sum()))
+    return matrix, lengths
+
+
+@timed
+def calculate_batch_metrics(cash_flows: List[List[float]],
+                            discount_rates: List[float],
+                            irr_guesses: Optional[List[float]] = None) -> List[dict]:
+    """
+    批量计算多条现金流的 NPV / IRR / 回收期，单行出错只在该行返回 error，不影响整批。
+    irr_guesses 可传入上次的 IRR 结果（逐行）作为求解热启动点。
+    """
+    if irr_guesses is not None and len(irr_guesses) != len(cash_flows):
+        raise ValueError("irr_guesses must have one entry per cash flow series.")
+
+    matrix, lengths = pack_cash_flows(cash_flows)
+    factors = discount_factors(discount_rates, matrix.shape[1])
+
+    npv = np.round(matrix @ factors.T, 2)  # (行数, 折现率个数)
+
+    recovered = np.cumsum(matrix, axis=1) >= 0
+    has_payback = recovered.any(axis=1)
+    # 全部为空序列时矩阵宽度为 0，argmax 无法计算；这些行在下面各自返回 error
+    payback = np.argmax(recovered, axis=1) if matrix.shape[1] else np.zeros(len(matrix), dtype=np.int64)
+
+    finite = np.isfinite(matrix).all(axis=1)
+    irr = solve_irr(np.where(finite[:, None], matrix, 0.0), irr_guesses)
+
+    results = []
+    for i, length in enumerate(lengths):
+        if length == 0:
+            results.append({"index": i, "error": "Cash flow series is empty."})
+            continue
+        if not finite[i]:
+            results.append({"index": i, "error": "Cash flows must be finite numbers."})
+            continue
+
+        row = {
+            "index": i,
+            "npv": npv[i].tolist(),
+            "irr_percent": round(float(irr.rates[i]) * 100, 2) if irr.converged[i] else None,
+            "irr_iterations": int(irr.iterations[i]),
+            "irr_converged": bool(irr.converged[i]),
+            "payback_period": int(payback[i]) if has_payback[i] else None
+        }
+        if not irr.converged[i]:
+            row["irr_error"] = irr_failure_reason(irr.bracketed[i])
+        results.append(row)
+    return results
+
+@timed
 def track_budget(data: List[dict]) -> List[dict]:
     result = []
     for item in data:
@@ -38,6 +126,7 @@ def track_budget(data: List[dict]) -> List[dict]:
         })
     return result
 
+@timed
 def analyze_variance(data: List[dict]) -> List[dict]:
     result = []
     for item in data:
@@ -64,6 +153,42 @@ def analyze_variance(data: List[dict]) -> List[dict]:
         })
     return result
 
+# 偏差百分比超过 ±10% 视为超支 / 结余
+VARIANCE_THRESHOLD = 10.0
+
+
+@timed
+def analyze_variance_bulk(budgeted_amount: List[float], actual_amount: List[float]) -> Dict[str, np.ndarray]:
+    """
+    向量化的 analyze_variance：输入按列组织，返回按列组织的结果（口径与逐行版本一致）；
+    金额缺失或非数字的行在 error 列给出原因，其余列为空。
+    """
+    budget = np.asarray(budgeted_amount, dtype=float)
+    actual = np.asarray(actual_amount, dtype=float)
+    if len(budget) != len(actual):
+        raise ValueError(f"Column 'actual_amount' has {len(actual)} rows, expected {len(budget)}.")
+
+    ok = np.isfinite(budget) & np.isfinite(actual)
+    difference = np.round(actual - budget, 2)
+    percent = np.zeros(len(budget))
+    np.divide(difference, budget, out=percent, where=ok & (budget != 0))
+    percent = np.round(percent * 100, 2)
+
+    analysis = np.select([percent > VARIANCE_THRESHOLD, percent < -VARIANCE_THRESHOLD],
+                         ["Overspent", "Underspent"], "Within range").astype(object)
+    analysis[~ok] = None
+    error = np.where(np.isfinite(budget), np.where(ok, None, "actual_amount must be a number"),
+                     "budgeted_amount must be a number")
+    return {
+        "budgeted_amount": budget,
+        "actual_amount": actual,
+        "difference": np.where(ok, difference, np.nan),
+        "percent_variance": np.where(ok, percent, np.nan),
+        "analysis": analysis,
+        "error": error
+    }
+
+@timed
 def forecast_next_phase(data: List[dict]) -> dict:
     if len(data) < 2:
         raise ValueError("Need at least 2 phases for forecasting.")
@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import threading
+import uuid
+from statistics import NormalDist
+from typing import Dict, List, Optional, Tuple
+
+from services.bounded_store import BoundedStore, store_limits
+from services.metrics import timed
+from services.lazy_module import lazy_import
+
+np = lazy_import("numpy")
+
+# 指数平滑模型：simple（水平）、holt（水平 + 趋势）、damped（水平 + 阻尼趋势）；auto 按 AICc 逐序列选择
+MODELS = ("simple", "holt", "damped")
+# 各模型的参数个数（平滑参数 + 初始状态），用于 AICc
+_MODEL_PARAMS = {"simple": 2, "holt": 4, "damped": 5}
+# 拟合所需的最少观测数
+_MIN_LENGTH = {"simple": 2, "holt": 3, "damped": 3}
+
+# 参数搜索：先在粗网格上找一步预测误差平方和最小的组合，再在最优点附近细化
+COARSE_GRID = tuple(round(0.05 + 0.1 * i, 2) for i in range(10))
+FINE_OFFSETS = (-0.05, -0.025, 0.0, 0.025, 0.05)
+PHI_GRID = (0.8, 0.85, 0.9, 0.95, 0.98)
+# 每块 序列数 × 参数组合数 的上限，限制搜索时的内存占用
+FORECAST_BLOCK_ELEMENTS = 1 << 20
+
+
+def _grid(model: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    a = np.array(COARSE_GRID)
+    if model == "simple":
+        return a, np.zeros_like(a), np.ones_like(a)
+    phis = PHI_GRID if model == "damped" else (1.0,)
+    alpha, beta, phi = (g.ravel() for g in np.meshgrid(a, a, phis, indexing="ij"))
+    return alpha, beta, phi
+
+
+def _smooth(y: np.ndarray, lengths: np.ndarray, alpha: np.ndarray, beta: np.ndarray, phi: np.ndarray,
+            trend: bool) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    对 S 条序列 × G 组参数同时执行误差修正形式的递推（参数形状为 (S, G) 或可广播），
+    返回一步预测误差平方和及末期的水平、趋势。序列按左对齐补 NaN，超出各自长度的时刻不更新。
+        ŷ = l + φb,  e = y - ŷ,  l ← ŷ + αe,  b ← φb + αβe
+    趋势模型用前两期初始化（水平 y1、趋势 y1 - y0），从第三期开始计误差；无趋势模型从第二期开始。
+    """
+    shape = np.broadcast_shapes(alpha.shape, (len(y), 1))
+    first = 2 if trend else 1
+    level = np.broadcast_to(y[:, first - 1:first], shape).copy()
+    slope = np.broadcast_to(y[:, 1:2] - y[:, :1], shape).copy() if trend else np.zeros(shape)
+    sse = np.zeros(shape)
+    gain = alpha * beta
+    for t in range(first, y.shape[1]):
+        active = (t < lengths)[:, None]
+        fitted = level + phi * slope
+        error = y[:, t:t + 1] - fitted
+        sse += np.where(active, error * error, 0.0)
+        level = np.where(active, fitted + alpha * error, level)
+        slope = np.where(active, phi * slope + gain * error, slope)
+    return sse, level, slope
+
+
+def _search(y: np.ndarray, lengths: np.ndarray, model: str) -> Dict[str, np.ndarray]:
+    """
+    单一模型的参数搜索（粗网格 + 局部细化），返回各序列的最优参数、误差平方和与末期状态。
+    """
+    trend = model != "simple"
+    alpha, beta, phi = _grid(model)
+    sse, _, _ = _smooth(y, lengths, alpha, beta, phi, trend)
+    best = np.argmin(sse, axis=1)
+    a0, b0, p0 = alpha[best][:, None], beta[best][:, None], phi[best][:, None]
+
+    # 在最优粗网格点附近细化 α（及 β），φ 保持不变
+    offsets = np.array(FINE_OFFSETS)
+    if trend:
+        da, db = (g.ravel() for g in np.meshgrid(offsets, offsets, indexing="ij"))
+    else:
+        da, db = offsets, np.zeros_like(offsets)
+    alpha = np.clip(a0 + da, 0.01, 0.99)
+    beta = np.clip(b0 + db, 0.01, 0.99) if trend else np.zeros_like(alpha)
+    phi = np.broadcast_to(p0, alpha.shape)
+    sse, level, slope = _smooth(y, lengths, alpha, beta, phi, trend)
+
+    rows = np.arange(len(y))
+    best = np.argmin(sse, axis=1)
+    return {
+        "alpha": alpha[rows, best], "beta": beta[rows, best], "phi": phi[rows, best],
+        "sse": sse[rows, best], "level": level[rows, best], "trend": slope[rows, best]
+    }
+
+
+def _aicc(sse: np.ndarray, errors: np.ndarray, k: int) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        aic = errors * np.log(np.maximum(sse / errors, 1e-12)) + 2 * k
+        return np.where(errors - k - 1 > 0, aic + 2 * k * (k + 1) / (errors - k - 1), np.inf)
+
+
+class SmoothingState:
+    """
+    一组序列拟合后的指数平滑状态（各字段均为按序列排列的数组）：模型、平滑参数、末期水平 / 趋势，
+    以及一步预测误差的平方和与个数。追加观测只需用缓存的状态做一步递推，不必重新拟合。
+    """
+
+    FIELDS = ("model", "alpha", "beta", "phi", "level", "trend", "sse", "errors", "length")
+
+    def __init__(self, **fields):
+        for name in self.FIELDS:
+            setattr(self, name, fields[name])
+
+    def __len__(self) -> int:
+        return len(self.level)
+
+    def update(self, rows: np.ndarray, values: np.ndarray) -> None:
+        """
+        为 rows 指定的序列各追加一个新观测，O(1) / 序列。
+        """
+        alpha, beta, phi = self.alpha[rows], self.beta[rows], self.phi[rows]
+        fitted = self.level[rows] + phi * self.trend[rows]
+        error = values - fitted
+        self.level[rows] = fitted + alpha * error
+        self.trend[rows] = phi * self.trend[rows] + alpha * beta * error
+        self.sse[rows] += error * error
+        self.errors[rows] += 1
+        self.length[rows] += 1
+
+    def forecast(self, horizon: int, confidence: float = 0.95) -> Dict[str, np.ndarray]:
+        """
+        h 步预测 ŷ(h) = l + (φ + … + φ^h)·b 及预测区间；线性指数平滑的 h 步预测方差为
+        σ²·(1 + Σ_{j<h} c_j²)，其中 c_j = α + αβ·(φ + … + φ^j)。
+        """
+        if horizon < 1:
+            raise ValueError("Forecast horizon must be at least 1.")
+        if not 0 < confidence < 1:
+            raise ValueError("Confidence must be between 0 and 1.")
+        steps = np.arange(1, horizon + 1)
+        damping = np.cumsum(self.phi[:, None] ** steps, axis=1)
+        point = self.level[:, None] + damping * self.trend[:, None]
+
+        c = self.alpha[:, None] + (self.alpha * self.beta)[:, None] * damping[:, :-1]
+        variance_factor = 1 + np.concatenate([np.zeros((len(self), 1)), np.cumsum(c * c, axis=1)], axis=1)
+        sigma = np.sqrt(self.sse / np.maximum(self.errors, 1))
+        half_width = NormalDist().inv_cdf((1 + confidence) / 2) * sigma[:, None] * np.sqrt(variance_factor)
+        return {"forecast": point, "lower": point - half_width, "upper": point + half_width, "sigma": sigma}
+
+
+def _pack(series: List[List[float]]) -> Tuple[np.ndarray, np.ndarray]:
+    lengths = np.array([len(s) for s in series], dtype=np.int64)
+    y = np.full((len(series), int(lengths.max(initial=0))), np.nan)
+    for i, s in enumerate(series):
+        y[i, :len(s)] = s
+    return y, lengths
+
+
+@timed
+def fit_exponential_smoothing(series: List[List[float]], model: str = "auto") -> SmoothingState:
+    """
+    同时拟合多条序列（长度可不同）：所有序列与参数组合一起做向量化递推，参数按一步预测误差平方和最小选取；
+    model="auto" 时对每条序列在可用模型中按 AICc 选择。
+    """
+    if model != "auto" and model not in MODELS:
+        raise ValueError(f"Unsupported model '{model}', use one of: auto, {', '.join(MODELS)}")
+    if not series:
+        raise ValueError("At least one series is required.")
+    y, lengths = _pack(series)
+    candidates = MODELS if model == "auto" else (model,)
+    shortest = _MIN_LENGTH[min(candidates, key=_MIN_LENGTH.get)]
+    if lengths.min() < shortest:
+        raise ValueError(f"Every series needs at least {shortest} observations.")
+    if not np.isfinite(y[np.arange(y.shape[1]) < lengths[:, None]]).all():
+        raise ValueError("Series values must be finite numbers.")
+
+    fits, scores = {}, []
+    block = max(1, FORECAST_BLOCK_ELEMENTS // (len(COARSE_GRID) ** 2 * len(PHI_GRID)))
+    for name in candidates:
+        parts = [_search(y[i:i + block], lengths[i:i + block], name) for i in range(0, len(y), block)]
+        fit = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+        # 与 _smooth 一致：趋势模型的前两期用于初始化，不产生一步预测误差
+        fit["errors"] = lengths - (1 if name == "simple" else 2)
+        fits[name] = fit
+        score = _aicc(fit["sse"], fit["errors"], _MODEL_PARAMS[name])
+        scores.append(np.where(lengths >= _MIN_LENGTH[name], score, np.inf))
+
+    scores = np.array(scores)
+    # AICc 无定义（样本过少）时退回候选中最简单的可用模型
+    choice = np.where(np.isfinite(scores).any(axis=0), np.argmin(scores, axis=0), 0)
+    state = {k: np.choose(choice, [fits[name][k] for name in candidates]).astype(float)
+             for k in ("alpha", "beta", "phi", "level", "trend", "sse")}
+    return SmoothingState(
+        model=np.array(candidates, dtype=object)[choice],
+        errors=np.choose(choice, [fits[name]["errors"] for name in candidates]).astype(np.int64),
+        length=lengths.copy(),
+        **state
+    )
+
+
+class SeriesForecast:
+    """
+    一组已拟合的序列：按名称索引缓存的平滑状态，同时保留原始观测以便需要时重新拟合。
+    """
+
+    def __init__(self, series: Dict[str, List[float]], model: str = "auto"):
+        self.id = uuid.uuid4().hex
+        self.model = model
+        self.names = list(series)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.history = [list(map(float, series[name])) for name in self.names]
+        self.state = fit_exponential_smoothing(self.history, model)
+        self.version = 1
+
+    def append(self, observations: Dict[str, List[float]], refit: bool = False) -> None:
+        """
+        追加新观测：默认用缓存状态逐期递推（每个新观测 O(1)），refit=True 时用全部历史重新选择模型与参数。
+        """
+        unknown = [name for name in observations if name not in self.index]
+        if unknown:
+            raise KeyError(f"Series '{unknown[0]}' not found.")
+        values = {name: [float(v) for v in vs] for name, vs in observations.items()}
+        if not np.isfinite([v for vs in values.values() for v in vs]).all():
+            raise ValueError("Series values must be finite numbers.")
+
+        if refit:
+            for name, vs in values.items():
+                self.history[self.index[name]].extend(vs)
+            self.state = fit_exponential_smoothing(self.history, self.model)
+        else:
+            # 第 k 轮同时更新所有至少有 k 个新观测的序列
+            for k in range(max((len(vs) for vs in values.values()), default=0)):
+                batch = [(self.index[name], vs[k]) for name, vs in values.items() if len(vs) > k]
+                rows, new = (np.array(col) for col in zip(*batch))
+                self.state.update(rows, new.astype(float))
+                for i, v in batch:
+                    self.history[i].append(v)
+        self.version += 1
+
+    def describe(self, horizon: int = 3, confidence: float = 0.95) -> Dict:
+        s = self.state
+        result = s.forecast(horizon, confidence)
+        return {
+            "forecast_id": self.id,
+            "version": self.version,
+            "horizon": horizon,
+            "confidence": confidence,
+            "series": {
+                name: {
+                    "model": s.model[i],
+                    "alpha": round(float(s.alpha[i]), 4),
+                    "beta": round(float(s.beta[i]), 4),
+                    "phi": round(float(s.phi[i]), 4),
+                    "observations": int(s.length[i]),
+                    "level": round(float(s.level[i]), 2),
+                    "trend": round(float(s.trend[i]), 2),
+                    "sigma": round(float(result["sigma"][i]), 2),
+                    "forecast": np.round(result["forecast"][i], 2).tolist(),
+                    "lower": np.round(result["lower"][i], 2).tolist(),
+                    "upper": np.round(result["upper"][i], 2).tolist()
+                }
+                for i, name in enumerate(self.names)
+            }
+        }
+
+
+class ForecastStore:
+    """
+    按 forecast_id 保存一组序列的平滑状态与原始观测。追加观测会原地递推状态，
+    因此追加与查询共用一把锁，返回的预测总是基于完整一批观测。
+    """
+
+    def __init__(self, store_size: int = 256, ttl: float = 3600.0):
+        self._forecasts = BoundedStore(store_size, ttl)
+        self._lock = threading.Lock()
+
+    def create(self, series: Dict[str, List[float]], model: str = "auto", horizon: int = 3,
+               confidence: float = 0.95) -> Dict:
+        forecast = SeriesForecast(series, model)
+        result = forecast.describe(horizon, confidence)
+        self._forecasts.put(forecast.id, forecast)
+        return result
+
+    def get(self, forecast_id: str) -> SeriesForecast:
+        forecast = self._forecasts.get(forecast_id)
+        if forecast is None:
+            raise KeyError(f"Forecast '{forecast_id}' not found.")
+        return forecast
+
+    def describe(self, forecast_id: str, horizon: int = 3, confidence: float = 0.95) -> Dict:
+        forecast = self.get(forecast_id)
+        with self._lock:
+            return forecast.describe(horizon, confidence)
+
+    def delete(self, forecast_id: str) -> None:
+        if self._forecasts.pop(forecast_id) is None:
+            raise KeyError(f"Forecast '{forecast_id}' not found.")
+
+    def append(self, forecast_id: str, observations: Dict[str, List[float]], refit: bool = False,
+               horizon: int = 3, confidence: float = 0.95) -> Dict:
+        forecast = self.get(forecast_id)
+        with self._lock:
+            forecast.append(observations, refit)
+            return forecast.describe(horizon, confidence)
+
+
+forecast_store = ForecastStore(**store_limits())
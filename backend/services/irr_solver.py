@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import NamedTuple, Union
+
+from services.lazy_module import lazy_import
+
+np = lazy_import("numpy")
+
+
+@lru_cache(maxsize=None)
+def _bracket_grid() -> np.ndarray:
+    # 括区间搜索用的利率网格：在 log(1 + r) 上均匀取点，覆盖 r ∈ [-99.9%, 99900%]
+    return np.expm1(np.linspace(np.log(1e-3), np.log(1e3), 241))
+
+
+class IRRResult(NamedTuple):
+    rates: np.ndarray       # 每行的 IRR（小数），未求出为 NaN
+    iterations: np.ndarray  # 每行实际迭代次数
+    converged: np.ndarray   # 每行是否收敛
+    bracketed: np.ndarray   # 每行是否找到 NPV 变号区间（False 说明 IRR 不存在或超出网格）
+
+
+def _npv_and_derivative(cf: np.ndarray, rates: np.ndarray):
+    """
+    对每行现金流在各自的利率上求 NPV 及其对 r 的导数。
+    """
+    t = np.arange(cf.shape[1], dtype=float)
+    v = 1.0 / (1.0 + rates)
+    powers = v[:, None] ** t
+    f = np.einsum("ij,ij->i", cf, powers)
+    df = -np.einsum("ij,ij->i", cf * t, powers) * v
+    return f, df
+
+
+def _newton(cf: np.ndarray, x0: np.ndarray, tol: float, max_iter: int):
+    """
+    无括区间的 Newton 迭代，用于热启动。发散或越界（r <= -1）的行视为失败。
+    """
+    x = x0.astype(float).copy()
+    iterations = np.zeros(len(x), dtype=np.int64)
+    converged = np.zeros(len(x), dtype=bool)
+    active = np.ones(len(x), dtype=bool)
+
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        idx = np.flatnonzero(active)
+        f, df = _npv_and_derivative(cf[idx], x[idx])
+        step = f / df
+        x_new = x[idx] - step
+        iterations[idx] += 1
+
+        bad = ~np.isfinite(x_new) | (x_new <= -1)
+        done = ~bad & ((f == 0) | (np.abs(step) <= tol * (1 + np.abs(x_new))))
+        x[idx] = np.where(bad, x[idx], x_new)
+        converged[idx[done]] = True
+        active[idx[bad | done]] = False
+
+    return x, iterations, converged
+
+
+def _bracket(cf: np.ndarray):
+    """
+    在利率网格上寻找 NPV 变号区间，多个变号时取离 0 最近的一个（与 npf.irr 选根规则一致）。
+    """
+    grid = _bracket_grid()
+    factors = (1 + grid)[:, None] ** -np.arange(cf.shape[1], dtype=float)
+    values = cf @ factors.T  # (行数, 网格点数)
+
+    sign = np.sign(values)
+    change = (sign[:, :-1] * sign[:, 1:] <= 0) & np.isfinite(values[:, :-1]) & np.isfinite(values[:, 1:])
+    # 整行为 0 的现金流在每个区间都“变号”，不视为有解
+    change &= ~((values[:, :-1] == 0) & (values[:, 1:] == 0))
+
+    distance = np.where(change, np.abs(grid[:-1] + grid[1:]), np.inf)
+    k = np.argmin(distance, axis=1)
+    found = change[np.arange(len(k)), k]
+    return grid[k], grid[k + 1], found
+
+
+def _safeguarded_newton(cf: np.ndarray, lo: np.ndarray, hi: np.ndarray, tol: float, max_iter: int):
+    """
+    带括区间保护的 Newton 法：Newton 步落在区间外或不收缩时退化为二分。
+    """
+    f_lo, _ = _npv_and_derivative(cf, lo)
+    lo, hi = lo.copy(), hi.copy()
+    x = np.where(f_lo == 0, lo, 0.5 * (lo + hi))
+    iterations = np.zeros(len(x), dtype=np.int64)
+    converged = f_lo == 0
+    active = ~converged
+    last_step = hi - lo
+
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        idx = np.flatnonzero(active)
+        xi, a, b = x[idx], lo[idx], hi[idx]
+        f, df = _npv_and_derivative(cf[idx], xi)
+        iterations[idx] += 1
+
+        # 根据 f(x) 与 f(lo) 的符号收缩区间
+        same = np.sign(f) == np.sign(f_lo[idx])
+        a = np.where(same, xi, a)
+        b = np.where(same, b, xi)
+        f_lo[idx] = np.where(same, f, f_lo[idx])
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_newton = xi - f / df
+        use_newton = (
+            np.isfinite(x_newton) & (x_newton > a) & (x_newton < b)
+            & (np.abs(x_newton - xi) < 0.5 * np.abs(last_step[idx]))
+        )
+        x_new = np.where(use_newton, x_newton, 0.5 * (a + b))
+
+        step = x_new - xi
+        done = (f == 0) | (np.abs(step) <= tol * (1 + np.abs(x_new))) | (b - a <= tol * (1 + np.abs(x_new)))
+        x[idx] = np.where(f == 0, xi, x_new)
+        lo[idx], hi[idx], last_step[idx] = a, b, step
+        converged[idx[done]] = True
+        active[idx[done]] = False
+
+    return x, iterations, converged
+
+
+def solve_irr(
+    cash_flows: np.ndarray,
+    guess: Union[None, float, np.ndarray] = None,
+    tol: float = 1e-10,
+    max_iter: int = 100
+) -> IRRResult:
+    """
+    对多条现金流（矩阵每行一条，末尾补零不影响结果）同时求 IRR。
+    给定 guess（标量或逐行数组，例如上次的结果）时先从该点做 Newton 热启动，
+    未收敛的行再走网格括区间 + 保护 Newton。
+    """
+    cf = np.atleast_2d(np.asarray(cash_flows, dtype=float))
+    n = cf.shape[0]
+    rates = np.full(n, np.nan)
+    iterations = np.zeros(n, dtype=np.int64)
+    converged = np.zeros(n, dtype=bool)
+    bracketed = np.zeros(n, dtype=bool)
+
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        pending = np.ones(n, dtype=bool)
+        if guess is not None:
+            x0 = np.broadcast_to(np.asarray(guess, dtype=float), (n,))
+            x, its, ok = _newton(cf, x0, tol, min(max_iter, 20))
+            rates[ok] = x[ok]
+            iterations += its
+            converged |= ok
+            bracketed |= ok
+            pending = ~ok
+
+        idx = np.flatnonzero(pending)
+        if len(idx):
+            lo, hi, found = _bracket(cf[idx])
+            bracketed[idx] = found
+            sub = idx[found]
+            if len(sub):
+                x, its, ok = _safeguarded_newton(cf[sub], lo[found], hi[found], tol, max_iter)
+                rates[sub] = np.where(ok, x, np.nan)
+                iterations[sub] += its
+                converged[sub] = ok
+
+    return IRRResult(rates, iterations, converged, bracketed)
+
+
+def irr_failure_reason(bracketed: bool) -> str:
+    """
+    把求解状态翻译成可读的错误原因。
+    """
+    if not bracketed:
+        return "NPV never changes sign; IRR does not exist for these cash flows."
+    return "IRR solver did not converge."
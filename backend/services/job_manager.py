@@ -0,0 +1,215 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional
+
+from services.process_pool import get_process_pool, pool_size
+
+# 同时运行的作业数、排队上限、已完成作业的保留数量与保留时间（秒）
+JOB_CONCURRENCY_ENV = "ECON_JOB_CONCURRENCY"
+JOB_QUEUE_SIZE_ENV = "ECON_JOB_QUEUE_SIZE"
+JOB_STORE_SIZE_ENV = "ECON_JOB_STORE_SIZE"
+JOB_TTL_ENV = "ECON_JOB_TTL"
+
+QUEUED, RUNNING, COMPLETED, FAILED, CANCELLED = "queued", "running", "completed", "failed", "cancelled"
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+
+class JobQueueFull(RuntimeError):
+    pass
+
+
+class Job:
+    """
+    一个后台作业：由若干可在子进程中独立执行的步骤 fn(*args) 组成，
+    全部完成后用 finalize(按步骤顺序的结果列表) 得到最终结果。
+    """
+
+    def __init__(self, kind: str, fn: Callable, steps: List[tuple], finalize: Callable[[list], Any], priority: int):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.fn = fn
+        self.steps = steps
+        self.finalize = finalize
+        self.priority = priority
+        self.status = QUEUED
+        self.completed_steps = 0
+        self.result = None
+        self.error: Optional[str] = None
+        self.cancel_event = threading.Event()
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def describe(self) -> Dict[str, Any]:
+        total = len(self.steps)
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "priority": self.priority,
+            "progress": round(self.completed_steps / total, 4) if total else 1.0,
+            "completed_steps": self.completed_steps,
+            "total_steps": total,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error
+        }
+
+
+class JobManager:
+    """
+    后台作业调度：优先级队列（priority 大者先执行，同级先进先出）+ 固定数量的调度线程，
+    每个作业的步骤以有限窗口提交到共享进程池，按步骤统计进度，在步骤边界响应取消。
+    已结束的作业保存在有界、带过期时间的结果存储中。
+    """
+
+    def __init__(self, concurrency: int = 2, max_queued: int = 100, store_size: int = 256, ttl: float = 3600.0):
+        self.concurrency = concurrency
+        self.max_queued = max_queued
+        self.store_size = store_size
+        self.ttl = ttl
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: List[tuple] = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._workers: List[threading.Thread] = []
+        self._stopped = False
+
+    def _ensure_workers(self) -> None:
+        if self._workers:
+            return
+        for i in range(self.concurrency):
+            worker = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def _purge(self) -> None:
+        # 调用方持有锁：移除过期作业，并在超出容量时淘汰最早结束的作业
+        now = time.time()
+        finished = [job for job in self._jobs.values() if job.status in FINISHED_STATES]
+        finished.sort(key=lambda job: job.finished_at)
+        overflow = len(finished) - self.store_size
+        for i, job in enumerate(finished):
+            if i < overflow or now - job.finished_at > self.ttl:
+                del self._jobs[job.id]
+
+    def submit(self, kind: str, fn: Callable, steps: List[tuple], finalize: Callable[[list], Any], priority: int = 0) -> Job:
+        job = Job(kind, fn, steps, finalize, priority)
+        with self._cond:
+            if self._stopped:
+                raise JobQueueFull("Job manager is shutting down.")
+            self._purge()
+            if sum(1 for j in self._jobs.values() if j.status == QUEUED) >= self.max_queued:
+                raise JobQueueFull("Job queue is full, please retry later.")
+            self._jobs[job.id] = job
+            heapq.heappush(self._queue, (-priority, next(self._counter), job))
+            self._ensure_workers()
+            self._cond.notify()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._cond:
+            self._purge()
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED_STATES:
+                return job
+            job.cancel_event.set()
+            if job.status == QUEUED:
+                # 排队中的作业直接标记取消，调度线程取出时跳过
+                job.status = CANCELLED
+                job.finished_at = time.time()
+            return job
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            counts = {state: 0 for state in (QUEUED, RUNNING) + FINISHED_STATES}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return counts
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._stopped = True
+            for job in self._jobs.values():
+                job.cancel_event.set()
+                if job.status == QUEUED:
+                    # 不再有调度线程取出排队中的作业，直接标记取消
+                    job.status = CANCELLED
+                    job.finished_at = time.time()
+            self._cond.notify_all()
+
+    def _worker_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                _, _, job = heapq.heappop(self._queue)
+                if job.status != QUEUED:
+                    continue
+                job.status = RUNNING
+                job.started_at = time.time()
+            self._run(job)
+
+    def _run(self, job: Job) -> None:
+        pool = get_process_pool()
+        window = pool_size()
+        results: List[Any] = [None] * len(job.steps)
+        pending = {}
+        steps = iter(enumerate(job.steps))
+
+        def fill():
+            while len(pending) < window and not job.cancel_event.is_set():
+                item = next(steps, None)
+                if item is None:
+                    return
+                index, args = item
+                pending[pool.submit(job.fn, *args)] = index
+
+        try:
+            fill()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[pending.pop(future)] = future.result()
+                    job.completed_steps += 1
+                if job.cancel_event.is_set():
+                    break
+                fill()
+
+            if job.cancel_event.is_set():
+                for future in pending:
+                    future.cancel()
+                status, result = CANCELLED, None
+            else:
+                status, result = COMPLETED, job.finalize(results)
+        except Exception as e:
+            for future in pending:
+                future.cancel()
+            status, result = FAILED, None
+            job.error = str(e)
+
+        with self._cond:
+            job.result = result
+            job.status = status
+            job.finished_at = time.time()
+
+
+job_manager = JobManager(
+    concurrency=int(os.environ.get(JOB_CONCURRENCY_ENV, "2")),
+    max_queued=int(os.environ.get(JOB_QUEUE_SIZE_ENV, "100")),
+    store_size=int(os.environ.get(JOB_STORE_SIZE_ENV, "256")),
+    ttl=float(os.environ.get(JOB_TTL_ENV, "3600"))
+)
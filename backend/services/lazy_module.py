@@ -0,0 +1,40 @@
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """
+    模块占位对象：第一次访问属性时才真正 import，之后把真实模块的属性复制到自身，
+    后续访问与直接使用模块相同，没有额外开销。导入由 importlib 的导入锁保证线程安全。
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_name"] = name
+
+    def _load(self) -> types.ModuleType:
+        module = importlib.import_module(self.__dict__["_lazy_name"])
+        self.__dict__.update(module.__dict__)
+        return module
+
+    def __getattr__(self, attr: str):
+        # 只有自身 __dict__ 中找不到的属性才会到这里：首次访问，或真实模块的动态属性
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    已导入的模块直接返回，否则返回 LazyModule 占位对象。
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
+
+def is_loaded(name: str) -> bool:
+    return name in sys.modules
@@ -0,0 +1,66 @@
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional
+
+# 进程池大小，可通过环境变量 ECON_POOL_WORKERS 配置，默认等于 CPU 核数
+POOL_WORKERS_ENV = "ECON_POOL_WORKERS"
+
+_pool: Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+# 已提交但尚未结束（完成、失败或取消）的任务数
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+def _work_finished(_future: Future) -> None:
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight -= 1
+
+
+class _TrackedProcessPool(ProcessPoolExecutor):
+    """
+    提交时计数、任务结束时由回调减一的进程池；map 也经由 submit 提交，同样被计入。
+    """
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        global _in_flight
+        future = super().submit(fn, *args, **kwargs)
+        with _in_flight_lock:
+            _in_flight += 1
+        # 任务若已结束，回调会立即执行，计数仍然平衡
+        future.add_done_callback(_work_finished)
+        return future
+
+
+def pool_size() -> int:
+    configured = int(os.environ.get(POOL_WORKERS_ENV, "0") or 0)
+    return configured if configured > 0 else (os.cpu_count() or 1)
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    返回进程内共享的进程池，首次使用时创建，之后所有请求复用，避免每次调用都 fork。
+    """
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = _TrackedProcessPool(max_workers=pool_size())
+    return _pool
+
+
+def shutdown_process_pool() -> None:
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def pending_work_items() -> int:
+    """
+    已提交但尚未完成的进程池任务数（含正在执行的），用于监控执行器队列深度。
+    """
+    return _in_flight
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from functools import lru_cache
+
+from services.lazy_module import lazy_import
+
+np = lazy_import("numpy")
+
+# Sobol 序列第 2 维起的 (本原多项式, 初始方向数 m_1..m_s)，取自 Joe & Kuo (2008) 的 new-joe-kuo-6.21201；
+# 多项式按整数编码，最高位与常数项均为 1。第 1 维是 van der Corput 序列，不需要表项
+_SOBOL_DIRECTIONS = (
+    (3, (1,)), (7, (1, 3)), (11, (1, 3, 1)), (13, (1, 1, 1)), (19, (1, 1, 3, 3)), (25, (1, 3, 5, 13)),
+    (37, (1, 1, 5, 5, 17)), (41, (1, 1, 5, 5, 5)), (47, (1, 1, 7, 11, 19)), (55, (1, 1, 5, 1, 1)),
+    (59, (1, 1, 1, 3, 11)), (61, (1, 3, 5, 5, 31)), (67, (1, 3, 3, 9, 7, 49)), (91, (1, 1, 1, 15, 21, 21)),
+    (97, (1, 3, 1, 13, 27, 49)), (103, (1, 1, 1, 15, 7, 5)), (109, (1, 3, 1, 15, 13, 25)),
+    (115, (1, 1, 5, 5, 19, 61)), (131, (1, 3, 7, 11, 23, 15, 103)), (137, (1, 3, 7, 13, 13, 15, 69)),
+    (143, (1, 1, 3, 13, 7, 35, 63)), (145, (1, 3, 5, 9, 1, 25, 53)), (157, (1, 3, 1, 13, 9, 35, 107)),
+    (167, (1, 3, 1, 5, 27, 61, 31)), (171, (1, 1, 5, 11, 19, 41, 61)), (185, (1, 3, 5, 3, 3, 13, 69)),
+    (191, (1, 1, 7, 13, 1, 19, 1)), (193, (1, 3, 7, 5, 13, 19, 59)), (203, (1, 1, 3, 9, 25, 29, 41)),
+    (211, (1, 3, 5, 13, 23, 1, 55)), (213, (1, 3, 7, 3, 13, 59, 17)), (229, (1, 3, 1, 3, 5, 53, 69)),
+    (239, (1, 1, 5, 5, 23, 33, 13)), (241, (1, 1, 7, 7, 1, 61, 123)), (247, (1, 1, 7, 9, 13, 61, 49)),
+    (253, (1, 3, 3, 5, 3, 55, 33)), (285, (1, 3, 1, 15, 31, 13, 49, 245)),
+    (299, (1, 3, 5, 15, 31, 59, 63, 97)), (301, (1, 3, 1, 11, 11, 11, 77, 249)),
+    (333, (1, 3, 1, 11, 27, 43, 71, 9)), (351, (1, 1, 7, 15, 21, 11, 81, 45)),
+    (355, (1, 3, 7, 3, 25, 31, 65, 79)), (357, (1, 3, 1, 1, 19, 11, 3, 205)),
+    (361, (1, 1, 5, 9, 19, 21, 29, 157)), (369, (1, 3, 7, 11, 1, 33, 89, 185)),
+    (391, (1, 3, 3, 3, 15, 9, 79, 71)), (397, (1, 3, 7, 11, 15, 39, 119, 27)),
+    (425, (1, 1, 3, 1, 11, 31, 97, 225)), (451, (1, 1, 1, 3, 23, 43, 57, 177)),
+    (463, (1, 3, 7, 7, 17, 17, 37, 71)), (487, (1, 3, 1, 5, 27, 63, 123, 213)),
+    (501, (1, 1, 3, 5, 11, 43, 53, 133)), (529, (1, 3, 5, 5, 29, 17, 47, 173, 479)),
+    (539, (1, 3, 3, 11, 3, 1, 109, 9, 69)), (545, (1, 1, 1, 5, 17, 39, 23, 5, 343)),
+    (557, (1, 3, 1, 5, 25, 15, 31, 103, 499)), (563, (1, 1, 1, 11, 11, 17, 63, 105, 183)),
+    (601, (1, 1, 5, 11, 9, 29, 97, 231, 363)), (607, (1, 1, 5, 15, 19, 45, 41, 7, 383)),
+    (617, (1, 3, 7, 7, 31, 19, 83, 137, 221)), (623, (1, 1, 1, 3, 23, 15, 111, 223, 83)),
+    (631, (1, 1, 5, 13, 31, 15, 55, 25, 161)), (637, (1, 1, 3, 13, 25, 47, 39, 87, 257)),
+)
+SOBOL_MAX_DIMENSION = len(_SOBOL_DIRECTIONS) + 1
+# 每个坐标的二进制位数：52 位整数转 float64 无舍入
+SOBOL_BITS = 52
+
+
+@lru_cache(maxsize=None)
+def _direction_numbers(dimension: int, levels: int) -> np.ndarray:
+    """
+    返回形状为 (dimension, levels) 的方向数 v_k = m_k · 2^(BITS - k)，按多项式递推补齐 m_k。
+    """
+    v = np.zeros((dimension, levels), dtype=np.uint64)
+    v[0] = [1 << (SOBOL_BITS - k) for k in range(1, levels + 1)]
+    for j in range(1, dimension):
+        poly, m = _SOBOL_DIRECTIONS[j - 1]
+        degree = poly.bit_length() - 1
+        column = [m[k] << (SOBOL_BITS - 1 - k) for k in range(min(degree, levels))]
+        for k in range(degree, levels):
+            value = column[k - degree] ^ (column[k - degree] >> degree)
+            for i in range(1, degree):
+                if poly >> (degree - i) & 1:
+                    value ^= column[k - i]
+            column.append(value)
+        v[j] = column
+    v.flags.writeable = False
+    return v
+
+
+def _scramble(directions: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    线性矩阵加扰（LMS）：每一维的方向数左乘一个随机的单位下三角 0/1 矩阵（按位从高到低），
+    保持 (t, s)-序列的分层性质，同时打乱各维之间的规则结构。
+    """
+    dimension = len(directions)
+    bits = np.arange(SOBOL_BITS, dtype=np.uint64)
+    diagonal = np.uint64(1) << (np.uint64(SOBOL_BITS - 1) - bits)
+    # 第 r 行只允许对角线以上（更高位）的随机位
+    above = ~(diagonal | (diagonal - np.uint64(1))) & np.uint64((1 << SOBOL_BITS) - 1)
+    rows = rng.integers(0, 1 << SOBOL_BITS, size=(dimension, SOBOL_BITS), dtype=np.uint64) & above | diagonal
+    scrambled = np.zeros_like(directions)
+    for r in range(SOBOL_BITS):
+        parity = np.bitwise_count(rows[:, r, None] & directions) & np.uint8(1)
+        scrambled |= parity.astype(np.uint64) * diagonal[r]
+    return scrambled
+
+
+def sobol_points(n: int, dimension: int, rng: np.random.Generator = None, scramble: bool = True) -> np.ndarray:
+    """
+    生成 Sobol 序列的前 n 个点（形状 n × dimension，取值在 (0, 1)）。
+    scramble=True 时做线性矩阵加扰和随机数字移位，得到无偏的随机化准蒙特卡罗样本；
+    n 取 2 的幂时各维的分层最均匀。
+    """
+    if not 1 <= dimension <= SOBOL_MAX_DIMENSION:
+        raise ValueError(f"Sobol sampling supports 1 to {SOBOL_MAX_DIMENSION} dimensions.")
+    if n < 1:
+        raise ValueError("At least one point is required.")
+    levels = max(1, (n - 1).bit_length())
+    directions = _direction_numbers(dimension, levels)
+    shift = np.zeros(dimension, dtype=np.uint64)
+    if scramble:
+        rng = rng or np.random.default_rng()
+        directions = _scramble(directions, rng)
+        shift = rng.integers(0, 1 << SOBOL_BITS, size=dimension, dtype=np.uint64)
+
+    # 第 i 个点是 Gray 码 i ^ (i >> 1) 中为 1 的各位对应方向数的异或
+    index = np.arange(n, dtype=np.uint64)
+    gray = index ^ (index >> np.uint64(1))
+    points = np.broadcast_to(shift, (n, dimension)).copy()
+    for k in range(levels):
+        selected = (gray >> np.uint64(k)) & np.uint64(1) == 1
+        points[selected] ^= directions[:, k]
+    # 取格子中点，避免 0 落到分布的逆变换上
+    return (points.astype(float) + 0.5) * 2.0 ** -SOBOL_BITS
+
+
+def latin_hypercube(n: int, dimension: int, rng: np.random.Generator = None) -> np.ndarray:
+    """
+    拉丁超立方样本：每一维把 (0, 1) 等分为 n 段，每段恰好一个点，各维的段顺序独立随机排列。
+    """
+    rng = rng or np.random.default_rng()
+    strata = rng.permuted(np.broadcast_to(np.arange(n), (dimension, n)), axis=1).T
+    return (strata + rng.random((n, dimension))) / n
+
+
+# Acklam 的标准正态分位数有理逼近，相对误差约 1.15e-9
+_NORMAL_A = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+             1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+_NORMAL_B = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+             6.680131188771972e+01, -1.328068155288572e+01, 1.0)
+_NORMAL_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+             -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+_NORMAL_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+             3.754408661907416e+00, 1.0)
+_NORMAL_TAIL = 0.02425
+
+
+def normal_quantile(u: np.ndarray) -> np.ndarray:
+    """
+    标准正态分布的逆 CDF（向量化），u 应在 (0, 1) 内。
+    """
+    u = np.asarray(u, dtype=float)
+    result = np.empty_like(u)
+    central = (u >= _NORMAL_TAIL) & (u <= 1 - _NORMAL_TAIL)
+    q = u[central] - 0.5
+    r = q * q
+    result[central] = q * np.polyval(_NORMAL_A, r) / np.polyval(_NORMAL_B, r)
+    # 两侧尾部对称：下尾直接代入，上尾对 1 - u 求值后取负
+    lower = u < _NORMAL_TAIL
+    upper = u > 1 - _NORMAL_TAIL
+    for mask, p, sign in ((lower, u[lower], 1.0), (upper, 1 - u[upper], -1.0)):
+        q = np.sqrt(-2 * np.log(p))
+        result[mask] = sign * np.polyval(_NORMAL_C, q) / np.polyval(_NORMAL_D, q)
+    return result
@@ -0,0 +1,88 @@
+import threading
+import uuid
+from typing import Dict, Iterable, List, Tuple
+
+from services.bounded_store import BoundedStore, store_limits
+from services.estimation_calculator import LinearModel
+
+
+class StoredRegression:
+    """
+    一个已拟合的回归模型：保存 QR 充分统计量，追加观测时递推更新，每次更新版本号加一。
+    """
+
+    def __init__(self, feature_names: List[str], target: str = "y"):
+        self.id = uuid.uuid4().hex
+        self.target = target
+        self.model = LinearModel(feature_names)
+        self.version = 0
+
+    def describe(self) -> Dict:
+        return {
+            "model_id": self.id,
+            "version": self.version,
+            "target": self.target,
+            "features": self.model.feature_names,
+            **self.model.summary()
+        }
+
+
+def fit_regression(feature_names: List[str], batches: Iterable[Tuple], target: str = "y") -> StoredRegression:
+    """
+    用若干批 (x, y) 观测拟合模型（不保存）；数据不足以拟合时抛出 ValueError。
+    """
+    stored = StoredRegression(feature_names, target)
+    for x, y in batches:
+        stored.model.update(x, y)
+    stored.version = 1
+    stored.model.summary()
+    return stored
+
+
+class RegressionModelStore:
+    """
+    按 model_id 保存回归模型。每个模型只保存 R 因子，大小与累计样本数无关，追加观测时不必重新提交历史数据。
+    追加时替换整个 LinearModel 对象而不原地修改，正在预测或查询的请求读到的始终是完整的一版模型。
+    """
+
+    def __init__(self, store_size: int = 256, ttl: float = 3600.0):
+        self._models = BoundedStore(store_size, ttl)
+        self._lock = threading.Lock()
+
+    def create(self, feature_names: List[str], batches: Iterable[Tuple], target: str = "y") -> StoredRegression:
+        """
+        用若干批 (x, y) 观测新建模型；数据不足以拟合时抛出 ValueError，模型不会被保存。
+        """
+        stored = fit_regression(feature_names, batches, target)
+        self._models.put(stored.id, stored)
+        return stored
+
+    def append(self, model_id: str, batches: Iterable[Tuple]) -> StoredRegression:
+        """
+        向已有模型追加观测（递推最小二乘），无需重新提交历史数据；任一批无效时整次追加不生效。
+        新观测先在锁外并入临时模型（上传文件的解析不阻塞其他追加），锁内只合并一次 R 因子。
+        """
+        stored = self.get(model_id)
+        staged = LinearModel(stored.model.feature_names)
+        for x, y in batches:
+            staged.update(x, y)
+        with self._lock:
+            model = LinearModel(stored.model.feature_names)
+            model.n, model.r = stored.model.n, stored.model.r
+            model.merge(staged)
+            stored.model = model
+            stored.version += 1
+            return stored
+
+    def get(self, model_id: str) -> StoredRegression:
+        stored = self._models.get(model_id)
+        if stored is None:
+            raise KeyError(f"Regression model '{model_id}' not found.")
+        return stored
+
+    def delete(self, model_id: str) -> None:
+        if self._models.pop(model_id) is None:
+            raise KeyError(f"Regression model '{model_id}' not found.")
+
+
+regression_store = RegressionModelStore(**store_limits())
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+from pydantic import BaseModel
+
+from services.result_store import ResultStore, result_store
+
+# 缓存容量与过期时间（秒），可通过环境变量配置
+CACHE_SIZE_ENV = "ECON_CACHE_SIZE"
+CACHE_TTL_ENV = "ECON_CACHE_TTL"
+
+
+def _canonical(payload: Any) -> Any:
+    if isinstance(payload, BaseModel):
+        return payload.model_dump(mode="json")
+    if isinstance(payload, (list, tuple)):
+        return [_canonical(p) for p in payload]
+    if isinstance(payload, dict):
+        return {k: _canonical(v) for k, v in payload.items()}
+    return payload
+
+
+def request_key(namespace: str, payload: Any) -> str:
+    """
+    对校验后的请求模型做规范化 JSON 序列化（键排序）后取 SHA-256，作为缓存键。
+    """
+    body = json.dumps(_canonical(payload), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return namespace + ":" + hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    纯函数计算结果的内容寻址缓存：LRU + TTL 淘汰，并对同一键的并发请求做 single-flight 合并，
+    只有第一个请求真正计算，其余等待其结果。计算抛出的异常不会被缓存。
+    配置了 store 时，新算出的结果异步写入 store；store 开启查找时，内存未命中会先查 TTL 内的同版本历史结果。
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300.0, store: Optional[ResultStore] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.store = store
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+        self.bypassed = 0
+
+    def get_or_compute(self, namespace: str, payload: Any, compute: Callable[[], Any], enabled: bool = True) -> Any:
+        if not enabled:
+            with self._lock:
+                self.bypassed += 1
+            return compute()
+
+        key = request_key(namespace, payload)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.evictions += 1
+
+            pending = self._inflight.get(key)
+            if pending is None:
+                pending = self._inflight[key] = Future()
+                owner = True
+                self.misses += 1
+            else:
+                owner = False
+                self.coalesced += 1
+
+        if not owner:
+            return pending.result()
+
+        try:
+            found, value = self.store.lookup(key, self.ttl) if self.store is not None else (False, None)
+            if not found:
+                start = time.perf_counter()
+                value = compute()
+                if self.store is not None:
+                    self.store.record(key, _canonical(payload), value, (time.perf_counter() - start) * 1000)
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            pending.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._inflight[key]
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        pending.set_result(value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "coalesced": self.coalesced,
+                "bypassed": self.bypassed
+            }
+
+
+result_cache = ResultCache(
+    max_size=int(os.environ.get(CACHE_SIZE_ENV, "1024")),
+    ttl=float(os.environ.get(CACHE_TTL_ENV, "300")),
+    store=result_store
+)
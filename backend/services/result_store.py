@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.lazy_module import is_loaded, lazy_import
+
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+# 是否把确定性计算结果写入数据库（默认关闭，需显式开启并配置 ECON_DATABASE_URL）；批量写入的批大小、最长等待时间（秒）与队列上限
+PERSIST_RESULTS_ENV = "ECON_PERSIST_RESULTS"
+PERSIST_BATCH_SIZE_ENV = "ECON_PERSIST_BATCH_SIZE"
+PERSIST_FLUSH_INTERVAL_ENV = "ECON_PERSIST_FLUSH_INTERVAL"
+PERSIST_QUEUE_SIZE_ENV = "ECON_PERSIST_QUEUE_SIZE"
+# 内存缓存未命中时是否查数据库中的历史结果（默认关闭，请求路径上不做同步查询）；结果对应的代码版本
+RESULT_LOOKUP_ENV = "ECON_RESULT_LOOKUP"
+CODE_VERSION_ENV = "ECON_CODE_VERSION"
+
+_STOP = object()
+
+
+def _to_json(value: Any) -> Any:
+    # 结果中可能含 NumPy 标量 / 数组，统一转成 JSON 兼容的 Python 对象
+    return json.loads(json.dumps(value, default=lambda o: o.tolist() if isinstance(o, (np.ndarray, np.generic)) else str(o)))
+
+
+@lru_cache(maxsize=None)
+def code_version() -> str:
+    """
+    保存结果时记录的代码版本：优先取 ECON_CODE_VERSION（如部署的提交号），否则为 services 目录源码的哈希。
+    查找只匹配当前版本，部署新代码后不会再返回旧代码算出的结果。
+    """
+    version = os.environ.get(CODE_VERSION_ENV, "").strip()
+    if version:
+        return version[:64]
+    digest = hashlib.sha256()
+    services_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in sorted(os.listdir(services_dir)):
+        if name.endswith(".py"):
+            digest.update(name.encode("utf-8"))
+            with open(os.path.join(services_dir, name), "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class ResultStore:
+    """
+    计算结果的持久化：按 (namespace, request_hash) 查找已保存的结果；
+    新结果先进入内存队列，由后台线程按批次合并为少量 bulk INSERT，请求路径上不等待数据库写入。
+    队列满时丢弃记录（只影响历史，不影响响应），数据库异常只记日志。
+    写入与查找都需显式开启（enabled / lookup_enabled），查找只返回当前代码版本、未超过 max_age 的结果。
+    """
+
+    def __init__(self, enabled: bool = False, batch_size: int = 500, flush_interval: float = 0.5,
+                 max_queued: int = 10000, lookup_enabled: bool = False):
+        self.enabled = enabled
+        self.lookup_enabled = lookup_enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queued)
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.lookups = 0
+        self.found = 0
+        self.errors = 0
+
+    @staticmethod
+    def _split(key: str) -> Tuple[str, str]:
+        namespace, _, request_hash = key.rpartition(":")
+        return namespace, request_hash
+
+    def lookup(self, key: str, max_age: Optional[float] = None) -> Tuple[bool, Any]:
+        """
+        返回 (是否找到, 结果)；未开启查找或数据库不可用时视为未找到。
+        max_age（秒）不为空时只接受该时间内写入的结果，与内存缓存的 TTL 保持一致。
+        """
+        if not (self.enabled and self.lookup_enabled):
+            return False, None
+        # SQLAlchemy 与 ORM 模型在第一次查库时才导入，不计入服务冷启动时间
+        from sqlalchemy import select
+        from sqlalchemy.exc import SQLAlchemyError
+        from db import ComputedResult, session_scope
+
+        namespace, request_hash = self._split(key)
+        try:
+            with session_scope() as session:
+                query = (
+                    select(ComputedResult.result)
+                    .where(ComputedResult.namespace == namespace, ComputedResult.request_hash == request_hash,
+                           ComputedResult.code_version == code_version())
+                    .order_by(ComputedResult.id.desc())
+                    .limit(1)
+                )
+                if max_age is not None:
+                    query = query.where(ComputedResult.created_at >= datetime.now(timezone.utc) - timedelta(seconds=max_age))
+                row = session.execute(query).first()
+        except SQLAlchemyError:
+            logger.exception("Result lookup failed")
+            with self._lock:
+                self.errors += 1
+            return False, None
+        with self._lock:
+            self.lookups += 1
+            self.found += row is not None
+        return (True, row[0]) if row is not None else (False, None)
+
+    def record(self, key: str, payload: Any, result: Any, compute_ms: float) -> None:
+        """
+        登记一条新结果，立即返回；实际写入由后台线程批量完成。
+        """
+        if not self.enabled:
+            return
+        self._ensure_writer()
+        namespace, request_hash = self._split(key)
+        try:
+            self._queue.put_nowait((namespace, request_hash, payload, result, compute_ms))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def _ensure_writer(self) -> None:
+        if self._writer is not None:
+            return
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._writer_loop, name="result-store-writer", daemon=True)
+                self._writer.start()
+
+    def _writer_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._write(batch)
+            if stop:
+                return
+
+    @staticmethod
+    def _scenario_ids(session, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], int]:
+        from sqlalchemy import select, tuple_
+        from db import Scenario
+
+        if not keys:
+            return {}
+        rows = session.execute(
+            select(Scenario.namespace, Scenario.request_hash, Scenario.id)
+            .where(tuple_(Scenario.namespace, Scenario.request_hash).in_(keys))
+        ).all()
+        return {(ns, h): scenario_id for ns, h, scenario_id in rows}
+
+    @staticmethod
+    def _insert_ignoring_conflicts(session, model, rows: List[Dict], conflict_columns: List[str]) -> None:
+        """
+        插入行，已存在（唯一约束冲突）的行跳过：另一个 worker 可能刚写入同一场景。
+        SQLite / PostgreSQL 用 ON CONFLICT DO NOTHING，其他数据库逐行在 SAVEPOINT 内插入。
+        """
+        from sqlalchemy import insert
+        from sqlalchemy.exc import IntegrityError
+
+        dialect = session.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            session.execute(dialect_insert(model).on_conflict_do_nothing(index_elements=conflict_columns), rows)
+            return
+        for row in rows:
+            try:
+                with session.begin_nested():
+                    session.execute(insert(model), [row])
+            except IntegrityError:
+                pass
+
+    def _write(self, batch: List[tuple]) -> None:
+        # 同一批内相同请求只保留一份输入，结果逐条保存
+        from sqlalchemy import insert
+        from sqlalchemy.exc import SQLAlchemyError
+        from db import ComputedResult, Scenario, ScenarioInput, session_scope
+
+        try:
+            with session_scope() as session:
+                keys = list(dict.fromkeys((ns, h) for ns, h, _, _, _ in batch))
+                existing = self._scenario_ids(session, keys)
+
+                payloads = {(ns, h): payload for ns, h, payload, _, _ in batch}
+                new_keys = [k for k in keys if k not in existing]
+                if new_keys:
+                    self._insert_ignoring_conflicts(
+                        session, Scenario, [{"namespace": ns, "request_hash": h} for ns, h in new_keys],
+                        ["namespace", "request_hash"]
+                    )
+                    created = self._scenario_ids(session, new_keys)
+                    self._insert_ignoring_conflicts(
+                        session, ScenarioInput,
+                        [{"scenario_id": created[k], "payload": _to_json(payloads[k])} for k in new_keys],
+                        ["scenario_id"]
+                    )
+                    existing.update(created)
+
+                session.execute(insert(ComputedResult), [
+                    {"scenario_id": existing[(ns, h)], "namespace": ns, "request_hash": h,
+                     "code_version": code_version(), "result": _to_json(result), "compute_ms": compute_ms}
+                    for ns, h, _, result, compute_ms in batch
+                ])
+            with self._lock:
+                self.written += len(batch)
+        except SQLAlchemyError:
+            logger.exception("Writing %d results failed", len(batch))
+            with self._lock:
+                self.errors += 1
+                self.dropped += len(batch)
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """
+        停止后台线程并写完队列中剩余的记录（服务关闭时调用）。
+        """
+        writer = self._writer
+        if writer is None:
+            return
+        self._queue.put(_STOP)
+        writer.join(timeout)
+        with self._lock:
+            self._writer = None
+
+    def clear(self) -> int:
+        """
+        删除已保存的计算结果（先写完队列中的记录），返回删除的行数；场景与输入作为历史保留。
+        """
+        if not self.enabled:
+            return 0
+        from sqlalchemy import delete
+        from db import ComputedResult, session_scope
+
+        self.flush()
+        with session_scope() as session:
+            return session.execute(delete(ComputedResult)).rowcount
+
+    def close(self) -> None:
+        """
+        服务关闭时调用：写完剩余记录并释放连接池；从未访问过数据库时不导入 db。
+        """
+        self.flush()
+        if is_loaded("db"):
+            from db import dispose_engine
+            dispose_engine()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "lookup_enabled": self.lookup_enabled,
+                "queued": self._queue.qsize(),
+                "written": self.written,
+                "dropped": self.dropped,
+                "lookups": self.lookups,
+                "found": self.found,
+                "errors": self.errors
+            }
+
+
+result_store = ResultStore(
+    enabled=os.environ.get(PERSIST_RESULTS_ENV, "0").strip().lower() in ("1", "true", "yes", "on"),
+    batch_size=int(os.environ.get(PERSIST_BATCH_SIZE_ENV, "500")),
+    flush_interval=float(os.environ.get(PERSIST_FLUSH_INTERVAL_ENV, "0.5")),
+    max_queued=int(os.environ.get(PERSIST_QUEUE_SIZE_ENV, "10000")),
+    lookup_enabled=os.environ.get(RESULT_LOOKUP_ENV, "0").strip().lower() in ("1", "true", "yes", "on")
+)
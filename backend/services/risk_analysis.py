@@ -1,7 +1,16 @@
-import numpy as np
-from typing import List, Dict
+from __future__ import annotations
+
+import re
+from typing import List, Dict, Iterable, Optional
 from models.risk_model import SensitivityParam
+from services.streaming_stats import RunningMoments, StreamingHistogram
+from services.process_pool import get_process_pool
+from services.metrics import timed
+from services.quasi_random import SOBOL_MAX_DIMENSION, latin_hypercube, normal_quantile, sobol_points
 from pydantic import BaseModel
+from services.lazy_module import lazy_import
+
+np = lazy_import("numpy")
 
 class SensitivityParam(BaseModel):
     name: str
@@ -23,51 +32,292 @@ def calculate_npv_with_context(context: Dict) -> float:
     discount_rate = context.get("discount_rate", 0.1)
     return round(sum(cf / ((1 + discount_rate) ** t) for t, cf in enumerate(cash_flows)), 2)
 
-def sample_param(param: SensitivityParam, n: int = 200) -> List[float]:
+# 形如 cash_flows[3] 的参数替换第 3 期（从 0 开始）现金流
+_CASH_FLOW_PARAM = re.compile(r"cash_flows\[(\d+)\]")
+
+
+class NPVPlan:
+    """
+    从 base_context 预编译的 NPV 计算计划：现金流只解析一次，
+    对某个参数的全部样本用 Horner 递推一次性广播求 NPV，不再逐样本复制 context。
+    """
+
+    def __init__(self, base_context: Dict):
+        self.cash_flows = np.asarray(base_context.get("cash_flows", []), dtype=float)
+        self.discount_rate = float(base_context.get("discount_rate", 0.1))
+        self.base_npv = self._npv(np.asarray([self.discount_rate]))[0]
+
+    def _npv(self, rates: np.ndarray) -> np.ndarray:
+        # Σ cf_t · v^t，v = 1 / (1 + r)，按 Horner 从最后一期往前累乘
+        v = 1.0 / (1.0 + rates)
+        npv = np.zeros_like(v)
+        for cf in self.cash_flows[::-1]:
+            npv = npv * v + cf
+        return npv
+
+    def cash_flow_period(self, name: str) -> Optional[int]:
+        match = _CASH_FLOW_PARAM.fullmatch(name)
+        if match is None:
+            return None
+        period = int(match.group(1))
+        if period >= len(self.cash_flows):
+            raise ValueError(f"Parameter '{name}' refers to a period beyond the {len(self.cash_flows)} cash flows.")
+        return period
+
+    def affects_npv(self, name: str) -> bool:
+        return name == "discount_rate" or self.cash_flow_period(name) is not None
+
+    def evaluate(self, name: str, values: np.ndarray) -> np.ndarray:
+        """
+        返回把参数 name 替换为各样本值后的 NPV 数组（保留两位小数，与单次计算一致）。
+        NPV 只依赖 discount_rate 和 cash_flows[t]，其他参数不影响结果。
+        """
+        if self.affects_npv(name):
+            return np.round(self.evaluate_rows([name], np.asarray(values, dtype=float)[:, None]), 2)
+        return np.full(len(values), round(self.base_npv, 2))
+
+    def evaluate_rows(self, names: List[str], values: np.ndarray) -> np.ndarray:
+        """
+        values 的每一行是一组参数取值（列与 names 对应），同时替换多个参数，返回每行的 NPV（不取整）。
+        """
+        rates = np.full(len(values), self.discount_rate)
+        flows = {}
+        for column, name in enumerate(names):
+            if name == "discount_rate":
+                rates = values[:, column]
+            elif (period := self.cash_flow_period(name)) is not None:
+                flows[period] = values[:, column]
+        v = 1.0 / (1.0 + rates)
+        npv = np.zeros(len(values))
+        for t in range(len(self.cash_flows) - 1, -1, -1):
+            npv = npv * v + flows.get(t, self.cash_flows[t])
+        return npv
+
+
+def sample_param(param: SensitivityParam, n: int = 200, rng: np.random.Generator = None) -> np.ndarray:
+    rng = rng or np.random.default_rng()
     if param.max == param.min:
-        return [param.min] * n
+        return np.full(n, param.min, dtype=float)
     if param.distribution == "uniform":
-        return np.random.uniform(param.min, param.max, n).tolist()
+        return rng.uniform(param.min, param.max, n)
     elif param.distribution == "triangular":
         mid = (param.min + param.max) / 2
-        return np.random.triangular(param.min, mid, param.max, n).tolist()
+        return rng.triangular(param.min, mid, param.max, n)
     elif param.distribution == "normal":
         mean = (param.min + param.max) / 2
         std = (param.max - param.min) / 4
-        return np.clip(np.random.normal(mean, std, n), param.min, param.max).tolist()
+        return np.clip(rng.normal(mean, std, n), param.min, param.max)
     else:
-        return [param.min, param.max]
+        return np.array([param.min, param.max], dtype=float)
+
+def analyze_param(plan: NPVPlan, param: SensitivityParam, samples: int, seed_seq: np.random.SeedSequence) -> Dict:
+    values = sample_param(param, samples, np.random.default_rng(seed_seq))
+    impacts = plan.evaluate(param.name, values)
+
+    return {
+        "param": param.name,
+        "min_npv": round(float(impacts.min()), 2),
+        "max_npv": round(float(impacts.max()), 2),
+        "mean_npv": round(float(impacts.mean()), 2),
+        "std_npv": round(float(impacts.std()), 2)
+    }
 
+def sensitivity_steps(
+    base_context: Dict,
+    params: List[SensitivityParam],
+    samples: int = 200,
+    seed: Optional[int] = None
+) -> List[tuple]:
+    """
+    把敏感性分析拆成逐参数的独立步骤，每步为 analyze_param 的参数元组。
+    """
+    plan = NPVPlan(base_context)
+    streams = np.random.SeedSequence(seed).spawn(len(params))
+    return [(plan, param, samples, stream) for param, stream in zip(params, streams)]
+
+@timed
 def perform_sensitivity_analysis(
     base_context: Dict,
     params: List[SensitivityParam],
-    samples: int = 200
+    samples: int = 200,
+    seed: Optional[int] = None,
+    parallel: bool = False
 ) -> List[Dict]:
     """
     对 base_context 中每个 param 进行敏感性采样并计算 NPV 分布。
+    每个参数使用 SeedSequence 派生的独立随机流，parallel=True 时分发到共享进程池，结果与串行一致。
+    """
+    steps = sensitivity_steps(base_context, params, samples, seed)
+    runner = get_process_pool().map if parallel and len(steps) > 1 else map
+    return list(runner(analyze_param, *zip(*steps))) if steps else []
+
+
+# 全局敏感性：模型按块求值的行数，以及 bootstrap 每块 (参数数 × 重抽次数 × 样本数) 的元素上限
+GLOBAL_BATCH_ROWS = 1 << 16
+BOOTSTRAP_BLOCK_ELEMENTS = 1 << 22
+# 单次分析允许的模型求值总次数 N · (d + 2)
+GLOBAL_MAX_EVALUATIONS = 5_000_000
+SAMPLERS = ("sobol", "lhs")
+GLOBAL_DISTRIBUTIONS = ("uniform", "triangular", "normal")
+
+
+def param_quantile(param: SensitivityParam, u: np.ndarray) -> np.ndarray:
+    """
+    把 (0, 1) 上的均匀样本经逆 CDF 映射到参数分布，分布定义与 sample_param 一致。
+    """
+    low, high = param.min, param.max
+    if param.distribution == "uniform":
+        return low + (high - low) * u
+    elif param.distribution == "triangular":
+        # 众数取区间中点的对称三角分布
+        return np.where(u < 0.5, low + (high - low) * np.sqrt(u / 2), high - (high - low) * np.sqrt((1 - u) / 2))
+    elif param.distribution == "normal":
+        mean, std = (low + high) / 2, (high - low) / 4
+        return np.clip(mean + std * normal_quantile(u), low, high)
+    raise ValueError(f"Unsupported distribution type '{param.distribution}' for parameter '{param.name}'.")
+
+
+def _rounded_bound(value: float) -> Optional[float]:
+    # 未计算的置信区间端点为 NaN，输出为 null
+    return None if np.isnan(value) else round(float(value), 4)
+
+
+def _sobol_estimates(f_a: np.ndarray, f_b: np.ndarray, f_ab: np.ndarray):
+    """
+    Saltelli (2010) 一阶指数与 Jansen 总效应指数。f_a、f_b 形状为 (..., N)，f_ab 为 (d, ..., N)；
+    返回 (一阶, 总效应)，形状均为 (d, ...)。输出方差为 0 时指数记为 0。
     """
-    results = []
+    variance = np.var(np.concatenate([f_a, f_b], axis=-1), axis=-1)
+    first = np.mean(f_b * (f_ab - f_a), axis=-1)
+    total = 0.5 * np.mean((f_a - f_ab) ** 2, axis=-1)
+    scale = np.divide(1.0, variance, out=np.zeros_like(variance), where=variance > 0)
+    return first * scale, total * scale
+
 
+def _bootstrap_intervals(f_a: np.ndarray, f_b: np.ndarray, f_ab: np.ndarray, resamples: int, confidence: float,
+                         rng: np.random.Generator):
+    """
+    对样本行做有放回重抽，重新估计指数，取百分位区间。按块处理以限制内存。
+    """
+    n, d = len(f_a), len(f_ab)
+    block = max(1, BOOTSTRAP_BLOCK_ELEMENTS // (n * (d + 2)))
+    first, total = [], []
+    for start in range(0, resamples, block):
+        rows = rng.integers(0, n, size=(min(block, resamples - start), n))
+        s, st = _sobol_estimates(f_a[rows], f_b[rows], f_ab[:, rows])
+        first.append(s)
+        total.append(st)
+    tail = (1 - confidence) / 2 * 100
+    first, total = np.concatenate(first, axis=1), np.concatenate(total, axis=1)
+    return (np.percentile(first, [tail, 100 - tail], axis=1),
+            np.percentile(total, [tail, 100 - tail], axis=1))
+
+
+def global_sensitivity_samples(base_context: Dict, params: List[SensitivityParam], samples: int,
+                               sampler: str = "sobol") -> int:
+    """
+    校验全局敏感性分析的输入（不做计算），返回实际使用的基础样本数 N。
+    """
+    if sampler not in SAMPLERS:
+        raise ValueError(f"Unsupported sampler '{sampler}', expected one of: {', '.join(SAMPLERS)}.")
+    names = [p.name for p in params]
+    if not names:
+        raise ValueError("At least one parameter is required.")
+    if len(set(names)) != len(names):
+        raise ValueError("Parameter names must be unique.")
+    if 2 * len(params) > SOBOL_MAX_DIMENSION:
+        raise ValueError(f"Global sensitivity supports at most {SOBOL_MAX_DIMENSION // 2} parameters.")
     for param in params:
-        values = sample_param(param, samples)
-        impacts = []
+        if param.distribution not in GLOBAL_DISTRIBUTIONS:
+            raise ValueError(f"Unsupported distribution type '{param.distribution}' for parameter '{param.name}'.")
+    if samples < 2:
+        raise ValueError("Global sensitivity needs at least 2 base samples.")
+
+    d = len(params)
+    n = 1 << (samples - 1).bit_length() if sampler == "sobol" else samples
+    if n * (d + 2) > GLOBAL_MAX_EVALUATIONS:
+        raise ValueError(f"Too many model evaluations: {n} x ({d} + 2) exceeds {GLOBAL_MAX_EVALUATIONS}.")
+    plan = NPVPlan(base_context)
+    for name in names:
+        plan.cash_flow_period(name)  # 校验 cash_flows[t] 的期数
+    return n
+
+
+@timed
+def perform_global_sensitivity_analysis(
+    base_context: Dict,
+    params: List[SensitivityParam],
+    samples: int = 1024,
+    seed: Optional[int] = None,
+    sampler: str = "sobol",
+    bootstrap: int = 100,
+    confidence: float = 0.95
+) -> Dict:
+    """
+    基于方差的全局敏感性分析（Sobol 指数），所有参数同时变化，可反映参数间的交互作用。
+    Saltelli 方案：由 2d 维样本得到矩阵 A、B，以及把 A 的第 i 列换成 B 的第 i 列的 AB_i，
+    共 N · (d + 2) 次 NPV 求值；sampler='sobol' 时 N 向上取到 2 的幂。
+    """
+    n = global_sensitivity_samples(base_context, params, samples, sampler)
+    names = [p.name for p in params]
+    d = len(params)
+    plan = NPVPlan(base_context)
+    sample_stream, bootstrap_stream = np.random.SeedSequence(seed).spawn(2)
+    rng = np.random.default_rng(sample_stream)
+    unit = sobol_points(n, 2 * d, rng) if sampler == "sobol" else latin_hypercube(n, 2 * d, rng)
+    values = np.empty_like(unit)
+    for column, param in enumerate(list(params) * 2):
+        values[:, column] = param_quantile(param, unit[:, column])
+    a, b = values[:, :d], values[:, d:]
+
+    def evaluate(rows: np.ndarray) -> np.ndarray:
+        return np.concatenate([plan.evaluate_rows(names, rows[i:i + GLOBAL_BATCH_ROWS])
+                               for i in range(0, n, GLOBAL_BATCH_ROWS)])
 
-        for v in values:
-            context = base_context.copy()
-            context[param.name] = v
-            npv = calculate_npv_with_context(context)
-            impacts.append(npv)
+    f_a, f_b = evaluate(a), evaluate(b)
+    f_ab = np.empty((d, n))
+    for i in range(d):
+        if not plan.affects_npv(names[i]):
+            f_ab[i] = f_a  # 不进入 NPV 的参数：AB_i 与 A 的输出相同，省去求值
+            continue
+        ab = a.copy()
+        ab[:, i] = b[:, i]
+        f_ab[i] = evaluate(ab)
 
-        results.append({
-            "param": param.name,
-            "min_npv": round(min(impacts), 2),
-            "max_npv": round(max(impacts), 2),
-            "mean_npv": round(np.mean(impacts), 2),
-            "std_npv": round(np.std(impacts), 2)
-        })
+    first, total = _sobol_estimates(f_a, f_b, f_ab)
+    if bootstrap > 0:
+        first_ci, total_ci = _bootstrap_intervals(f_a, f_b, f_ab, bootstrap, confidence,
+                                                  np.random.default_rng(bootstrap_stream))
+    else:
+        first_ci = total_ci = np.full((2, d), np.nan)
 
-    return results
+    outputs = np.concatenate([f_a, f_b])
+    return {
+        "method": "sobol",
+        "sampler": sampler,
+        "base_samples": n,
+        "evaluations": n * (d + 2),
+        "bootstrap": bootstrap,
+        "confidence": confidence,
+        "mean_npv": round(float(outputs.mean()), 2),
+        "std_npv": round(float(outputs.std()), 2),
+        # 1 - Σ 一阶指数 近似为交互作用贡献的方差比例
+        "first_order_sum": round(float(first.sum()), 4),
+        "indices": [
+            {
+                "param": name,
+                "first_order": round(float(first[i]), 4),
+                "first_order_low": _rounded_bound(first_ci[0, i]),
+                "first_order_high": _rounded_bound(first_ci[1, i]),
+                "total_order": round(float(total[i]), 4),
+                "total_order_low": _rounded_bound(total_ci[0, i]),
+                "total_order_high": _rounded_bound(total_ci[1, i])
+            }
+            for i, name in enumerate(names)
+        ]
+    }
 
+@timed
 def perform_decision_tree(paths: List[DecisionPath]) -> float:
     """
     对路径进行期望值计算：E = Σ(P_i * V_i)
@@ -76,33 +326,141 @@ def perform_decision_tree(paths: List[DecisionPath]) -> float:
     return round(expected_value, 2)
 
 
-def perform_monte_carlo_simulation(base: float, std_dev: float, distribution: str, iterations: int) -> Dict:
+# 每块样本数：峰值内存约为 CHUNK_SIZE * 8 字节，与总迭代次数无关
+MONTE_CARLO_CHUNK_SIZE = 1 << 20
+MONTE_CARLO_PREVIEW = 200
+# 返回完整样本分布时允许的最大迭代次数（float64 约 80 MB）
+MONTE_CARLO_MAX_FULL = 10_000_000
+
+
+class MonteCarloAccumulator:
     """
-    执行 Monte Carlo 模拟，根据分布生成随机样本，计算 NPV 分布与统计信息。
+    Monte Carlo 的流式汇总：矩统计、尾部概率计数和分位数草图，逐块折叠样本。
+    high_return_threshold 为空时沿用 base * 1.2。
     """
-    np.random.seed(42)
 
+    def __init__(self, base: float, std_dev: float, distribution: str, high_return_threshold: Optional[float] = None):
+        self.base = base
+        self.high_return_threshold = base * 1.2 if high_return_threshold is None else high_return_threshold
+        self.moments = RunningMoments()
+        self.loss_count = 0
+        self.high_return_count = 0
+        # 草图区间覆盖分布的实际支撑：正态取 ±10σ，三角分布即 [base - σ, base + σ]
+        half_width = abs(std_dev) * (10 if distribution == "normal" else 1) or 1.0
+        self.histogram = StreamingHistogram(base - half_width, base + half_width)
+
+    def update(self, block: np.ndarray) -> None:
+        self.moments.update(block)
+        self.loss_count += int(np.count_nonzero(block < 0))
+        self.high_return_count += int(np.count_nonzero(block > self.high_return_threshold))
+        self.histogram.update(block)
+
+    def merge(self, other: "MonteCarloAccumulator") -> None:
+        self.moments.merge(other.moments)
+        self.loss_count += other.loss_count
+        self.high_return_count += other.high_return_count
+        self.histogram.merge(other.histogram)
+
+    def _quantile(self, q: float) -> float:
+        return round(self.histogram.quantile(q, self.moments.min, self.moments.max), 2)
+
+    def summary(self) -> Dict:
+        m = self.moments
+        p5 = self._quantile(0.05)
+        return {
+            "mean": round(m.mean, 2),
+            "std_dev": round(float(np.sqrt(m.variance)), 2),
+            "min": round(m.min, 2),
+            "max": round(m.max, 2),
+            "loss_probability": round(self.loss_count / m.count, 4),
+            "high_return_probability": round(self.high_return_count / m.count, 4),
+            "percentiles": {"p5": p5, "p50": self._quantile(0.5), "p95": self._quantile(0.95)},
+            # 95% 置信水平下的 NPV 风险值（5% 分位数）及其以下样本的条件均值
+            "var_95": p5,
+            "cvar_95": round(self.histogram.lower_tail_mean(0.05), 2)
+        }
+
+
+def draw_samples(rng: np.random.Generator, base: float, std_dev: float, distribution: str, size: int) -> np.ndarray:
     if distribution == 'normal':
-        samples = np.random.normal(loc=base, scale=std_dev, size=iterations)
+        return rng.normal(loc=base, scale=std_dev, size=size)
     elif distribution == 'triangular':
-        samples = np.random.triangular(left=base - std_dev, mode=base, right=base + std_dev, size=iterations)
-    else:
+        return rng.triangular(left=base - std_dev, mode=base, right=base + std_dev, size=size)
+    raise ValueError("Unsupported distribution type")
+
+
+def simulate_chunk(seed_seq: np.random.SeedSequence, base: float, std_dev: float, distribution: str, size: int,
+                   full_distribution: bool = False):
+    """
+    生成并汇总单个样本块，返回 (块统计, 前若干个样本 / full_distribution 时为整块样本)。可在子进程中执行。
+    """
+    block = draw_samples(np.random.default_rng(seed_seq), base, std_dev, distribution, size)
+    acc = MonteCarloAccumulator(base, std_dev, distribution)
+    acc.update(block)
+    return acc, block if full_distribution else block[:MONTE_CARLO_PREVIEW]
+
+
+def monte_carlo_steps(
+    base: float,
+    std_dev: float,
+    distribution: str,
+    iterations: int,
+    seed: Optional[int] = 42,
+    chunk_size: int = MONTE_CARLO_CHUNK_SIZE,
+    full_distribution: bool = False
+) -> List[tuple]:
+    """
+    把模拟拆成固定大小的样本块，每块为 simulate_chunk 的参数元组。
+    第 k 块使用 SeedSequence(seed).spawn 派生的第 k 个随机流。
+    """
+    if distribution not in ('normal', 'triangular'):
         raise ValueError("Unsupported distribution type")
+    if full_distribution and iterations > MONTE_CARLO_MAX_FULL:
+        raise ValueError(f"Full distribution output is limited to {MONTE_CARLO_MAX_FULL} iterations.")
+
+    sizes = [min(chunk_size, iterations - start) for start in range(0, iterations, chunk_size)]
+    streams = np.random.SeedSequence(seed).spawn(len(sizes))
+    return [(stream, base, std_dev, distribution, size, full_distribution) for stream, size in zip(streams, sizes)]
 
-    mean = round(float(np.mean(samples)), 2)
-    std = round(float(np.std(samples)), 2)
-    min_val = round(float(np.min(samples)), 2)
-    max_val = round(float(np.max(samples)), 2)
 
-    loss_prob = round(float(np.mean(samples < 0)), 4)
-    high_return_prob = round(float(np.mean(samples > base * 1.2)), 4)
+def combine_monte_carlo(base: float, std_dev: float, distribution: str, chunk_results: Iterable,
+                        full_distribution: bool = False) -> Dict:
+    """
+    按块序合并各块统计，得到最终的分布统计信息。
+    full_distribution 时 npv_distribution 为全部样本组成的 float64 数组（不做舍入），由响应层决定编码方式。
+    """
+    acc = MonteCarloAccumulator(base, std_dev, distribution)
+    samples = []
+    for chunk_acc, chunk_samples in chunk_results:
+        if full_distribution or not samples:
+            samples.append(chunk_samples)
+        acc.merge(chunk_acc)
 
+    if full_distribution:
+        distribution_data = np.concatenate(samples)
+    else:
+        distribution_data = np.round(samples[0], 2).tolist()  # 前200点用于画图
     return {
-        "npv_distribution": [round(float(x), 2) for x in samples[:200]],  # 前200点用于画图
-        "mean": mean,
-        "std_dev": std,
-        "min": min_val,
-        "max": max_val,
-        "loss_probability": loss_prob,
-        "high_return_probability": high_return_prob
+        "npv_distribution": distribution_data,
+        **acc.summary()
     }
+
+
+@timed
+def perform_monte_carlo_simulation(
+    base: float,
+    std_dev: float,
+    distribution: str,
+    iterations: int,
+    seed: Optional[int] = 42,
+    chunk_size: int = MONTE_CARLO_CHUNK_SIZE,
+    parallel: bool = False,
+    full_distribution: bool = False
+) -> Dict:
+    """
+    执行 Monte Carlo 模拟，按固定大小分块生成样本并折叠进流式统计，计算 NPV 分布与统计信息。
+    各块统计按块序合并，因此 parallel=True 时无论进程池大小，同一 seed 的结果都与串行逐位一致。
+    """
+    steps = monte_carlo_steps(base, std_dev, distribution, iterations, seed, chunk_size, full_distribution)
+    runner = get_process_pool().map if parallel and len(steps) > 1 else map
+    return combine_monte_carlo(base, std_dev, distribution, runner(simulate_chunk, *zip(*steps)), full_distribution)
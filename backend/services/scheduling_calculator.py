@@ -1,39 +1,63 @@
-from typing import List
+from __future__ import annotations
 
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+from services.segment_tree import FreeGapTree, MinMaxTree
+from services.metrics import timed
+from services.lazy_module import lazy_import
+
+np = lazy_import("numpy")
 
-def improved_greedy_schedule(tasks: List[dict]) -> List[dict]:
-    """
-    支持 earliest_start, deadline, priority 排序调度。
-    优先调度高优先级任务，避免早期时间段被低优先级任务占据。
-    """
-    # 时间轴记录被占用的时间段（简化为线性时间表）
-    timeline = []
-    schedule = []
 
+def _greedy_order(tasks: List[dict]) -> List[int]:
     # 按 priority 降序，deadline 升序排列（越早越紧急）
-    tasks_sorted = sorted(tasks, key=lambda t: (-t.get('priority', 1), t['deadline']))
+    return sorted(range(len(tasks)), key=lambda i: (-tasks[i].get('priority', 1), tasks[i]['deadline']))
+
+
+def _place_in_order(tasks: List[dict], order: List[int], origin: int, horizon: int,
+                    stop_at: Optional[float] = None) -> Optional[List[Optional[int]]]:
+    """
+    按给定顺序逐个把任务放到最早可行的时间段，返回各任务的开始时间（放不下为 None）。
+    给出 stop_at（perf_counter 时刻）时每处理一批任务检查一次，超时返回 None。
+    """
+    # 时间轴占用索引（线段树），覆盖所有任务的 [earliest_start, deadline)
+    timeline = FreeGapTree(origin, horizon - origin)
+    starts: List[Optional[int]] = [None] * len(tasks)
 
-    for task in tasks_sorted:
+    for k, i in enumerate(order):
+        if stop_at is not None and not k & 255 and time.perf_counter() > stop_at:
+            return None
+        task = tasks[i]
         duration = task['duration']
         earliest = task.get('earliest_start', 0)
         deadline = task['deadline']
-        feasible = False
-
-        # 从 earliest 到 deadline - duration 依次尝试可用时间槽
-        for start in range(earliest, deadline - duration + 1):
-            if all(t not in timeline for t in range(start, start + duration)):
-                for t in range(start, start + duration):
-                    timeline.append(t)
-                schedule.append({
-                    'name': task['name'],
-                    'start': start,
-                    'end': start + duration,
-                    'resource_usage': duration
-                })
-                feasible = True
-                break
-
-        if not feasible:
+
+        # 在 [earliest, deadline - duration] 中找最早的连续空闲时间段
+        if duration <= 0:
+            start = earliest if earliest <= deadline - duration else None
+        else:
+            start = timeline.find_earliest(earliest, duration, deadline)
+
+        if start is not None and duration > 0:
+            timeline.occupy(start, start + duration)
+        starts[i] = start
+    return starts
+
+
+def _schedule_rows(tasks: List[dict], order: List[int], starts: List[Optional[int]]) -> List[dict]:
+    schedule = []
+    for i in order:
+        task, start = tasks[i], starts[i]
+        if start is not None:
+            schedule.append({
+                'name': task['name'],
+                'start': start,
+                'end': start + task['duration'],
+                'resource_usage': task['duration']
+            })
+        else:
             schedule.append({
                 'name': task['name'],
                 'start': None,
@@ -41,41 +65,296 @@ def improved_greedy_schedule(tasks: List[dict]) -> List[dict]:
                 'skipped': True,
                 'reason': 'No feasible slot in window'
             })
-
     return schedule
 
-def improved_resource_smoothing(tasks: List[dict], total_resources: int, total_time: int) -> List[dict]:
+
+def _timeline_bounds(tasks: List[dict]) -> Tuple[int, int]:
+    origin = min((t.get('earliest_start', 0) for t in tasks), default=0)
+    horizon = max((t['deadline'] for t in tasks), default=origin)
+    return origin, horizon
+
+
+@timed
+def improved_greedy_schedule(tasks: List[dict]) -> List[dict]:
+    """
+    支持 earliest_start, deadline, priority 排序调度。
+    优先调度高优先级任务，避免早期时间段被低优先级任务占据。
+    """
+    order = _greedy_order(tasks)
+    origin, horizon = _timeline_bounds(tasks)
+    return _schedule_rows(tasks, order, _place_in_order(tasks, order, origin, horizon))
+
+
+class _ScheduleScore:
+    """
+    调度质量：按优先级从高到低比较各优先级已排任务的总时长（字典序），再比较已排任务数。
+    因此任何改进都不会以挤掉高优先级任务为代价换取低优先级任务。
+    """
+
+    def __init__(self, tasks: List[dict], origin: int, horizon: int):
+        self.tasks = tasks
+        levels = sorted({t.get('priority', 1) for t in tasks}, reverse=True)
+        self.priorities = levels
+        rank = {p: k for k, p in enumerate(levels)}
+        self.rank = [rank[t.get('priority', 1)] for t in tasks]
+        self.levels = len(levels)
+        self.span = max(horizon - origin, 1)
+
+    def __call__(self, starts: List[Optional[int]]) -> tuple:
+        by_level = [0] * self.levels
+        count = 0
+        for i, start in enumerate(starts):
+            if start is not None:
+                by_level[self.rank[i]] += self.tasks[i]['duration']
+                count += 1
+        return (*by_level, count)
+
+    def summary(self, starts: List[Optional[int]]) -> Dict:
+        *by_level, scheduled = self(starts)
+        busy = sum(max(d, 0) for d in by_level)
+        return {
+            "scheduled": scheduled,
+            "skipped": len(starts) - scheduled,
+            "scheduled_duration": busy,
+            "utilisation": round(busy / self.span, 4),
+            # 搜索按此字典序（优先级从高到低）单调改进
+            "duration_by_priority": {str(p): d for p, d in zip(self.priorities, by_level)}
+        }
+
+
+@timed
+def anytime_schedule(tasks: List[dict], time_budget_ms: float = 100, seed: Optional[int] = 0,
+                     max_iterations: Optional[int] = None) -> Dict:
+    """
+    以贪心结果为起点，在时间预算内做大邻域搜索：解表示为放置顺序，每步把一个被跳过的任务提前到随机位置
+    （或交换相邻两个任务）后按顺序重新放置，不劣于当前解即接受，记录最优解。
+    预算用完时返回最优解及质量随时间的改进轨迹；单次重排中途超时会被放弃，超出预算的时间不超过一批任务的放置。
+    """
+    deadline = time.perf_counter() + time_budget_ms / 1000
+    begin = time.perf_counter()
+    rng = random.Random(seed)
+
+    origin, horizon = _timeline_bounds(tasks)
+    score = _ScheduleScore(tasks, origin, horizon)
+    order = _greedy_order(tasks)
+    starts = _place_in_order(tasks, order, origin, horizon)
+    current = score(starts)
+    initial = score.summary(starts)
+    best_starts, best = starts, current
+
+    # 窗口本身放不下的任务不可能被排上，不参与搜索
+    feasible = [t['duration'] <= t['deadline'] - t.get('earliest_start', 0) for t in tasks]
+    trace = [{"elapsed_ms": round((time.perf_counter() - begin) * 1000, 3), "iteration": 0, **initial}]
+    iterations = 0
+    while max_iterations is None or iterations < max_iterations:
+        if time.perf_counter() > deadline:
+            break
+        skipped = [i for i, s in enumerate(starts) if s is None and feasible[i]]
+        if not skipped:
+            break  # 所有可行任务都已排上，已是最优
+
+        candidate = order[:]
+        task = rng.choice(skipped)
+        position = candidate.index(task)
+        move = rng.random()
+        if position > 0 and move < 0.5:
+            # 把任务插到某个占用其时间窗的任务之前，让它先于“阻挡者”放置
+            lo, hi = tasks[task].get('earliest_start', 0), tasks[task]['deadline']
+            blockers = [k for k, j in enumerate(candidate)
+                        if starts[j] is not None and starts[j] < hi and starts[j] + tasks[j]['duration'] > lo]
+            target = rng.choice(blockers) if blockers else rng.randrange(position)
+            candidate.insert(min(target, position), candidate.pop(position))
+        elif position > 0 and move < 0.8:
+            candidate.insert(rng.randrange(position), candidate.pop(position))
+        elif len(candidate) > 1:
+            k = rng.randrange(len(candidate) - 1)
+            candidate[k], candidate[k + 1] = candidate[k + 1], candidate[k]
+        iterations += 1
+
+        placed = _place_in_order(tasks, candidate, origin, horizon, stop_at=deadline)
+        if placed is None:
+            break
+        value = score(placed)
+        if value >= current:
+            order, starts, current = candidate, placed, value
+            if value > best:
+                best_starts, best = placed, value
+                trace.append({"elapsed_ms": round((time.perf_counter() - begin) * 1000, 3),
+                              "iteration": iterations, **score.summary(placed)})
+
+    # 输出顺序与贪心一致（priority 降序、deadline 升序），便于对比
+    schedule = _schedule_rows(tasks, _greedy_order(tasks), best_starts)
+    return {
+        "schedule": schedule,
+        "optimizer": {
+            "mode": "anytime",
+            "time_budget_ms": time_budget_ms,
+            "elapsed_ms": round((time.perf_counter() - begin) * 1000, 3),
+            "iterations": iterations,
+            "initial": initial,
+            "best": score.summary(best_starts),
+            "improvements": trace
+        }
+    }
+
+SMOOTHING_POLICIES = ("first_fit", "least_loaded")
+
+
+def _window_segments(profile: MinMaxTree, start: int, max_size: int, extra: float, cap: float):
+    """
+    枚举从 start 开始的窗口：按前缀最大负载分段，依次产出 (最大负载, 最小窗口长度, 最大窗口长度)。
+    同一段内各窗口的最大负载相同；最大负载加上最小可能的每段分配量已超过上限时提前结束。
+    """
+    end = start + max_size
+    peak, first = profile[start], 1
+    while True:
+        nxt = profile.first_above(start + first, end, peak)
+        last = max_size if nxt is None else nxt - start
+        yield peak, first, last
+        if nxt is None:
+            return
+        peak, first = profile[nxt], nxt - start + 1
+        if peak + extra > cap:
+            return
+
+
+def _smallest_fitting_size(peak: float, workload: float, first: int, last: int, cap: float) -> Optional[int]:
+    # 满足 peak + workload / size <= cap 的最小 size；workload >= 0 时条件随 size 单调，可二分
+    if peak + workload / first <= cap:
+        return first
+    if workload <= 0:
+        return None
+    lo, hi = first + 1, last
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if peak + workload / mid <= cap:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo if lo <= last and peak + workload / lo <= cap else None
+
+
+def _place_task(profile: MinMaxTree, workload: float, flexibility: int, total_time: int, cap: float):
+    """
+    first_fit：按起点从早到晚、窗口从短到长，为单个任务取第一个不超上限的 (起始时间段, 窗口长度)。
+    """
+    max_size = flexibility + 1
+    last_start = total_time - flexibility - 1
+    extra = min(workload, workload / max_size)  # 所有窗口长度下最小的每段分配量
+
+    start = profile.first_fitting(0, last_start + 1, extra, cap)
+    while start is not None:
+        for peak, first, last in _window_segments(profile, start, max_size, extra, cap):
+            size = _smallest_fitting_size(peak, workload, first, last, cap)
+            if size is not None:
+                return start, size
+        start = profile.first_fitting(start + 1, last_start + 1, extra, cap)
+    return None
+
+
+def _sparse_max_table(levels: np.ndarray, max_width: int) -> List[np.ndarray]:
+    # table[k][i] = max(levels[i : i + 2^k])，只建到 2^k <= max_width
+    table = [levels]
+    while 2 << (len(table) - 1) <= max_width:
+        prev, half = table[-1], 1 << (len(table) - 1)
+        table.append(np.maximum(prev[:-half], prev[half:]))
+    return table
+
+
+def _run_lengths(padded: np.ndarray, table: List[np.ndarray], pad: int, direction: int) -> np.ndarray:
+    """
+    每个时间段向右（direction=1）或向左（-1）连续不超过自身负载的时间段数，按 2 的幂从大到小倍增，
+    每步一次区间最大值查询；结果最多为 2^(层数) - 1。padded 两侧各有 pad 个 +inf，越界的块不会被接受。
+    """
+    levels = padded[pad:-pad]
+    index = np.arange(pad, pad + len(levels))
+    run = np.zeros(len(levels), dtype=np.int64)
+    for k in range(len(table) - 1, -1, -1):
+        width = 1 << k
+        begin = index + 1 + run if direction > 0 else index - run - width
+        run += width * (table[k][begin] <= levels)
+    return run
+
+
+def _least_loaded_window(levels: np.ndarray, workload: float, flexibility: int, total_time: int, cap: float):
+    """
+    least_loaded：在所有可行窗口中取分配后峰值负载（窗口最大负载 + workload / 长度）最低的，平局取更早、更短的。
+    workload > 0 时，不能再向任一侧延长（延长不抬高最大负载却摊薄分配量）的窗口才可能最优，只有两类：
+      长度为 flexibility + 1 的窗口（每个起点一个），以及以某个时间段为最大值、两侧被更高负载挡住的极大区间。
+    前者用稀疏表做 O(1) 区间最大值查询，后者用倍增求两侧延伸长度，每个任务 O(T log F)，与负载形状无关。
+    """
+    max_size = flexibility + 1
+    last_start = total_time - max_size
+    if workload <= 0:
+        # 分配量不随窗口变长而减少：最优为负载最低处的单个时间段
+        start = int(np.argmin(levels[:last_start + 1]))
+        return (start, 1) if levels[start] + workload <= cap else None
+
+    # 两侧填充 +inf：倍增时越界的块最大值为 inf，无需另做边界判断
+    pad = 1 << (max_size.bit_length() - 1)
+    padded = np.concatenate([np.full(pad, np.inf), levels, np.full(pad, np.inf)])
+    table = _sparse_max_table(padded, max_size)
+    k = len(table) - 1
+    starts = np.arange(pad, pad + last_start + 1)
+    full_loads = np.maximum(table[k][starts], table[k][starts + max_size - (1 << k)]) + workload / max_size
+
+    left = _run_lengths(padded, table, pad, -1)
+    lengths = left + _run_lengths(padded, table, pad, 1) + 1
+    bounded = (lengths < max_size) & (np.arange(total_time) - left <= last_start)
+    run_loads = levels[bounded] + workload / lengths[bounded]
+    run_starts = (np.arange(total_time) - left)[bounded]
+
+    best = min(full_loads.min(), run_loads.min(initial=np.inf))
+    if best > cap:
+        return None
+    # 最早的最优起点必在候选之中（任何最优窗口向左延长后仍最优）；再取该起点下达到最优的最短窗口
+    start = int(min(np.flatnonzero(full_loads == best).min(initial=last_start + 1),
+                    run_starts[run_loads == best].min(initial=last_start + 1)))
+    peaks = np.maximum.accumulate(levels[start:start + max_size])
+    size = int(np.argmax(peaks + workload / np.arange(1, max_size + 1) <= best)) + 1
+    return start, size
+
+
+@timed
+def improved_resource_smoothing(tasks: List[dict], total_resources: int, total_time: int,
+                                policy: str = "first_fit") -> List[dict]:
     """
     考虑任务延迟灵活度，根据每个任务的workload进行时间段分布
+    first_fit 的资源曲线用线段树维护，窗口可行性检查为对数时间的区间查询；
+    least_loaded 在负载数组上做向量化的候选窗口查询（逐元素加法与线段树叶子的结果一致）。
     """
+    if policy not in SMOOTHING_POLICIES:
+        raise ValueError(f"Unsupported policy '{policy}'")
+
     result = []
-    resource_slots = [0 for _ in range(total_time)]
+    profile = MinMaxTree([0] * max(total_time, 0)) if policy == "first_fit" else None
+    levels = np.zeros(max(total_time, 0)) if policy == "least_loaded" else None
+    cap = (total_resources / total_time) * 1.2 if total_time > 0 else 0
 
     for task in tasks:
         workload = task['workload']
         flexibility = task.get('flexibility', 0)
-        assigned = False
-
-        for start in range(0, total_time - flexibility):
-            end = start + flexibility + 1
-            window = list(range(start, min(end, total_time)))
-
-            for window_size in range(1, len(window) + 1):
-                slot_comb = window[:window_size]
-                if all(resource_slots[s] + (workload / len(slot_comb)) <= (total_resources / total_time) * 1.2 for s in slot_comb):
-                    for s in slot_comb:
-                        resource_slots[s] += workload / len(slot_comb)
-                    result.append({
-                        'name': task['name'],
-                        'slots': slot_comb,
-                        'allocated_per_slot': round(workload / len(slot_comb), 2)
-                    })
-                    assigned = True
-                    break
-            if assigned:
-                break
-
-        if not assigned:
+
+        placement = None
+        if 0 <= flexibility < total_time:
+            if profile is not None:
+                placement = _place_task(profile, workload, flexibility, total_time, cap)
+            else:
+                placement = _least_loaded_window(levels, workload, flexibility, total_time, cap)
+
+        if placement is not None:
+            start, size = placement
+            per_slot = workload / size
+            if profile is not None:
+                profile.add(start, start + size, per_slot)
+            else:
+                levels[start:start + size] += per_slot
+            result.append({
+                'name': task['name'],
+                'slots': list(range(start, start + size)),
+                'allocated_per_slot': round(per_slot, 2)
+            })
+        else:
             result.append({
                 'name': task['name'],
                 'slots': [],
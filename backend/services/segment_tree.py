@@ -0,0 +1,184 @@
+import math
+from typing import List, Optional
+
+
+class FreeGapTree:
+    """
+    时间轴占用索引：覆盖 [origin, origin + span) 的线段树，每个节点记录
+    前缀空闲长度、后缀空闲长度和最长空闲段，用于 O(log T) 查找最早可用空档。
+    只支持“占用”操作（调度过程中时间段不会被释放）。
+    """
+
+    def __init__(self, origin: int, span: int):
+        self.origin = origin
+        size = 1
+        while size < max(span, 1):
+            size <<= 1
+        self.size = size
+
+        # 节点 v 的覆盖长度为 size >> depth(v)；初始全部空闲
+        lengths = [0]
+        depth = 0
+        while (1 << depth) <= size:
+            lengths.extend([size >> depth] * (1 << depth))
+            depth += 1
+        self.pre = lengths[:]
+        self.suf = lengths[:]
+        self.best = lengths
+        self.full = bytearray(2 * size)  # 已整体占用的节点，其子节点不再维护
+
+    def _pull(self, v: int, half: int) -> None:
+        if self.full[v]:
+            return
+        pre, suf, best = self.pre, self.suf, self.best
+        left, right = 2 * v, 2 * v + 1
+        pre[v] = pre[left] if pre[left] < half else half + pre[right]
+        suf[v] = suf[right] if suf[right] < half else half + suf[left]
+        best[v] = max(best[left], best[right], suf[left] + pre[right])
+
+    def occupy(self, start: int, end: int) -> None:
+        """
+        标记 [start, end) 为已占用，调用方保证该区间当前空闲。
+        """
+        lo = start - self.origin + self.size
+        hi = end - self.origin + self.size
+        first, last = lo, hi - 1
+        pre, suf, best, full = self.pre, self.suf, self.best, self.full
+        while lo < hi:
+            if lo & 1:
+                pre[lo] = suf[lo] = best[lo] = 0
+                full[lo] = 1
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                pre[hi] = suf[hi] = best[hi] = 0
+                full[hi] = 1
+            lo >>= 1
+            hi >>= 1
+
+        for leaf in (first, last):
+            v, half = leaf >> 1, 1
+            while v:
+                self._pull(v, half)
+                v >>= 1
+                half <<= 1
+
+    def find_earliest(self, earliest: int, duration: int, deadline: int) -> Optional[int]:
+        """
+        返回最小的 start ∈ [earliest, deadline - duration]，使 [start, start + duration) 全部空闲；不存在返回 None。
+        """
+        a = earliest - self.origin
+        latest = deadline - duration - self.origin
+        if duration > self.size or a > latest:
+            return None
+        a = max(a, 0)
+
+        pre, suf, best, full = self.pre, self.suf, self.best, self.full
+        run = 0  # 当前位置之前、起点不早于 a 的连续空闲长度
+        stack = [(1, 0, self.size)]
+        while stack:
+            v, lo, hi = stack.pop()
+            if hi <= a:
+                continue
+            if full[v]:
+                run = 0
+                continue
+            if lo - run > latest:
+                return None
+            if lo < a:
+                mid = (lo + hi) >> 1
+                stack.append((2 * v + 1, mid, hi))
+                stack.append((2 * v, lo, mid))
+                continue
+            if run + pre[v] >= duration:
+                start = lo - run
+                return start + self.origin if start <= latest else None
+            if best[v] >= duration:
+                mid = (lo + hi) >> 1
+                stack.append((2 * v + 1, mid, hi))
+                stack.append((2 * v, lo, mid))
+                continue
+            run = run + (hi - lo) if pre[v] == hi - lo else suf[v]
+        return None
+
+
+class MinMaxTree:
+    """
+    资源曲线索引：叶子保存各时间段的实际负载，内部节点保存区间最大 / 最小值。
+    区间加法逐个更新叶子（与逐元素累加的浮点结果完全一致）后只重算受影响的祖先，
+    区间最大值与“第一个满足阈值的位置”查询均为 O(log T)。
+    """
+
+    def __init__(self, values: List[float]):
+        size = 1
+        while size < max(len(values), 1):
+            size <<= 1
+        self.size = size
+        self.length = len(values)
+        self.mx = [-math.inf] * (2 * size)
+        self.mn = [math.inf] * (2 * size)
+        self.mx[size:size + len(values)] = values
+        self.mn[size:size + len(values)] = values
+        for v in range(size - 1, 0, -1):
+            self.mx[v] = max(self.mx[2 * v], self.mx[2 * v + 1])
+            self.mn[v] = min(self.mn[2 * v], self.mn[2 * v + 1])
+
+    def __getitem__(self, i: int) -> float:
+        return self.mx[self.size + i]
+
+    def add(self, start: int, end: int, delta: float) -> None:
+        """
+        对 [start, end) 每个时间段加上 delta。
+        """
+        mx, mn, size = self.mx, self.mn, self.size
+        for i in range(start + size, end + size):
+            mx[i] = mn[i] = mx[i] + delta
+        lo, hi = (start + size) >> 1, (end - 1 + size) >> 1
+        while lo:
+            for v in range(lo, hi + 1):
+                mx[v] = max(mx[2 * v], mx[2 * v + 1])
+                mn[v] = min(mn[2 * v], mn[2 * v + 1])
+            lo >>= 1
+            hi >>= 1
+
+    def range_max(self, start: int, end: int) -> float:
+        result = -math.inf
+        lo, hi = start + self.size, end + self.size
+        while lo < hi:
+            if lo & 1:
+                result = max(result, self.mx[lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                result = max(result, self.mx[hi])
+            lo >>= 1
+            hi >>= 1
+        return result
+
+    def _first(self, start: int, end: int, enter) -> Optional[int]:
+        # 按从左到右的顺序下降，只进入 enter(v) 为真的节点，返回第一个满足条件的叶子下标
+        stack = [(1, 0, self.size)]
+        while stack:
+            v, lo, hi = stack.pop()
+            if hi <= start or lo >= end or not enter(v):
+                continue
+            if hi - lo == 1:
+                return lo
+            mid = (lo + hi) >> 1
+            stack.append((2 * v + 1, mid, hi))
+            stack.append((2 * v, lo, mid))
+        return None
+
+    def first_above(self, start: int, end: int, threshold: float) -> Optional[int]:
+        """
+        [start, end) 中第一个负载严格大于 threshold 的位置。
+        """
+        mx = self.mx
+        return self._first(start, end, lambda v: mx[v] > threshold)
+
+    def first_fitting(self, start: int, end: int, extra: float, limit: float) -> Optional[int]:
+        """
+        [start, end) 中第一个满足 负载 + extra <= limit 的位置。
+        """
+        mn = self.mn
+        return self._first(start, end, lambda v: mn[v] + extra <= limit)
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Optional
+
+from services.finance_calculator import calculate_npv
+from services.metrics import timed
+from services.process_pool import get_process_pool
+from services.risk_analysis import MonteCarloAccumulator, MONTE_CARLO_MAX_FULL, MONTE_CARLO_PREVIEW
+from services.lazy_module import lazy_import
+
+np = lazy_import("numpy")
+
+# 每块矩阵的元素数上限（路径数 × 期数），峰值内存约为其 8 倍字节的若干倍，与总路径数无关
+NPV_BLOCK_ELEMENTS = 1 << 21
+# 估计 NPV 分布范围（用于分位数草图）的预抽样路径数
+NPV_PILOT_PATHS = 4096
+# 折现率样本的下限，保证 1 + r > 0
+MIN_DISCOUNT_RATE = -0.99
+
+DISTRIBUTIONS = ("normal", "triangular")
+
+
+def _normal_cdf(z: np.ndarray) -> np.ndarray:
+    """
+    标准正态分布函数 Φ(z)，用 Abramowitz-Stegun 7.1.26 的 erf 近似（绝对误差 < 1.5e-7）。
+    """
+    x = np.abs(z) / math.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-x * x)
+    return 0.5 * (1.0 + np.copysign(erf, z))
+
+
+def _marginal(z: np.ndarray, base: np.ndarray, std_dev: np.ndarray, triangular: np.ndarray) -> np.ndarray:
+    """
+    把相关的标准正态变量映射到各自的边际分布（Gaussian copula）：
+    normal 为 base + σ·z；triangular 与 draw_samples 一致，取 [base - σ, base + σ]、众数 base，用逆分布函数变换。
+    """
+    values = base + std_dev * z
+    if triangular.any():
+        cols = np.flatnonzero(triangular)
+        u = _normal_cdf(z[:, cols])
+        s = std_dev[cols]
+        offset = np.where(u <= 0.5, np.sqrt(2.0 * u) - 1.0, 1.0 - np.sqrt(2.0 * (1.0 - u)))
+        values[:, cols] = base[cols] + s * offset
+    return values
+
+
+class NPVSimulationPlan:
+    """
+    多期随机 NPV 模拟的预编译计划：各期现金流与折现率的边际分布参数，
+    以及相关矩阵（最后一维为折现率）的 Cholesky 因子。可序列化后在子进程中执行。
+    """
+
+    def __init__(self, cash_flows: List[Dict], discount_rate: Dict, correlation: Optional[List[List[float]]] = None):
+        if not cash_flows:
+            raise ValueError("At least one cash-flow period is required.")
+        if discount_rate["base"] <= -1:
+            raise ValueError("Discount rate must be greater than -1.")
+        variables = list(cash_flows) + [discount_rate]
+        for v in variables:
+            if v.get("distribution", "normal") not in DISTRIBUTIONS:
+                raise ValueError("Unsupported distribution type")
+            if v.get("std_dev", 0) < 0:
+                raise ValueError("std_dev must be non-negative.")
+
+        self.periods = len(cash_flows)
+        self.base = np.array([v["base"] for v in variables], dtype=float)
+        self.std_dev = np.array([v.get("std_dev", 0.0) for v in variables], dtype=float)
+        self.triangular = np.array([v.get("distribution", "normal") == "triangular" for v in variables])
+        self.cholesky = self._cholesky(correlation)
+        self.stochastic_rate = bool(self.std_dev[-1] > 0)
+        self.deterministic_npv = calculate_npv(self.base[:-1].tolist(), float(self.base[-1]))
+        # 高收益阈值：比确定性 NPV 高出其绝对值的 20%，确定性 NPV 为负时仍有意义
+        self.high_return_threshold = self.deterministic_npv + 0.2 * abs(self.deterministic_npv)
+        self.range_std_dev = 0.0
+
+    def _cholesky(self, correlation: Optional[List[List[float]]]) -> Optional[np.ndarray]:
+        # 相关矩阵可为 T×T（只描述各期现金流）或 (T+1)×(T+1)（最后一行 / 列为折现率）
+        if correlation is None:
+            return None
+        matrix = np.asarray(correlation, dtype=float)
+        size = self.periods + 1
+        if matrix.shape == (self.periods, self.periods):
+            full = np.eye(size)
+            full[:-1, :-1] = matrix
+            matrix = full
+        elif matrix.shape != (size, size):
+            raise ValueError(f"Correlation matrix must be {self.periods}x{self.periods} or {size}x{size}.")
+        if not np.allclose(matrix, matrix.T) or not np.allclose(np.diag(matrix), 1.0):
+            raise ValueError("Correlation matrix must be symmetric with a unit diagonal.")
+        try:
+            return np.linalg.cholesky(matrix)
+        except np.linalg.LinAlgError:
+            raise ValueError("Correlation matrix must be positive definite.")
+
+    def block_rows(self) -> int:
+        return max(1, NPV_BLOCK_ELEMENTS // (self.periods + 1))
+
+    def simulate(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        """
+        生成 size 条路径的 NPV：整块构造 路径 × 期数 的现金流矩阵，
+        折现率固定时用一次矩阵-向量乘法折现，随机折现率时逐路径按各自折现因子做行内积。
+        """
+        z = rng.standard_normal((size, self.periods + 1))
+        if self.cholesky is not None:
+            z = z @ self.cholesky.T
+        values = _marginal(z, self.base, self.std_dev, self.triangular)
+        flows = values[:, :-1]
+        t = np.arange(self.periods, dtype=float)
+
+        if not self.stochastic_rate:
+            return flows @ (1.0 + self.base[-1]) ** -t
+        rates = np.maximum(values[:, -1], MIN_DISCOUNT_RATE)
+        factors = np.exp(-np.outer(np.log1p(rates), t))
+        return np.einsum("ij,ij->i", flows, factors)
+
+    def accumulator(self) -> MonteCarloAccumulator:
+        # 草图区间以确定性 NPV 为中心，半宽为预抽样标准差的 10 倍
+        return MonteCarloAccumulator(self.deterministic_npv, self.range_std_dev, "normal", self.high_return_threshold)
+
+
+def simulate_npv_chunk(plan: NPVSimulationPlan, seed_seq: np.random.SeedSequence, size: int,
+                       full_distribution: bool = False):
+    """
+    模拟一个样本块（内部再按 block_rows 分批以限制内存），返回 (块统计, 前若干个样本 / 整块样本)。可在子进程中执行。
+    """
+    rng = np.random.default_rng(seed_seq)
+    acc = plan.accumulator()
+    kept = []
+    rows = plan.block_rows()
+    for start in range(0, size, rows):
+        npv = plan.simulate(rng, min(rows, size - start))
+        acc.update(npv)
+        if full_distribution:
+            kept.append(npv)
+        elif start == 0:
+            kept.append(npv[:MONTE_CARLO_PREVIEW])
+    return acc, np.concatenate(kept)
+
+
+def npv_simulation_steps(
+    cash_flows: List[Dict],
+    discount_rate: Dict,
+    iterations: int,
+    correlation: Optional[List[List[float]]] = None,
+    seed: Optional[int] = 42,
+    full_distribution: bool = False
+) -> tuple:
+    """
+    构造计划并拆分为 simulate_npv_chunk 的参数元组；返回 (计划, 步骤列表)。
+    与 monte_carlo_steps 相同，第 k 块使用 SeedSequence(seed).spawn 派生的第 k 个随机流。
+    """
+    if full_distribution and iterations > MONTE_CARLO_MAX_FULL:
+        raise ValueError(f"Full distribution output is limited to {MONTE_CARLO_MAX_FULL} iterations.")
+    plan = NPVSimulationPlan(cash_flows, discount_rate, correlation)
+
+    chunk = plan.block_rows() * 8
+    sizes = [min(chunk, iterations - start) for start in range(0, iterations, chunk)]
+    pilot_stream, *streams = np.random.SeedSequence(seed).spawn(len(sizes) + 1)
+    pilot = plan.simulate(np.random.default_rng(pilot_stream), NPV_PILOT_PATHS)
+    plan.range_std_dev = float(pilot.std()) + abs(float(pilot.mean()) - plan.deterministic_npv) / 10
+
+    return plan, [(plan, stream, size, full_distribution) for stream, size in zip(streams, sizes)]
+
+
+def combine_npv_simulation(plan: NPVSimulationPlan, chunk_results, full_distribution: bool = False) -> Dict:
+    acc = plan.accumulator()
+    samples = []
+    for chunk_acc, chunk_samples in chunk_results:
+        if full_distribution or not samples:
+            samples.append(chunk_samples)
+        acc.merge(chunk_acc)
+
+    if full_distribution:
+        distribution_data = np.concatenate(samples)
+    else:
+        distribution_data = np.round(samples[0], 2).tolist()
+    return {
+        "deterministic_npv": plan.deterministic_npv,
+        "high_return_threshold": round(plan.high_return_threshold, 2),
+        "periods": plan.periods,
+        "npv_distribution": distribution_data,
+        **acc.summary()
+    }
+
+
+@timed
+def perform_npv_simulation(
+    cash_flows: List[Dict],
+    discount_rate: Dict,
+    iterations: int,
+    correlation: Optional[List[List[float]]] = None,
+    seed: Optional[int] = 42,
+    parallel: bool = False,
+    full_distribution: bool = False
+) -> Dict:
+    """
+    多期相关随机 NPV 模拟。cash_flows 为各期 {base, std_dev, distribution}，discount_rate 同构；
+    NPV 口径与 calculate_npv 一致（第 0 期不折现）。统计汇总与 perform_monte_carlo_simulation 相同，
+    parallel=True 时同一 seed 的结果与串行逐位一致。
+    """
+    plan, steps = npv_simulation_steps(cash_flows, discount_rate, iterations, correlation, seed, full_distribution)
+    runner = get_process_pool().map if parallel and len(steps) > 1 else map
+    return combine_npv_simulation(plan, runner(simulate_npv_chunk, *zip(*steps)), full_distribution)
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import math
+from typing import Optional
+
+from services.lazy_module import lazy_import
+
+np = lazy_import("numpy")
+
+
+class RunningMoments:
+    """
+    流式统计量：样本数、均值、M2（Welford / Chan 合并）、最小值、最大值。
+    按块更新，内存占用与样本总数无关。
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, block: np.ndarray) -> None:
+        if len(block) == 0:
+            return
+        other = RunningMoments()
+        other.count = len(block)
+        other.mean = float(block.mean())
+        other.m2 = float(np.square(block - other.mean).sum())
+        other.min = float(block.min())
+        other.max = float(block.max())
+        self.merge(other)
+
+    def merge(self, other: "RunningMoments") -> None:
+        if other.count == 0:
+            return
+        if self.count == 0:
+            # 空累加器直接复制，保证按块合并与逐块更新的浮点结果一致
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        # 总体方差，与 np.var / np.std 默认口径一致
+        return self.m2 / self.count if self.count else 0.0
+
+
+class StreamingHistogram:
+    """
+    固定区间等宽直方图形式的分位数草图，区间外的样本落入上下溢出桶。
+    每个桶同时记录样本数和样本和，可合并，支持分位数与尾部均值（CVaR）估计。
+    """
+
+    def __init__(self, lo: float, hi: float, bins: int = 4096):
+        if not hi > lo:
+            raise ValueError("Histogram range must satisfy hi > lo.")
+        self.lo = lo
+        self.hi = hi
+        self.bins = bins
+        self.width = (hi - lo) / bins
+        # 下标 0 为下溢桶，1..bins 为正常桶，bins + 1 为上溢桶
+        self.counts = np.zeros(bins + 2, dtype=np.int64)
+        self.sums = np.zeros(bins + 2, dtype=float)
+
+    def update(self, block: np.ndarray) -> None:
+        idx = np.floor((block - self.lo) / self.width).astype(np.int64) + 1
+        np.clip(idx, 0, self.bins + 1, out=idx)
+        self.counts += np.bincount(idx, minlength=self.bins + 2)
+        self.sums += np.bincount(idx, weights=block, minlength=self.bins + 2)
+
+    def merge(self, other: "StreamingHistogram") -> None:
+        self.counts += other.counts
+        self.sums += other.sums
+
+    def _edges(self, vmin: float, vmax: float) -> np.ndarray:
+        inner = self.lo + self.width * np.arange(self.bins + 1)
+        return np.concatenate(([min(vmin, self.lo)], inner, [max(vmax, self.hi)]))
+
+    def quantile(self, q: float, vmin: float, vmax: float) -> Optional[float]:
+        """
+        估计 q 分位数（0 ~ 1），桶内按线性插值；vmin / vmax 为全局极值，用来界定溢出桶。
+        """
+        total = int(self.counts.sum())
+        if total == 0:
+            return None
+        target = q * total
+        cumulative = np.cumsum(self.counts)
+        k = int(np.searchsorted(cumulative, target, side="left"))
+        k = min(k, len(self.counts) - 1)
+        edges = self._edges(vmin, vmax)
+        before = cumulative[k] - self.counts[k]
+        fraction = (target - before) / self.counts[k] if self.counts[k] else 0.0
+        value = edges[k] + fraction * (edges[k + 1] - edges[k])
+        return float(min(max(value, vmin), vmax))
+
+    def lower_tail_mean(self, q: float) -> Optional[float]:
+        """
+        估计最低 q 比例样本的均值（即 CVaR），临界桶按比例取其样本和。
+        """
+        total = int(self.counts.sum())
+        if total == 0:
+            return None
+        target = max(q * total, 1.0)
+        cumulative = np.cumsum(self.counts)
+        k = int(np.searchsorted(cumulative, target, side="left"))
+        k = min(k, len(self.counts) - 1)
+        before = cumulative[k] - self.counts[k]
+        partial = (target - before) / self.counts[k] * self.sums[k] if self.counts[k] else 0.0
+        return float((self.sums[:k].sum() + partial) / target)
@@ -0,0 +1,89 @@
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 启动时是否预热：0 = 不预热（默认，重型依赖在首次使用时加载）；1 = 后台线程预热；sync = 启动事件中同步预热
+WARMUP_ENV = "ECON_WARMUP"
+
+# 延迟加载的重型依赖，按导入耗时从大到小
+HEAVY_MODULES = ("pandas", "numpy", "sqlalchemy", "db")
+
+_lock = threading.Lock()
+_status = "idle"
+_seconds: Dict[str, float] = {}
+
+
+def warmup_mode() -> str:
+    value = os.environ.get(WARMUP_ENV, "0").strip().lower()
+    if value in ("0", "false", "no", "off", ""):
+        return "off"
+    return "sync" if value == "sync" else "background"
+
+
+def _exercise() -> None:
+    # 各跑一次小计算，让 NumPy 的 ufunc、延迟构造的查表矩阵与数据库连接池都完成初始化
+    from services.estimation_calculator import estimate_cocomo_bulk
+    from services.finance_calculator import calculate_batch_metrics
+    from services.result_store import result_store
+
+    calculate_batch_metrics([[-100.0, 60.0, 60.0]], [0.1])
+    estimate_cocomo_bulk([10.0], ["organic"], {"RELY": ["High"]}, [1000.0])
+    if result_store.enabled:
+        # 未开启结果持久化时不连接数据库，避免凭空创建 SQLite 文件
+        from db import get_engine
+        get_engine()
+
+
+def warm_up() -> Dict:
+    """
+    导入全部重型依赖并执行一次代表性计算，记录各步耗时（秒）。已完成或正在进行时不重复执行。
+    """
+    global _status
+    with _lock:
+        if _status != "idle":
+            return warmup_status()
+        _status = "running"
+
+    for name in HEAVY_MODULES:
+        start = time.perf_counter()
+        importlib.import_module(name)
+        _seconds[name] = round(time.perf_counter() - start, 4)
+    start = time.perf_counter()
+    try:
+        _exercise()
+    except Exception:
+        logger.exception("Warm-up computation failed")
+    _seconds["exercise"] = round(time.perf_counter() - start, 4)
+
+    with _lock:
+        _status = "ready"
+    return warmup_status()
+
+
+def start_warm_up(mode: Optional[str] = None) -> Optional[threading.Thread]:
+    """
+    按 ECON_WARMUP 触发预热：background 时在守护线程中执行并返回该线程，sync 时直接执行，off 时什么都不做。
+    """
+    mode = mode or warmup_mode()
+    if mode == "off":
+        return None
+    if mode == "sync":
+        warm_up()
+        return None
+    thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def warmup_status() -> Dict:
+    return {
+        "status": _status,
+        "seconds": dict(_seconds),
+        "loaded": {name: name in sys.modules for name in HEAVY_MODULES}
+    }
@@ -0,0 +1,82 @@
+import threading
+
+import numpy as np
+import pytest
+
+from services.cocomo_calibration import CalibrationStore
+
+
+def _history(n, seed):
+    rng = np.random.default_rng(seed)
+    kloc = rng.uniform(5, 200, n)
+    effort = 2.8 * kloc ** 1.1 * rng.lognormal(0, 0.2, n)
+    return {
+        "mode": rng.choice(["organic", "semi-detached", "embedded"], n).tolist(),
+        "kloc": kloc.tolist(),
+        "effort": effort.tolist(),
+        "duration": (2.5 * effort ** 0.35 * rng.lognormal(0, 0.05, n)).tolist()
+    }
+
+
+def _rows(batch, start, stop):
+    return {k: v[start:stop] for k, v in batch.items()}
+
+
+def test_incremental_appends_match_a_single_fit():
+    store = CalibrationStore()
+    history = _history(300, seed=1)
+    whole = store.create([history])
+
+    created = store.create([_rows(history, 0, 40)])
+    for start in range(40, 300, 65):
+        latest = store.append(created["calibration_id"], [_rows(history, start, start + 65)])
+
+    assert latest["version"] == 5
+    for mode, params in whole["params"].items():
+        for key, value in params.items():
+            assert latest["params"][mode][key] == pytest.approx(value, rel=1e-9)
+
+
+def test_invalid_batch_leaves_the_model_unchanged():
+    store = CalibrationStore()
+    created = store.create([_history(30, seed=2)])
+    bad = {"mode": ["organic"], "kloc": [1, 2], "effort": [3], "duration": [4]}
+    with pytest.raises(ValueError):
+        store.append(created["calibration_id"], [_history(10, seed=3), bad])
+
+    calibration = store.get(created["calibration_id"])
+    assert calibration.describe() == created
+    assert sum(m.effort.n for m in calibration.modes.values()) == 30
+
+
+def test_delete_during_append_is_not_undone():
+    store = CalibrationStore()
+    calibration_id = store.create([_history(20, seed=4)])["calibration_id"]
+
+    def batches():
+        yield _history(10, seed=5)
+        store.delete(calibration_id)
+        yield _history(10, seed=6)
+
+    with pytest.raises(KeyError):
+        store.append(calibration_id, batches())
+    with pytest.raises(KeyError):
+        store.get(calibration_id)
+
+
+def test_parsing_an_upload_does_not_block_other_calibrations():
+    store = CalibrationStore()
+    slow_id = store.create([_history(20, seed=7)])["calibration_id"]
+    other_id = store.create([_history(20, seed=8)])["calibration_id"]
+    finished = threading.Event()
+
+    def batches():
+        # 模拟仍在解析的大文件：期间另一个模型的追加必须能完成
+        worker = threading.Thread(target=lambda: (store.append(other_id, [_history(5, seed=9)]), finished.set()))
+        worker.start()
+        worker.join(timeout=5)
+        yield _history(5, seed=10)
+
+    store.append(slow_id, batches())
+    assert finished.is_set()
+    assert store.get(other_id).describe()["latest_version"] == 2
@@ -0,0 +1,109 @@
+import random
+import threading
+
+import pytest
+
+from services.critical_path import ProjectNetwork, ProjectNetworkStore, analyze_critical_path
+
+
+def _random_network(rng, n):
+    # 前驱只取编号更小的任务以保证无环，再打乱顺序，让拓扑排序真正起作用
+    tasks = []
+    for i in range(n):
+        preds = rng.sample(range(i), min(i, rng.randint(0, 3)))
+        task = {"name": f"t{i}", "predecessors": [f"t{p}" for p in preds]}
+        task.update(_random_estimate(rng))
+        tasks.append(task)
+    rng.shuffle(tasks)
+    return tasks
+
+
+def _random_estimate(rng):
+    if rng.random() < 0.3:
+        a = rng.randint(0, 5)
+        m = a + rng.randint(0, 5)
+        return {"optimistic": a, "most_likely": m, "pessimistic": m + rng.randint(0, 10)}
+    return {"duration": rng.randint(0, 20)}
+
+
+def _without_id(result):
+    return {k: v for k, v in result.items() if k != "network_id"}
+
+
+@pytest.mark.parametrize("seed", range(15))
+def test_incremental_update_matches_full_recompute(seed):
+    rng = random.Random(seed)
+    tasks = _random_network(rng, rng.randint(2, 120))
+    network = ProjectNetwork(tasks)
+    by_name = {t["name"]: t for t in tasks}
+
+    for _ in range(10):
+        changes = [{"name": rng.choice(tasks)["name"], **_random_estimate(rng)} for _ in range(rng.randint(1, 4))]
+        network.update(changes)
+        for change in changes:
+            task = by_name[change["name"]]
+            for key in ("duration", "optimistic", "most_likely", "pessimistic"):
+                task.pop(key, None)
+            task.update(change)
+
+        expected = ProjectNetwork(tasks).describe(target_duration=50.0)
+        assert _without_id(network.describe(target_duration=50.0)) == _without_id(expected)
+
+
+def test_update_touches_only_affected_tasks():
+    # 两条互不相连的链：修改一条链上的任务不应重算另一条
+    tasks = [{"name": f"a{i}", "duration": 1, "predecessors": [f"a{i - 1}"] if i else []} for i in range(50)]
+    tasks += [{"name": f"b{i}", "duration": 1, "predecessors": [f"b{i - 1}"] if i else []} for i in range(50)]
+    network = ProjectNetwork(tasks)
+    recomputed = network.update([{"name": "a49", "duration": 5}])
+    assert recomputed < 2 * 50
+    assert network.project_duration == 54
+
+
+def test_invalid_batch_is_not_applied():
+    network = ProjectNetwork([{"name": "a", "duration": 2}, {"name": "b", "duration": 3, "predecessors": ["a"]}])
+    with pytest.raises(ValueError):
+        network.update([{"name": "a", "duration": 10}, {"name": "b", "duration": -1}])
+    with pytest.raises(KeyError):
+        network.update([{"name": "a", "duration": 10}, {"name": "missing", "duration": 1}])
+    assert network.project_duration == 5
+
+
+def test_cycle_is_reported():
+    tasks = [{"name": "a", "duration": 1, "predecessors": ["c"]},
+             {"name": "b", "duration": 1, "predecessors": ["a"]},
+             {"name": "c", "duration": 1, "predecessors": ["b"]}]
+    with pytest.raises(ValueError, match="cycle"):
+        analyze_critical_path(tasks)
+
+
+def test_pert_completion_probability():
+    tasks = [{"name": "a", "optimistic": 2, "most_likely": 4, "pessimistic": 12},
+             {"name": "b", "duration": 3, "predecessors": ["a"]}]
+    result = analyze_critical_path(tasks, target_duration=8)
+    assert result["project_duration"] == 8
+    assert result["critical_path"] == ["a", "b"]
+    assert result["completion_probability"] == 0.5
+
+
+def test_store_reads_wait_for_an_update_in_progress():
+    store = ProjectNetworkStore()
+    created = store.create([{"name": "a", "duration": 2}, {"name": "b", "duration": 3, "predecessors": ["a"]}])
+    network_id = created["network_id"]
+    assert created["project_duration"] == 5
+    results = []
+
+    with store._lock:
+        # 模拟正在进行的 PATCH：读取必须等它完成
+        reader = threading.Thread(target=lambda: results.append(store.describe(network_id)))
+        reader.start()
+        reader.join(0.1)
+        assert reader.is_alive()
+        store.get(network_id).update([{"name": "a", "duration": 4}])
+    reader.join(5)
+
+    assert results[0]["project_duration"] == 7
+    assert store.update(network_id, [{"name": "b", "duration": 1}])["project_duration"] == 5
+    store.delete(network_id)
+    with pytest.raises(KeyError):
+        store.describe(network_id)
@@ -0,0 +1,71 @@
+import copy
+
+import pytest
+
+from services.decision_graph import DecisionGraph, DecisionGraphStore
+
+
+def _nodes():
+    return [
+        {"id": "launch", "type": "decision", "branches": [
+            {"target": "market", "label": "go", "payoff": -40},
+            {"target": "skip", "label": "stop"}
+        ]},
+        {"id": "market", "type": "chance", "branches": [
+            {"target": "boom", "probability": 0.6},
+            {"target": "bust", "probability": 0.4, "payoff": -10}
+        ]},
+        {"id": "boom", "payoff": 120},
+        {"id": "bust", "payoff": 20},
+        {"id": "skip", "payoff": 0}
+    ]
+
+
+def _state(graph):
+    return copy.deepcopy((graph.payoffs, graph.probabilities, graph.branch_payoffs, graph.values, graph.choices))
+
+
+@pytest.mark.parametrize("changes", [
+    # 概率之和不为 1
+    [{"node": "boom", "payoff": 500}, {"node": "market", "branch": 0, "probability": 0.9}],
+    # 分支下标越界
+    [{"node": "launch", "branch": 0, "payoff": 0}, {"node": "market", "branch": 5, "payoff": 1}],
+    # 非 chance 节点的分支不能设置概率
+    [{"node": "market", "branch": 1, "payoff": 30}, {"node": "launch", "branch": 0, "probability": 1.0}],
+    # 未知节点
+    [{"node": "bust", "payoff": 0}, {"node": "missing", "payoff": 1}]
+])
+def test_invalid_batch_is_rolled_back(changes):
+    graph = DecisionGraph(_nodes())
+    before, described = _state(graph), graph.describe()
+    with pytest.raises(ValueError):
+        graph.update(changes)
+    assert _state(graph) == before
+    assert graph.describe() == described
+
+
+def test_store_update_error_leaves_the_stored_graph_unchanged():
+    store = DecisionGraphStore()
+    created = store.create(_nodes())
+    with pytest.raises(ValueError):
+        store.update(created["graph_id"], [{"node": "boom", "payoff": 0},
+                                           {"node": "market", "branch": 1, "probability": -0.4}])
+    assert store.describe(created["graph_id"]) == created
+    with pytest.raises(KeyError):
+        store.update("missing", [])
+
+
+def test_incremental_update_matches_a_fresh_graph():
+    graph = DecisionGraph(_nodes())
+    assert graph.describe()["expected_value"] == 36.0
+    assert graph.policy()["launch"]["label"] == "go"
+
+    changes = [{"node": "market", "branch": 0, "probability": 0.2},
+               {"node": "market", "branch": 1, "probability": 0.8}]
+    graph.update(changes)
+    nodes = _nodes()
+    nodes[1]["branches"][0]["probability"], nodes[1]["branches"][1]["probability"] = 0.2, 0.8
+    fresh = DecisionGraph(nodes)
+    assert {k: v for k, v in graph.describe().items() if k != "graph_id"} == \
+        {k: v for k, v in fresh.describe().items() if k != "graph_id"}
+    assert graph.policy()["launch"]["label"] == "stop"
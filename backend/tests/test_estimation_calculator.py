@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from services.estimation_calculator import LinearModel, calculate_regression_model, student_t_cdf, student_t_quantile
+
+
+def _data(n, p, seed):
+    rng = np.random.default_rng(seed)
+    x = rng.normal(0, 3, (n, p))
+    y = 1.5 + x @ rng.normal(0, 2, p) + rng.normal(0, 0.5, n)
+    return x, y
+
+
+def _fit(x, y, chunks=1):
+    model = LinearModel([f"x{i}" for i in range(x.shape[1])])
+    for xs, ys in zip(np.array_split(x, chunks), np.array_split(y, chunks)):
+        model.update(xs, ys)
+    return model
+
+
+@pytest.mark.parametrize("n, p", [(3, 1), (30, 1), (200, 4), (50, 8)])
+def test_coefficients_match_lstsq(n, p):
+    x, y = _data(n, p, seed=n + p)
+    design = np.column_stack([np.ones(n), x])
+    expected, *_ = np.linalg.lstsq(design, y, rcond=None)
+
+    beta, r_squared = _fit(x, y).coefficients()
+    np.testing.assert_allclose(beta, expected, rtol=1e-9, atol=1e-9)
+    residuals = y - design @ expected
+    assert r_squared == pytest.approx(1 - residuals @ residuals / np.sum((y - y.mean()) ** 2), rel=1e-9)
+
+
+def test_chunked_updates_match_single_fit():
+    x, y = _data(500, 3, seed=7)
+    whole, chunked = _fit(x, y), _fit(x, y, chunks=17)
+    np.testing.assert_allclose(chunked.coefficients()[0], whole.coefficients()[0], rtol=1e-10)
+    assert chunked.summary() == whole.summary()
+
+
+def test_standard_errors_and_prediction_interval():
+    n, p = 40, 2
+    x, y = _data(n, p, seed=3)
+    design = np.column_stack([np.ones(n), x])
+    beta, *_ = np.linalg.lstsq(design, y, rcond=None)
+    df = n - p - 1
+    sigma2 = np.sum((y - design @ beta) ** 2) / df
+    xtx_inv = np.linalg.inv(design.T @ design)
+
+    summary = _fit(x, y).summary()
+    expected_se = np.sqrt(sigma2 * np.diag(xtx_inv))
+    np.testing.assert_allclose(list(summary["standard_errors"].values()), expected_se, atol=2e-6)
+    assert summary["degrees_of_freedom"] == df
+
+    x0 = np.array([1.0, -2.0])
+    point = np.concatenate([[1.0], x0])
+    half = student_t_quantile(0.975, df) * np.sqrt(sigma2 * (1 + point @ xtx_inv @ point))
+    [prediction] = _fit(x, y).predict([x0], 0.95)
+    assert prediction["predict_y"] == pytest.approx(point @ beta, abs=1e-4)
+    assert prediction["upper"] - prediction["lower"] == pytest.approx(2 * half, abs=1e-3)
+
+
+def test_exactly_determined_fit_has_no_intervals():
+    model = _fit(np.array([[1.0], [2.0]]), np.array([3.0, 5.0]))
+    summary = model.summary()
+    assert summary["coefficients"] == {"intercept": 1.0, "x0": 2.0}
+    assert summary["degrees_of_freedom"] == 0
+    assert summary["standard_errors"] is None
+    assert model.predict([[4.0]]) == [{"predict_y": 9.0, "lower": None, "upper": None}]
+
+
+@pytest.mark.parametrize("level", [2.0, -3.5e6, 1e-8])
+def test_constant_y_has_zero_r_squared(level):
+    # 总离差平方和只剩舍入误差时不能算出虚假的 R²
+    x = np.array([[1.0], [2.0], [3.0], [5.0]])
+    model = _fit(x, np.full(4, level))
+    summary = model.summary()
+    assert summary["r_squared"] == 0
+    assert summary["adjusted_r_squared"] is None
+    assert model.coefficients()[1] == 0
+    assert calculate_regression_model([[1, 2], [2, 2], [3, 2]], 1.0)["r_squared"] == 0
+
+
+def test_small_relative_spread_keeps_its_r_squared():
+    x = np.arange(50.0)[:, None]
+    y = 1e6 + 1e-3 * x[:, 0] + np.random.default_rng(5).normal(0, 1e-3, 50)
+    design = np.column_stack([np.ones(50), x])
+    residuals = y - design @ np.linalg.lstsq(design, y, rcond=None)[0]
+    expected = 1 - residuals @ residuals / np.sum((y - y.mean()) ** 2)
+    assert _fit(x, y).coefficients()[1] == pytest.approx(expected, rel=1e-6)
+
+
+def test_rejects_underdetermined_and_collinear_data():
+    with pytest.raises(ValueError):
+        _fit(np.array([[1.0, 2.0], [2.0, 1.0]]), np.array([1.0, 2.0])).summary()
+    x = np.arange(10.0)
+    with pytest.raises(ValueError, match="linearly dependent"):
+        _fit(np.column_stack([x, 2 * x]), x).summary()
+
+
+@pytest.mark.parametrize("p, df, expected", [
+    (0.975, 1, 12.706204736),
+    (0.975, 2, 4.302652730),
+    (0.975, 5, 2.570581836),
+    (0.975, 10, 2.228138852),
+    (0.975, 30, 2.042272456),
+    (0.975, 100, 1.983971519),
+    (0.95, 3, 2.353363435),
+    (0.995, 4, 4.604094871),
+    (0.9, 20, 1.325340707)
+])
+def test_t_quantiles_match_tables(p, df, expected):
+    assert student_t_quantile(p, df) == pytest.approx(expected, rel=1e-8)
+    assert student_t_quantile(1 - p, df) == pytest.approx(-expected, rel=1e-8)
+    assert student_t_cdf(expected, df) == pytest.approx(p, abs=1e-9)
@@ -0,0 +1,47 @@
+import math
+import random
+
+import pytest
+
+from services.finance_calculator import calculate_batch_metrics, calculate_irr, calculate_npv, calculate_payback
+
+
+def test_batch_matches_single_series_functions():
+    rng = random.Random(0)
+    cash_flows = [[-rng.uniform(50, 300)] + [rng.uniform(-10, 60) for _ in range(rng.randint(0, 15))]
+                  for _ in range(200)]
+    rates = [0.05, 0.12]
+    results = calculate_batch_metrics(cash_flows, rates)
+
+    for row, flows in zip(results, cash_flows):
+        assert row["npv"] == pytest.approx([calculate_npv(flows, r) for r in rates], abs=0.011)
+        payback = calculate_payback(flows)
+        assert row["payback_period"] == (None if payback == -1 else payback)
+        try:
+            expected_irr = calculate_irr(flows)["irr_percent"]
+        except ValueError:
+            expected_irr = None
+        assert row["irr_percent"] == expected_irr
+
+
+def test_row_errors_do_not_fail_the_batch():
+    results = calculate_batch_metrics([[-100, 60, 60], [], [-100, math.inf], [50, 50]], [0.1])
+    assert results[0]["payback_period"] == 2
+    assert results[1] == {"index": 1, "error": "Cash flow series is empty."}
+    assert results[2] == {"index": 2, "error": "Cash flows must be finite numbers."}
+    assert results[3]["irr_percent"] is None and "irr_error" in results[3]
+
+
+@pytest.mark.parametrize("cash_flows", [[[]], [[], []]])
+def test_all_empty_batch_reports_each_row(cash_flows):
+    results = calculate_batch_metrics(cash_flows, [0.1, 0.2])
+    assert results == [{"index": i, "error": "Cash flow series is empty."} for i in range(len(cash_flows))]
+
+
+def test_empty_batch():
+    assert calculate_batch_metrics([], [0.1]) == []
+
+
+def test_batch_rejects_mismatched_guesses():
+    with pytest.raises(ValueError):
+        calculate_batch_metrics([[-100, 120]], [0.1], irr_guesses=[0.1, 0.2])
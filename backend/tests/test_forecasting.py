@@ -0,0 +1,115 @@
+from statistics import NormalDist
+
+import numpy as np
+import pytest
+
+from services.forecasting import MODELS, ForecastStore, SeriesForecast, fit_exponential_smoothing
+
+
+def _series(n, seed, trend=0.0):
+    rng = np.random.default_rng(seed)
+    return (100 + trend * np.arange(n) + np.cumsum(rng.normal(0, 2, n))).tolist()
+
+
+def _recurse(y, alpha, beta, phi, trend):
+    # 逐期标量递推，作为向量化实现的参照
+    first = 2 if trend else 1
+    level = y[first - 1]
+    slope = y[1] - y[0] if trend else 0.0
+    sse = 0.0
+    for value in y[first:]:
+        fitted = level + phi * slope
+        error = value - fitted
+        sse += error * error
+        level = fitted + alpha * error
+        slope = phi * slope + alpha * beta * error
+    return level, slope, sse
+
+
+def _assert_matches_recursion(state, i, y):
+    level, slope, sse = _recurse(y, state.alpha[i], state.beta[i], state.phi[i], state.model[i] != "simple")
+    assert state.level[i] == pytest.approx(level, rel=1e-10)
+    assert state.trend[i] == pytest.approx(slope, rel=1e-10, abs=1e-9)
+    assert state.sse[i] == pytest.approx(sse, rel=1e-10)
+
+
+@pytest.mark.parametrize("model", MODELS + ("auto",))
+def test_ragged_batch_matches_scalar_recursion(model):
+    series = [_series(n, seed=n, trend=t) for n, t in [(12, 0.0), (40, 1.5), (7, -3.0), (25, 0.5)]]
+    state = fit_exponential_smoothing(series, model)
+    for i, y in enumerate(series):
+        _assert_matches_recursion(state, i, y)
+        assert state.length[i] == len(y)
+        if model != "auto":
+            assert state.model[i] == model
+            single = fit_exponential_smoothing([y], model)
+            assert single.alpha[0] == state.alpha[i] and single.sse[0] == pytest.approx(state.sse[i])
+
+
+def test_incremental_append_continues_the_recursion():
+    history = {"a": _series(30, seed=1, trend=1.0), "b": _series(20, seed=2)}
+    forecast = SeriesForecast({name: y[:15] for name, y in history.items()})
+    forecast.append({"a": history["a"][15:], "b": history["b"][15:18]})
+    forecast.append({"b": history["b"][18:]})
+
+    assert forecast.version == 3
+    for i, name in enumerate(forecast.names):
+        assert forecast.history[i] == history[name]
+        _assert_matches_recursion(forecast.state, i, history[name])
+
+
+def test_refit_uses_the_whole_history():
+    history = _series(40, seed=3, trend=2.0)
+    forecast = SeriesForecast({"a": history[:10]}, model="holt")
+    forecast.append({"a": history[10:]}, refit=True)
+    fresh = fit_exponential_smoothing([history], "holt")
+    for field in ("alpha", "beta", "level", "trend", "sse"):
+        assert getattr(forecast.state, field)[0] == pytest.approx(getattr(fresh, field)[0])
+
+
+def test_linear_series_is_extrapolated_exactly():
+    forecast = SeriesForecast({"line": [10.0 + 3.0 * t for t in range(12)]}, model="holt").describe(horizon=3)
+    result = forecast["series"]["line"]
+    assert result["forecast"] == [46.0, 49.0, 52.0]
+    assert result["sigma"] == 0 and result["lower"] == result["upper"] == result["forecast"]
+
+
+def test_interval_width_matches_the_normal_quantile():
+    state = fit_exponential_smoothing([_series(30, seed=4)], "simple")
+    result = state.forecast(2, confidence=0.9)
+    sigma = np.sqrt(state.sse[0] / state.errors[0])
+    z = NormalDist().inv_cdf(0.95)
+    alpha = state.alpha[0]
+    widths = result["upper"][0] - result["lower"][0]
+    np.testing.assert_allclose(widths, [2 * z * sigma, 2 * z * sigma * np.sqrt(1 + alpha ** 2)])
+
+
+def test_invalid_input_is_rejected():
+    with pytest.raises(ValueError):
+        fit_exponential_smoothing([[1.0, 2.0]], "holt")
+    with pytest.raises(ValueError):
+        fit_exponential_smoothing([[1.0, float("nan"), 3.0]])
+    with pytest.raises(ValueError):
+        fit_exponential_smoothing([[1.0, 2.0, 3.0]], "arima")
+    forecast = SeriesForecast({"a": _series(10, seed=5)})
+    with pytest.raises(KeyError):
+        forecast.append({"missing": [1.0]})
+    with pytest.raises(ValueError):
+        forecast.append({"a": [float("inf")]})
+    assert forecast.version == 1 and len(forecast.history[0]) == 10
+
+
+def test_store_returns_forecasts_for_the_latest_observations():
+    store = ForecastStore()
+    history = _series(20, seed=6)
+    created = store.create({"a": history[:15]}, "simple", horizon=2)
+    appended = store.append(created["forecast_id"], {"a": history[15:]}, horizon=1)
+
+    expected = SeriesForecast({"a": history[:15]}, "simple")
+    expected.append({"a": history[15:]})
+    assert appended["version"] == 2
+    assert appended["series"] == expected.describe(horizon=1)["series"]
+    assert store.describe(created["forecast_id"], horizon=1) == appended
+    store.delete(created["forecast_id"])
+    with pytest.raises(KeyError):
+        store.describe(created["forecast_id"])
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from services.irr_solver import solve_irr
+
+npf = pytest.importorskip("numpy_financial")
+
+
+def _cash_flows(series: int, periods: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    cf = rng.normal(10, 5, (series, periods))
+    cf[:, 0] = -rng.uniform(50, 300, series)
+    return cf
+
+
+def test_matches_numpy_financial():
+    cf = _cash_flows(500, 20, seed=1)
+    reference = np.array([npf.irr(row) for row in cf])
+    result = solve_irr(cf)
+
+    # npf.irr 求不出的行不做比较；能求出的行本求解器也必须收敛且结果一致
+    solvable = ~np.isnan(reference)
+    assert solvable.sum() > 400
+    assert result.converged[solvable].all()
+    np.testing.assert_allclose(result.rates[solvable], reference[solvable], rtol=1e-8, atol=1e-10)
+
+
+def test_warm_start_gives_same_rates_in_fewer_iterations():
+    cf = _cash_flows(200, 30, seed=2)
+    cold = solve_irr(cf)
+    warm = solve_irr(cf, guess=cold.rates)
+
+    ok = cold.converged
+    np.testing.assert_allclose(warm.rates[ok], cold.rates[ok], rtol=1e-8, atol=1e-10)
+    assert warm.iterations[ok].sum() < cold.iterations[ok].sum()
+
+
+def test_trailing_zeros_do_not_change_the_rate():
+    cf = [-100.0, 30.0, 40.0, 50.0]
+    padded = solve_irr([cf + [0.0, 0.0, 0.0]])
+    assert padded.rates[0] == pytest.approx(npf.irr(cf), rel=1e-10)
+
+
+@pytest.mark.parametrize("cash_flows", [
+    [100.0, 50.0, 25.0],   # 没有负现金流
+    [-100.0, -50.0],       # 没有正现金流
+    [0.0, 0.0, 0.0]
+])
+def test_no_sign_change_has_no_rate(cash_flows):
+    result = solve_irr([cash_flows])
+    assert np.isnan(result.rates[0])
+    assert not result.bracketed[0]
+    assert not result.converged[0]
+
+
+def test_multiple_roots_pick_the_one_nearest_zero():
+    # (1 + r)² - 2.3(1 + r) + 1.3 = 0 的根为 r = 0.3 与 r = 0，npf.irr 取离 0 最近的根
+    cf = [1.0, -2.3, 1.3]
+    result = solve_irr([cf])
+    assert result.rates[0] == pytest.approx(npf.irr(cf), abs=1e-9)
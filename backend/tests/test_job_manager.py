@@ -0,0 +1,143 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import api.jobs
+import services.job_manager as jm
+from services.job_manager import CANCELLED, COMPLETED, FAILED, QUEUED, RUNNING, JobManager, JobQueueFull
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    # 步骤在线程池中执行，测试可以用 Event 控制每一步何时结束
+    executor = ThreadPoolExecutor(max_workers=4)
+    monkeypatch.setattr(jm, "get_process_pool", lambda: executor)
+    monkeypatch.setattr(jm, "pool_size", lambda: 1)
+    yield executor
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+@pytest.fixture
+def manager(pool):
+    manager = JobManager(concurrency=1)
+    yield manager
+    manager.shutdown()
+
+
+def _wait(job, *states, timeout=5.0):
+    deadline = time.time() + timeout
+    while job.status not in states:
+        assert time.time() < deadline, f"job stayed {job.status}"
+        time.sleep(0.005)
+    return job
+
+
+def _blocker(manager, gate):
+    return manager.submit("block", gate.wait, [(5,)], list)
+
+
+def test_higher_priority_runs_first_and_ties_are_fifo(manager):
+    gate, order = threading.Event(), []
+    blocker = _blocker(manager, gate)
+    _wait(blocker, RUNNING)
+    jobs = [manager.submit(name, order.append, [(name,)], list, priority=priority)
+            for name, priority in [("low", 0), ("high", 5), ("mid-1", 1), ("mid-2", 1)]]
+    gate.set()
+    for job in jobs:
+        _wait(job, COMPLETED)
+    assert order == ["high", "mid-1", "mid-2", "low"]
+
+
+def test_cancel_while_queued_never_runs(manager):
+    gate, ran = threading.Event(), []
+    blocker = _blocker(manager, gate)
+    queued = manager.submit("queued", ran.append, [(1,)], list)
+    assert manager.cancel(queued.id).status == CANCELLED
+    gate.set()
+    _wait(blocker, COMPLETED)
+    follow_up = manager.submit("after", lambda: None, [()], list)
+    _wait(follow_up, COMPLETED)
+    assert ran == [] and queued.result is None
+
+
+def test_cancel_while_running_stops_at_a_step_boundary(manager):
+    started, gate, finalized = threading.Event(), threading.Event(), []
+
+    def step(i):
+        started.set()
+        gate.wait(5)
+        return i
+
+    job = manager.submit("steps", step, [(i,) for i in range(10)], finalized.append)
+    assert started.wait(5)
+    assert manager.cancel(job.id).status == RUNNING
+    gate.set()
+    _wait(job, CANCELLED)
+    assert job.completed_steps < 10
+    assert finalized == [] and job.result is None
+
+
+def test_failed_step_marks_the_job_failed(manager):
+    def step():
+        raise ValueError("boom")
+
+    job = _wait(manager.submit("fail", step, [()], list), FAILED)
+    assert job.error == "boom"
+
+
+def test_purge_drops_expired_and_oldest_finished_jobs(pool):
+    manager = JobManager(concurrency=1, store_size=2, ttl=60.0)
+    try:
+        jobs = [_wait(manager.submit("quick", lambda: None, [()], list), COMPLETED) for _ in range(3)]
+        # 超出容量时淘汰最早结束的作业
+        assert manager.get(jobs[0].id) is None
+        assert manager.get(jobs[1].id) is jobs[1]
+        # 超过保留时间的作业被移除
+        jobs[1].finished_at -= 120
+        assert manager.get(jobs[1].id) is None
+        assert manager.get(jobs[2].id) is jobs[2]
+    finally:
+        manager.shutdown()
+
+
+def test_full_queue_is_rejected_with_503(pool, monkeypatch):
+    gate = threading.Event()
+    manager = JobManager(concurrency=1, max_queued=1)
+    monkeypatch.setattr(api.jobs, "job_manager", manager)
+    app = FastAPI()
+    app.include_router(api.jobs.router)
+    client = TestClient(app)
+    payload = {"base": 100, "std_dev": 10, "distribution": "normal", "iterations": 100}
+    try:
+        _wait(_blocker(manager, gate), RUNNING)
+        manager.submit("queued", lambda: None, [()], list)
+        with pytest.raises(JobQueueFull):
+            manager.submit("queued", lambda: None, [()], list)
+        response = client.post("/jobs/monte-carlo", json=payload)
+        assert response.status_code == 503
+        assert manager.stats()[QUEUED] == 1
+    finally:
+        gate.set()
+        manager.shutdown()
+
+
+def test_shutdown_stops_workers_and_rejects_new_jobs(pool):
+    manager = JobManager(concurrency=1)
+    started, gate = threading.Event(), threading.Event()
+    running = manager.submit("steps", lambda: (started.set(), gate.wait(5)), [()] * 5, list)
+    assert started.wait(5)
+    queued = manager.submit("queued", lambda: None, [()], list)
+    manager.shutdown()
+    gate.set()
+
+    for worker in manager._workers:
+        worker.join(5)
+        assert not worker.is_alive()
+    assert _wait(running, CANCELLED).result is None
+    assert queued.status == CANCELLED
+    with pytest.raises(JobQueueFull):
+        manager.submit("late", lambda: None, [()], list)
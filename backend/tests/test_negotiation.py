@@ -0,0 +1,39 @@
+import json
+
+import numpy as np
+import pytest
+from pydantic import BaseModel
+
+import api.negotiation as negotiation
+from api.negotiation import FastJSONResponse
+
+
+class _Point(BaseModel):
+    x: float
+
+
+CONTENT = {
+    "mean": float("nan"),
+    "bounds": [float("-inf"), 1.5, (2, float("inf"))],
+    "samples": np.array([np.nan, 1.25, np.inf]),
+    "single": np.float32("nan"),
+    "count": np.int64(3),
+    "nested": {"point": _Point(x=2.0), "label": "ok"}
+}
+EXPECTED = {
+    "mean": None,
+    "bounds": [None, 1.5, [2, None]],
+    "samples": [None, 1.25, None],
+    "single": None,
+    "count": 3,
+    "nested": {"point": {"x": 2.0}, "label": "ok"}
+}
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_non_finite_floats_render_as_null(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(negotiation, "orjson", None)
+    elif negotiation.orjson is None:
+        pytest.skip("orjson is not installed")
+    assert json.loads(FastJSONResponse(CONTENT).body) == EXPECTED
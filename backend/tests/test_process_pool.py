@@ -0,0 +1,41 @@
+import time
+
+import pytest
+
+from services.process_pool import POOL_WORKERS_ENV, get_process_pool, pending_work_items, shutdown_process_pool
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setenv(POOL_WORKERS_ENV, "1")
+    shutdown_process_pool()
+    yield get_process_pool()
+    shutdown_process_pool()
+
+
+def _wait_idle(timeout=10.0):
+    deadline = time.time() + timeout
+    while pending_work_items():
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+
+def test_pending_count_tracks_submit_and_map(pool):
+    futures = [pool.submit(time.sleep, 0.2) for _ in range(3)]
+    assert pending_work_items() == 3
+    for future in futures:
+        future.result()
+    _wait_idle()
+
+    assert list(pool.map(abs, [-1, -2, -3])) == [1, 2, 3]
+    _wait_idle()
+
+
+def test_failed_and_cancelled_work_is_not_counted(pool):
+    failed = pool.submit(int, "not a number")
+    with pytest.raises(ValueError):
+        failed.result()
+    pool.submit(time.sleep, 0.2)
+    pool.submit(time.sleep, 0.2)
+    shutdown_process_pool()
+    assert pending_work_items() == 0
@@ -0,0 +1,76 @@
+from statistics import NormalDist
+
+import numpy as np
+import pytest
+
+from services.quasi_random import SOBOL_MAX_DIMENSION, latin_hypercube, normal_quantile, sobol_points
+
+# 未加扰 Sobol 序列（Gray 码顺序，Joe & Kuo 方向数）的前 8 个点，与 scipy.stats.qmc.Sobol(scramble=False) 一致
+KNOWN_SOBOL = [
+    [0.0, 0.0, 0.0, 0.0],
+    [0.5, 0.5, 0.5, 0.5],
+    [0.75, 0.25, 0.25, 0.25],
+    [0.25, 0.75, 0.75, 0.75],
+    [0.375, 0.375, 0.625, 0.875],
+    [0.875, 0.875, 0.125, 0.375],
+    [0.625, 0.125, 0.875, 0.625],
+    [0.125, 0.625, 0.375, 0.125],
+]
+
+
+def _cells(points, bins):
+    return np.floor(points * bins).astype(int)
+
+
+def test_unscrambled_points_match_known_values():
+    np.testing.assert_allclose(sobol_points(8, 4, scramble=False), KNOWN_SOBOL, atol=1e-15)
+
+
+@pytest.mark.parametrize("scramble", [False, True])
+def test_every_dimension_is_stratified(scramble):
+    # 每一维都是 (0, 1)-序列：前 2^m 个点在 2^m 等分的每段中恰好一个
+    n = 256
+    points = sobol_points(n, SOBOL_MAX_DIMENSION, np.random.default_rng(0), scramble=scramble)
+    assert ((points > 0) & (points < 1)).all()
+    for column in _cells(points, n).T:
+        assert sorted(column) == list(range(n))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_first_two_dimensions_form_a_net(seed):
+    # 前两维构成 (0, m, 2)-网：任意 2^a × 2^b（a + b = m）的网格中每格恰好一个点，加扰后仍成立
+    m = 8
+    points = sobol_points(1 << m, 2, np.random.default_rng(seed))
+    for a in range(m + 1):
+        cells = _cells(points[:, 0], 1 << a) * (1 << (m - a)) + _cells(points[:, 1], 1 << (m - a))
+        assert len(set(cells.tolist())) == 1 << m
+
+
+def test_scrambling_is_reproducible_and_unbiased():
+    first = sobol_points(1024, 3, np.random.default_rng(42))
+    again = sobol_points(1024, 3, np.random.default_rng(42))
+    np.testing.assert_array_equal(first, again)
+    assert not np.array_equal(first, sobol_points(1024, 3, np.random.default_rng(43)))
+
+    means = [sobol_points(64, 2, np.random.default_rng(seed)).mean(axis=0) for seed in range(200)]
+    np.testing.assert_allclose(np.mean(means, axis=0), 0.5, atol=2e-3)
+
+
+def test_sobol_rejects_bad_arguments():
+    with pytest.raises(ValueError):
+        sobol_points(8, SOBOL_MAX_DIMENSION + 1)
+    with pytest.raises(ValueError):
+        sobol_points(0, 2)
+
+
+def test_latin_hypercube_is_stratified():
+    n = 100
+    points = latin_hypercube(n, 5, np.random.default_rng(1))
+    for column in _cells(points, n).T:
+        assert sorted(column) == list(range(n))
+
+
+def test_normal_quantile_matches_inverse_cdf():
+    u = np.concatenate([np.linspace(1e-9, 0.02, 50), np.linspace(0.02, 0.98, 200), 1 - np.linspace(1e-9, 0.02, 50)])
+    expected = [NormalDist().inv_cdf(p) for p in u]
+    np.testing.assert_allclose(normal_quantile(u), expected, rtol=2e-9, atol=2e-9)
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from services.regression_models import RegressionModelStore
+
+
+def _data(n, seed):
+    rng = np.random.default_rng(seed)
+    x = rng.normal(0, 2, (n, 2))
+    return x, 3.0 + x @ [1.5, -0.5] + rng.normal(0, 0.3, n)
+
+
+def test_appended_batches_match_a_single_fit():
+    store = RegressionModelStore()
+    x, y = _data(120, seed=1)
+    whole = store.create(["a", "b"], [(x, y)]).describe()
+
+    stored = store.create(["a", "b"], [(x[:20], y[:20])])
+    store.append(stored.id, [(x[20:50], y[20:50]), (x[50:], y[50:])])
+    appended = store.get(stored.id).describe()
+    assert appended["version"] == 2
+    for key, value in whole["coefficients"].items():
+        assert appended["coefficients"][key] == pytest.approx(value, rel=1e-10)
+    assert appended["r_squared"] == pytest.approx(whole["r_squared"], rel=1e-10)
+
+
+def test_invalid_batch_leaves_the_model_unchanged():
+    store = RegressionModelStore()
+    stored = store.create(["a", "b"], [_data(30, seed=2)])
+    before, model = stored.describe(), stored.model
+    with pytest.raises(ValueError):
+        store.append(stored.id, [_data(10, seed=3), ([[1.0, 2.0]], [float("nan")])])
+    assert stored.model is model and stored.describe() == before
@@ -0,0 +1,119 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import services.result_cache as rc
+from services.result_cache import ResultCache, request_key
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(rc, "time", SimpleNamespace(monotonic=clock, perf_counter=time.perf_counter))
+    return clock
+
+
+def _concurrent(cache, compute, n=8):
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(cache.get_or_compute("ns", {"a": 1}, compute))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(n)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def _wait_coalesced(cache, count):
+    deadline = time.time() + 5
+    while cache.stats()["coalesced"] < count:
+        assert time.time() < deadline
+        time.sleep(0.001)
+
+
+def test_concurrent_misses_compute_once():
+    cache, gate, calls = ResultCache(), threading.Event(), []
+
+    def compute():
+        calls.append(1)
+        gate.wait(5)
+        return {"value": 42}
+
+    threads, results, errors = _concurrent(cache, compute)
+    # 所有请求都已挂到同一个进行中的计算上之后再放行
+    _wait_coalesced(cache, 7)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1 and errors == []
+    assert results == [{"value": 42}] * 8
+    assert cache.stats()["misses"] == 1 and cache.stats()["coalesced"] == 7
+
+
+def test_failure_reaches_every_waiter_and_is_not_cached():
+    cache, gate = ResultCache(), threading.Event()
+
+    def compute():
+        gate.wait(5)
+        raise ValueError("bad input")
+
+    threads, results, errors = _concurrent(cache, compute, n=4)
+    _wait_coalesced(cache, 3)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == [] and len(errors) == 4
+    assert all(isinstance(e, ValueError) for e in errors)
+    assert cache.get_or_compute("ns", {"a": 1}, lambda: "ok") == "ok"
+
+
+def test_entries_expire_after_ttl(clock):
+    cache, calls = ResultCache(ttl=10.0), []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get_or_compute("ns", {"a": 1}, compute) == 1
+    clock.now += 9.9
+    assert cache.get_or_compute("ns", {"a": 1}, compute) == 1
+    clock.now += 0.2
+    assert cache.get_or_compute("ns", {"a": 1}, compute) == 2
+    assert cache.stats()["hits"] == 1 and cache.stats()["evictions"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(max_size=2)
+    for key in ("a", "b"):
+        cache.get_or_compute("ns", key, lambda: key)
+    cache.get_or_compute("ns", "a", lambda: "recomputed")
+    cache.get_or_compute("ns", "c", lambda: "c")
+
+    assert cache.get_or_compute("ns", "a", lambda: "recomputed") == "a"
+    assert cache.get_or_compute("ns", "b", lambda: "recomputed") == "recomputed"
+
+
+def test_key_ignores_field_order_and_disabled_cache_bypasses():
+    assert request_key("ns", {"a": 1, "b": [1, 2]}) == request_key("ns", {"b": [1, 2], "a": 1})
+    assert request_key("ns", {"a": 1}) != request_key("other", {"a": 1})
+
+    cache = ResultCache()
+    cache.get_or_compute("ns", {"a": 1}, lambda: 1)
+    assert cache.get_or_compute("ns", {"a": 1}, lambda: 2, enabled=False) == 2
+    assert cache.stats()["bypassed"] == 1
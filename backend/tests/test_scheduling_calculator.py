@@ -0,0 +1,120 @@
+import random
+
+import pytest
+
+from services.scheduling_calculator import improved_greedy_schedule, improved_resource_smoothing
+
+
+def _reference_greedy(tasks):
+    # 原始实现：逐个时间段线性扫描，作为结果基准
+    occupied = set()
+    schedule = []
+    for task in sorted(tasks, key=lambda t: (-t.get('priority', 1), t['deadline'])):
+        duration = task['duration']
+        for start in range(task.get('earliest_start', 0), task['deadline'] - duration + 1):
+            if all(t not in occupied for t in range(start, start + duration)):
+                occupied.update(range(start, start + duration))
+                schedule.append({'name': task['name'], 'start': start, 'end': start + duration,
+                                 'resource_usage': duration})
+                break
+        else:
+            schedule.append({'name': task['name'], 'start': None, 'end': None, 'skipped': True,
+                             'reason': 'No feasible slot in window'})
+    return schedule
+
+
+def _random_tasks(rng, n, horizon):
+    tasks = []
+    for i in range(n):
+        duration = rng.randint(0, 12)
+        earliest = rng.randint(0, horizon)
+        task = {'name': f't{i}', 'duration': duration, 'earliest_start': earliest,
+                'deadline': earliest + duration + rng.randint(-2, 30), 'priority': rng.randint(1, 4)}
+        if rng.random() < 0.2:
+            del task['earliest_start']
+        tasks.append(task)
+    return tasks
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_greedy_matches_reference(seed):
+    rng = random.Random(seed)
+    tasks = _random_tasks(rng, rng.randint(1, 80), rng.randint(5, 200))
+    assert improved_greedy_schedule(tasks) == _reference_greedy(tasks)
+
+
+def test_greedy_empty():
+    assert improved_greedy_schedule([]) == []
+
+
+def _reference_first_fit(tasks, total_resources, total_time):
+    # 原始实现：按起点、窗口长度逐一检查每个时间段
+    cap = (total_resources / total_time) * 1.2
+    slots = [0.0] * total_time
+    result = []
+    for task in tasks:
+        workload, flexibility = task['workload'], task.get('flexibility', 0)
+        placed = None
+        for start in range(0, total_time - flexibility):
+            for size in range(1, flexibility + 2):
+                window = range(start, start + size)
+                if all(slots[s] + workload / size <= cap for s in window):
+                    placed = window
+                    break
+            if placed:
+                break
+        result.append(_placement(task, slots, placed))
+    return result
+
+
+def _reference_least_loaded(tasks, total_resources, total_time):
+    # 穷举所有可行窗口，取分配后峰值最低者，平局取更早、更短的
+    cap = (total_resources / total_time) * 1.2
+    slots = [0.0] * total_time
+    result = []
+    for task in tasks:
+        workload, flexibility = task['workload'], task.get('flexibility', 0)
+        best = None
+        for start in range(0, total_time - flexibility):
+            for size in range(1, flexibility + 2):
+                load = max(slots[start:start + size]) + workload / size
+                if load <= cap and (best is None or load < best[0]):
+                    best = (load, range(start, start + size))
+        result.append(_placement(task, slots, best[1] if best else None))
+    return result
+
+
+def _placement(task, slots, window):
+    if window is None:
+        return {'name': task['name'], 'slots': [], 'allocated_per_slot': 0, 'skipped': True}
+    per_slot = task['workload'] / len(window)
+    for s in window:
+        slots[s] += per_slot
+    return {'name': task['name'], 'slots': list(window), 'allocated_per_slot': round(per_slot, 2)}
+
+
+def _random_workloads(rng, n, total_time):
+    tasks = []
+    for i in range(n):
+        workload = rng.choice([0, -rng.uniform(0, 5), rng.uniform(0, 40), float(rng.randint(1, 30))])
+        tasks.append({'name': f'w{i}', 'workload': workload, 'flexibility': rng.randint(0, total_time + 1)})
+    return tasks
+
+
+@pytest.mark.parametrize("policy, reference", [
+    ("first_fit", _reference_first_fit),
+    ("least_loaded", _reference_least_loaded)
+])
+@pytest.mark.parametrize("seed", range(30))
+def test_smoothing_matches_reference(policy, reference, seed):
+    rng = random.Random(seed)
+    total_time = rng.randint(1, 40)
+    total_resources = rng.randint(10, 400)
+    tasks = _random_workloads(rng, rng.randint(1, 60), total_time)
+    assert improved_resource_smoothing(tasks, total_resources, total_time, policy) == \
+        reference(tasks, total_resources, total_time)
+
+
+def test_smoothing_rejects_unknown_policy():
+    with pytest.raises(ValueError):
+        improved_resource_smoothing([], 10, 10, "random")
@@ -0,0 +1,81 @@
+import math
+from statistics import NormalDist
+
+import numpy as np
+import pytest
+
+from services.finance_calculator import calculate_npv
+from services.stochastic_npv import NPVSimulationPlan, _normal_cdf, perform_npv_simulation
+
+FLOWS = [{"base": -1000.0, "std_dev": 50.0}, {"base": 400.0, "std_dev": 80.0},
+         {"base": 450.0, "std_dev": 80.0}, {"base": 500.0, "std_dev": 100.0}]
+RATE = {"base": 0.08, "std_dev": 0.0}
+
+
+def _expected_std(correlation):
+    # 折现率固定时 NPV 是各期现金流的线性组合：Var = wᵀ Σ w
+    weights = np.array([f["std_dev"] * 1.08 ** -t for t, f in enumerate(FLOWS)])
+    return math.sqrt(weights @ np.asarray(correlation) @ weights)
+
+
+def test_deterministic_inputs_reproduce_calculate_npv():
+    flows = [{"base": f["base"], "std_dev": 0.0} for f in FLOWS]
+    plan = NPVSimulationPlan(flows, RATE)
+    npv = plan.simulate(np.random.default_rng(0), 100)
+    expected = calculate_npv([f["base"] for f in flows], RATE["base"])
+    np.testing.assert_allclose(npv, expected, atol=0.01)
+
+
+@pytest.mark.parametrize("rho", [0.0, 0.6, 1.0])
+def test_moments_follow_the_correlation(rho):
+    correlation = np.full((4, 4), rho) + (1 - rho) * np.eye(4)
+    if rho == 1.0:
+        correlation += 1e-9 * np.eye(4)  # 完全相关时保持正定
+    result = perform_npv_simulation(FLOWS, RATE, 200_000, correlation=correlation.tolist(), seed=1)
+    expected_mean = calculate_npv([f["base"] for f in FLOWS], RATE["base"])
+    expected_std = _expected_std(correlation)
+
+    assert result["deterministic_npv"] == pytest.approx(expected_mean, abs=0.01)
+    assert result["mean"] == pytest.approx(expected_mean, abs=4 * expected_std / math.sqrt(200_000) + 0.01)
+    assert result["std_dev"] == pytest.approx(expected_std, rel=0.01)
+    assert result["percentiles"]["p50"] == pytest.approx(expected_mean, abs=0.02 * expected_std)
+    assert result["percentiles"]["p5"] == pytest.approx(expected_mean - 1.6449 * expected_std, abs=0.03 * expected_std)
+
+
+def test_uncertain_rate_raises_expected_npv_of_positive_flows():
+    flows = [{"base": 100.0, "std_dev": 0.0}] * 5
+    fixed = perform_npv_simulation(flows, {"base": 0.1, "std_dev": 0.0}, 50_000)
+    uncertain = perform_npv_simulation(flows, {"base": 0.1, "std_dev": 0.05}, 50_000)
+    # 折现因子是折现率的凸函数，折现率有波动时期望 NPV 高于确定值（Jensen 不等式）
+    assert uncertain["mean"] > fixed["mean"]
+    assert uncertain["std_dev"] > 0 and fixed["std_dev"] == 0
+
+
+def test_same_seed_is_reproducible():
+    first = perform_npv_simulation(FLOWS, RATE, 30_000, seed=7)
+    assert perform_npv_simulation(FLOWS, RATE, 30_000, seed=7) == first
+    assert perform_npv_simulation(FLOWS, RATE, 30_000, seed=8) != first
+
+
+def test_triangular_marginals_stay_within_bounds():
+    plan = NPVSimulationPlan([{"base": 10.0, "std_dev": 2.0, "distribution": "triangular"}] * 2,
+                             {"base": 0.0, "std_dev": 0.0}, [[1.0, 0.5], [0.5, 1.0]])
+    npv = plan.simulate(np.random.default_rng(3), 50_000)
+    assert npv.min() >= 16.0 and npv.max() <= 24.0
+    assert np.mean(npv) == pytest.approx(20.0, abs=0.02)
+
+
+@pytest.mark.parametrize("correlation, message", [
+    ([[1.0, 0.2], [0.2, 1.0]], "4x4 or 5x5"),
+    ((np.eye(4) + 0.1).tolist(), "unit diagonal"),
+    ((np.full((4, 4), 1.5) - 0.5 * np.eye(4)).tolist(), "positive definite")
+])
+def test_invalid_correlation_is_rejected(correlation, message):
+    with pytest.raises(ValueError, match=message):
+        NPVSimulationPlan(FLOWS, RATE, correlation)
+
+
+def test_normal_cdf_matches_the_standard_library():
+    z = np.linspace(-6, 6, 241)
+    expected = [NormalDist().cdf(v) for v in z]
+    np.testing.assert_allclose(_normal_cdf(z), expected, atol=1.5e-7)